@@ -0,0 +1,94 @@
+{#
+    Table physique de fact_reviews, partitionnée par mois de review_day.
+
+    dbt-postgres ne crée pas de table partitionnée : ce macro crée la table
+    mère, une partition DEFAULT (avis sans date ou hors de la plage) et une
+    partition par mois, de months_back mois avant le mois courant à
+    months_ahead mois après. Les colonnes de la table mère sont copiées (LIKE)
+    d'une compilation sans ligne de la requête du modèle (fact_reviews_select) :
+    reviews_enriched doit donc exister. Idempotent : à lancer avant chaque
+    dbt run de fact_reviews.
+
+        dbt run-operation create_fact_reviews_partitions --args '{months_back: 72}'
+
+    Tout se fait en une seule instruction (bloc DO), donc dans une seule
+    transaction : une ancienne table fact_reviews non partitionnée est
+    renommée, ses lignes sont recopiées dans la table partitionnée puis elle
+    est supprimée ; en cas d'erreur, l'ancienne table reste en place.
+    Les lignes d'un mois encore dans la partition DEFAULT sont déplacées dans
+    la nouvelle partition avant son rattachement.
+#}
+{% macro create_fact_reviews_partitions(months_back=24, months_ahead=3) %}
+    {% set relation = api.Relation.create(database=target.database, schema=target.schema, identifier='fact_reviews') %}
+    {% set legacy_relation = relation.incorporate(path={'identifier': 'fact_reviews_unpartitioned'}) %}
+    {% set default_partition = relation.incorporate(path={'identifier': 'fact_reviews_default'}) %}
+
+    {% set statements = [] %}
+
+    {% do statements.append("
+        IF EXISTS (SELECT 1 FROM pg_class WHERE oid = to_regclass('" ~ relation ~ "') AND relkind = 'r') THEN
+            ALTER TABLE " ~ relation ~ " RENAME TO " ~ legacy_relation.identifier ~ ";
+        END IF
+    ") %}
+
+    {% do statements.append("
+        IF to_regclass('" ~ relation ~ "') IS NULL THEN
+            CREATE TEMP TABLE fact_reviews__model ON COMMIT DROP AS
+            SELECT * FROM (" ~ fact_reviews_select(incremental=false) ~ ") model
+            WHERE FALSE;
+            CREATE TABLE " ~ relation ~ " (LIKE fact_reviews__model) PARTITION BY RANGE (review_day);
+        END IF
+    ") %}
+
+    {% do statements.append(
+        "CREATE TABLE IF NOT EXISTS " ~ default_partition ~ " PARTITION OF " ~ relation ~ " DEFAULT"
+    ) %}
+
+    {% set today = modules.datetime.date.today() %}
+    {% set first_month = today.year * 12 + today.month - 1 - months_back %}
+    {% for month_index in range(first_month, first_month + months_back + months_ahead + 1) %}
+        {% set month_start = modules.datetime.date(month_index // 12, month_index % 12 + 1, 1) %}
+        {% set month_end = modules.datetime.date((month_index + 1) // 12, (month_index + 1) % 12 + 1, 1) %}
+        {% set partition = relation.incorporate(path={'identifier': 'fact_reviews_p' ~ month_start.strftime('%Y%m')}) %}
+        {% set month_range = "review_day >= '" ~ month_start ~ "' AND review_day < '" ~ month_end ~ "'" %}
+
+        {% do statements.append("
+            IF to_regclass('" ~ partition ~ "') IS NULL THEN
+                CREATE TABLE " ~ partition ~ " (LIKE " ~ relation ~ " INCLUDING DEFAULTS);
+                WITH moved AS (
+                    DELETE FROM " ~ default_partition ~ " WHERE " ~ month_range ~ " RETURNING *
+                )
+                INSERT INTO " ~ partition ~ " SELECT * FROM moved;
+                ALTER TABLE " ~ relation ~ " ATTACH PARTITION " ~ partition ~ "
+                    FOR VALUES FROM ('" ~ month_start ~ "') TO ('" ~ month_end ~ "');
+            END IF
+        ") %}
+    {% endfor %}
+
+    {# Recopie de l'ancienne table (colonnes communes), routée vers les partitions #}
+    {% do statements.append("
+        IF to_regclass('" ~ legacy_relation ~ "') IS NOT NULL THEN
+            SELECT string_agg(quote_ident(attname), ', ' ORDER BY attnum) INTO copied_columns
+            FROM pg_attribute
+            WHERE attrelid = to_regclass('" ~ relation ~ "') AND attnum > 0 AND NOT attisdropped
+              AND attname IN (
+                  SELECT attname FROM pg_attribute
+                  WHERE attrelid = to_regclass('" ~ legacy_relation ~ "') AND attnum > 0 AND NOT attisdropped
+              );
+            EXECUTE format('INSERT INTO %s (%s) SELECT %s FROM %s',
+                           '" ~ relation ~ "', copied_columns, copied_columns, '" ~ legacy_relation ~ "');
+            DROP TABLE " ~ legacy_relation ~ ";
+        END IF
+    ") %}
+
+    {% do run_query("
+        DO $$
+        DECLARE
+            copied_columns TEXT;
+        BEGIN
+        " ~ statements | join(";\n") ~ ";
+        END $$
+    ") %}
+    {% do adapter.commit() %}
+    {{ log("fact_reviews : " ~ (months_back + months_ahead + 1) ~ " partitions mensuelles + DEFAULT", info=True) }}
+{% endmacro %}
@@ -0,0 +1,13 @@
+{#
+    Clé stable d'un avis, dérivée de son contenu.
+    Même formule que add_review_key() dans dags/staging_loader.py : la clé est
+    calculée à l'ingestion, cette macro ne sert qu'aux lignes chargées avant.
+#}
+{% macro review_key(bank, agency, author, review_text) %}
+    MD5(CONCAT_WS('-',
+        COALESCE({{ bank }}, ''),
+        COALESCE({{ agency }}, ''),
+        COALESCE({{ author }}, ''),
+        LOWER(TRIM(COALESCE({{ review_text }}, '')))
+    ))
+{% endmacro %}
@@ -1,48 +1,47 @@
 -- VUE : customer_insights (Insights temporels globaux)
+-- Calculée sur l'agrégat quotidien fact_reviews_daily : moyennes = SUM(somme) / SUM(compte)
 {{ config(materialized='view', tags=['analytics', 'looker']) }}
 
-SELECT 
-    DATE_TRUNC('quarter', TO_DATE(fr.review_date, 'YYYY-MM-DD')) AS review_quarter,
+SELECT
+    DATE_TRUNC('quarter', d.review_day) AS review_quarter,
     db.bank_name,
-    COUNT(fr.review_id) AS total_reviews,
+    SUM(d.review_count) AS total_reviews,
     COUNT(DISTINCT br.branch_key) AS active_branches,
     COUNT(DISTINCT loc.location_key) AS locations_covered,
-    ROUND(AVG(fr.review_rating)::numeric, 2) AS avg_rating,
-    ROUND(AVG(fr.vader_sentiment_score)::numeric, 3) AS avg_vader_sentiment,
-    ROUND(AVG(fr.textblob_sentiment_score)::numeric, 3) AS avg_textblob_sentiment,
-    ROUND(AVG(fr.sentiment_confidence)::numeric, 3) AS avg_confidence,
-    SUM(fr.is_positive) AS positive_count,
-    SUM(fr.is_negative) AS negative_count,
-    SUM(fr.is_neutral) AS neutral_count,
-    ROUND(SUM(fr.is_positive) * 100.0 / COUNT(fr.review_id), 2) AS positive_rate,
-    ROUND(SUM(fr.is_negative) * 100.0 / COUNT(fr.review_id), 2) AS negative_rate,
-    COUNT(*) FILTER (WHERE fr.review_rating = 5) AS rating_5_count,
-    COUNT(*) FILTER (WHERE fr.review_rating = 4) AS rating_4_count,
-    COUNT(*) FILTER (WHERE fr.review_rating = 3) AS rating_3_count,
-    COUNT(*) FILTER (WHERE fr.review_rating = 2) AS rating_2_count,
-    COUNT(*) FILTER (WHERE fr.review_rating = 1) AS rating_1_count,
+    ROUND((SUM(d.rating_sum) * 1.0 / SUM(d.review_count))::numeric, 2) AS avg_rating,
+    ROUND((SUM(d.vader_score_sum) / NULLIF(SUM(d.scored_count), 0))::numeric, 3) AS avg_vader_sentiment,
+    ROUND((SUM(d.textblob_score_sum) / NULLIF(SUM(d.scored_count), 0))::numeric, 3) AS avg_textblob_sentiment,
+    ROUND((SUM(d.sentiment_confidence_sum) / NULLIF(SUM(d.scored_count), 0))::numeric, 3) AS avg_confidence,
+    SUM(d.positive_count) AS positive_count,
+    SUM(d.negative_count) AS negative_count,
+    SUM(d.neutral_count) AS neutral_count,
+    ROUND(SUM(d.positive_count) * 100.0 / SUM(d.review_count), 2) AS positive_rate,
+    ROUND(SUM(d.negative_count) * 100.0 / SUM(d.review_count), 2) AS negative_rate,
+    SUM(d.rating_5_count) AS rating_5_count,
+    SUM(d.rating_4_count) AS rating_4_count,
+    SUM(d.rating_3_count) AS rating_3_count,
+    SUM(d.rating_2_count) AS rating_2_count,
+    SUM(d.rating_1_count) AS rating_1_count,
     ROUND(
-        (COUNT(*) FILTER (WHERE fr.review_rating >= 4) -
-         COUNT(*) FILTER (WHERE fr.review_rating <= 2)) * 100.0 / COUNT(fr.review_id), 2
+        (SUM(d.rating_5_count + d.rating_4_count) -
+         SUM(d.rating_2_count + d.rating_1_count)) * 100.0 / SUM(d.review_count), 2
     ) AS nps_score,
-    ROUND(AVG(fr.data_quality_score)::numeric, 2) AS avg_quality_score,
-    ROUND(AVG(fr.text_length)::numeric, 1) AS avg_text_length,
-    SUM(fr.is_detailed_review) AS detailed_reviews,
-    SUM(fr.needs_urgent_action) AS urgent_reviews,
-    LAG(ROUND(AVG(fr.review_rating)::numeric, 2)) OVER (
+    ROUND((SUM(d.quality_score_sum) * 1.0 / SUM(d.review_count))::numeric, 2) AS avg_quality_score,
+    ROUND((SUM(d.text_length_sum) * 1.0 / SUM(d.review_count))::numeric, 1) AS avg_text_length,
+    SUM(d.detailed_review_count) AS detailed_reviews,
+    SUM(d.urgent_action_count) AS urgent_reviews,
+    LAG(ROUND((SUM(d.rating_sum) * 1.0 / SUM(d.review_count))::numeric, 2)) OVER (
         PARTITION BY db.bank_name
-        ORDER BY DATE_TRUNC('quarter', TO_DATE(fr.review_date, 'YYYY-MM-DD'))
+        ORDER BY DATE_TRUNC('quarter', d.review_day)
     ) AS prev_quarter_rating,
-    LAG(COUNT(fr.review_id)) OVER (
+    LAG(SUM(d.review_count)) OVER (
         PARTITION BY db.bank_name
-        ORDER BY DATE_TRUNC('quarter', TO_DATE(fr.review_date, 'YYYY-MM-DD'))
+        ORDER BY DATE_TRUNC('quarter', d.review_day)
     ) AS prev_quarter_volume
-FROM {{ ref('fact_reviews') }} fr
-JOIN {{ ref('dim_bank') }} db ON fr.bank_key = db.bank_key
-JOIN {{ ref('dim_branch') }} br ON fr.branch_key = br.branch_key
-JOIN {{ ref('dim_location') }} loc ON fr.location_key::TEXT = loc.location_key::TEXT
-WHERE fr.review_date IS NOT NULL
-  AND fr.review_date ~ '^\\d{4}-\\d{2}-\\d{2}$'
-  AND TO_DATE(fr.review_date, 'YYYY-MM-DD') >= CURRENT_DATE - INTERVAL '24 months'
+FROM {{ ref('fact_reviews_daily') }} d
+JOIN {{ ref('dim_bank') }} db ON d.bank_key = db.bank_key
+JOIN {{ ref('dim_branch') }} br ON d.branch_key = br.branch_key
+JOIN {{ ref('dim_location') }} loc ON d.location_key = loc.location_key
+WHERE d.review_day >= CURRENT_DATE - INTERVAL '24 months'
 GROUP BY review_quarter, db.bank_name
-ORDER BY review_quarter DESC, db.bank_name
\ No newline at end of file
+ORDER BY review_quarter DESC, db.bank_name
@@ -1,4 +1,9 @@
-{{ config(materialized='table') }}
+{{ config(
+    materialized='incremental',
+    unique_key='bank_key',
+    incremental_strategy='delete+insert',
+    tags=['dimensions']
+) }}
 
 WITH bank_data AS (
     SELECT DISTINCT
@@ -7,9 +12,19 @@ WITH bank_data AS (
         ROUND(AVG(rating) OVER (PARTITION BY bank), 2) as avg_rating,
         COUNT(CASE WHEN sentiment = 'positive' THEN 1 END) OVER (PARTITION BY bank) as positive_reviews,
         COUNT(CASE WHEN sentiment = 'negative' THEN 1 END) OVER (PARTITION BY bank) as negative_reviews,
-        COUNT(CASE WHEN sentiment = 'neutral' THEN 1 END) OVER (PARTITION BY bank) as neutral_reviews
-    FROM {{ ref('fact_reviews') }}
+        COUNT(CASE WHEN sentiment = 'neutral' THEN 1 END) OVER (PARTITION BY bank) as neutral_reviews,
+        MAX(source_updated_at) OVER (PARTITION BY bank) as source_updated_at
+    FROM {{ ref('reviews_enriched') }}
     WHERE bank IS NOT NULL
+    {% if is_incremental() %}
+      -- Recalcul des seules banques touchées par le delta du jour
+      AND bank IN (
+          SELECT DISTINCT bank FROM {{ ref('reviews_enriched') }}
+          WHERE source_updated_at > (
+              SELECT COALESCE(MAX(source_updated_at), '1900-01-01'::timestamptz) FROM {{ this }}
+          )
+      )
+    {% endif %}
 ),
 
 bank_classification AS (
@@ -43,6 +58,7 @@ SELECT
     positive_percentage,
     performance_category,
     size_category,
+    source_updated_at,
     CURRENT_TIMESTAMP as created_at,
     CURRENT_TIMESTAMP as updated_at
-FROM bank_classification
\ No newline at end of file
+FROM bank_classification
@@ -1,4 +1,14 @@
-{{ config(materialized='table') }}
+{#
+    unique_key='agency' : toutes les lignes des agences touchées sont remplacées,
+    y compris les combinaisons (agency, bank, location) qui auraient disparu.
+#}
+{{ config(
+    materialized='incremental',
+    unique_key='agency',
+    incremental_strategy='delete+insert',
+    tags=['dimensions'],
+    indexes=[{'columns': ['branch_key'], 'unique': True}]
+) }}
 
 WITH branch_stats AS (
     SELECT 
@@ -8,9 +18,19 @@ WITH branch_stats AS (
         COUNT(*) as total_reviews,
         AVG(rating) as avg_rating,
         MIN(review_date) as first_review_date,
-        MAX(review_date) as last_review_date
+        MAX(review_date) as last_review_date,
+        MAX(processed_at) as source_updated_at
     FROM {{ ref('stg_reviews') }}
     WHERE agency IS NOT NULL
+    {% if is_incremental() %}
+      -- Recalcul des seules agences ayant reçu de nouveaux avis
+      AND agency IN (
+          SELECT DISTINCT agency FROM {{ ref('stg_reviews') }}
+          WHERE processed_at > (
+              SELECT COALESCE(MAX(source_updated_at), '1900-01-01'::timestamptz) FROM {{ this }}
+          )
+      )
+    {% endif %}
     GROUP BY agency, bank, location
 )
 
@@ -23,5 +43,6 @@ SELECT
     ROUND(avg_rating::numeric, 2) as avg_rating,
     first_review_date,
     last_review_date,
+    source_updated_at,
     CURRENT_TIMESTAMP as created_at
 FROM branch_stats
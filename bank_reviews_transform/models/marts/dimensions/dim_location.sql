@@ -1,4 +1,9 @@
-{{ config(materialized='table') }}
+{{ config(
+    materialized='incremental',
+    unique_key='location_key',
+    incremental_strategy='delete+insert',
+    tags=['dimensions']
+) }}
 
 WITH location_stats AS (
     SELECT 
@@ -6,20 +11,27 @@ WITH location_stats AS (
         COUNT(*) as total_reviews,
         AVG(rating) as avg_rating,
         COUNT(DISTINCT agency) as unique_agencies,
-        (
-            SELECT COUNT(DISTINCT bank) 
-            FROM {{ ref('stg_reviews') }} sr2 
-            WHERE sr2.location = sr.location
-        ) as unique_banks,
+        COUNT(DISTINCT bank) as unique_banks,
         MIN(review_date) as first_review_date,
-        MAX(review_date) as last_review_date
-    FROM {{ ref('stg_reviews') }} sr
+        MAX(review_date) as last_review_date,
+        MAX(processed_at) as source_updated_at
+    FROM {{ ref('stg_reviews') }}
     WHERE location IS NOT NULL
+    {% if is_incremental() %}
+      -- Recalcul des seules localisations ayant reçu de nouveaux avis
+      AND location IN (
+          SELECT DISTINCT location FROM {{ ref('stg_reviews') }}
+          WHERE processed_at > (
+              SELECT COALESCE(MAX(source_updated_at), '1900-01-01'::timestamptz) FROM {{ this }}
+          )
+      )
+    {% endif %}
     GROUP BY location
 )
 
 SELECT 
-    ROW_NUMBER() OVER () AS location_key,
+    -- Clé stable (même formule que fact_reviews.location_key) : indispensable au merge
+    {{ dbt_utils.generate_surrogate_key(['location']) }} AS location_key,
     location,
     total_reviews,
     ROUND(avg_rating::numeric, 2) as avg_rating,
@@ -27,5 +39,6 @@ SELECT
     unique_banks,
     first_review_date,
     last_review_date,
+    source_updated_at,
     CURRENT_TIMESTAMP as created_at
 FROM location_stats
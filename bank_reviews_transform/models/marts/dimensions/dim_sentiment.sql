@@ -1,4 +1,14 @@
-{{ config(materialized='table') }}
+{#
+    unique_key='bank' : les lignes (bank, sentiment) des banques touchées sont
+    remplacées, y compris un sentiment qui n'aurait plus aucun avis.
+#}
+{{ config(
+    materialized='incremental',
+    unique_key='bank',
+    incremental_strategy='delete+insert',
+    tags=['dimensions'],
+    indexes=[{'columns': ['sentiment_key'], 'unique': True}]
+) }}
 
 WITH sentiment_stats AS (
     SELECT 
@@ -8,15 +18,26 @@ WITH sentiment_stats AS (
         AVG(rating) AS avg_rating,
         AVG(vader_compound::numeric) AS avg_vader_compound,
         MIN(review_date) AS first_review_date,
-        MAX(review_date) AS last_review_date
+        MAX(review_date) AS last_review_date,
+        MAX(source_updated_at) AS source_updated_at
     FROM {{ ref('reviews_enriched') }}
     WHERE sentiment IS NOT NULL
+    {% if is_incremental() %}
+      -- Recalcul des seules banques touchées, y compris par un sentiment arrivé en retard
+      AND bank IN (
+          SELECT DISTINCT bank FROM {{ ref('reviews_enriched') }}
+          WHERE source_updated_at > (
+              SELECT COALESCE(MAX(source_updated_at), '1900-01-01'::timestamptz) FROM {{ this }}
+          )
+      )
+    {% endif %}
     GROUP BY bank, sentiment
 ),
 
 with_keys AS (
     SELECT 
-        ROW_NUMBER() OVER () AS sentiment_key,
+        -- Clé stable (même formule que fact_reviews.sentiment_key) : indispensable au merge
+        {{ dbt_utils.generate_surrogate_key(['bank', 'sentiment']) }} AS sentiment_key,
         *
     FROM sentiment_stats
 )
@@ -30,5 +51,6 @@ SELECT
     total_reviews,
     first_review_date,
     last_review_date,
+    source_updated_at,
     CURRENT_TIMESTAMP AS created_at
 FROM with_keys
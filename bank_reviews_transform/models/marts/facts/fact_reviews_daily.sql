@@ -0,0 +1,95 @@
+{#
+    Agrégat quotidien de fact_reviews, source des vues analytiques (Looker).
+    Grain : (review_day, bank_key, branch_key, location_key, sentiment,
+    topic_category, is_confident_topic). Uniquement des mesures additives
+    (comptes et sommes) : les moyennes des vues se recomposent par
+    SUM(somme) / SUM(compte) à n'importe quel niveau d'agrégation.
+
+    unique_key='review_day' : les jours touchés par le delta sont entièrement
+    recalculés depuis fact_reviews (delete+insert).
+#}
+{{ config(
+    materialized='incremental',
+    unique_key='review_day',
+    incremental_strategy='delete+insert',
+    tags=['facts'],
+    indexes=[
+        {'columns': ['review_day']},
+        {'columns': ['bank_key', 'review_day']}
+    ]
+) }}
+
+WITH
+{% if is_incremental() %}
+-- Jours des avis nouveaux ou mis à jour depuis le dernier run
+changed_days AS (
+    SELECT DISTINCT review_day
+    FROM {{ ref('fact_reviews') }}
+    WHERE source_updated_at > (
+        SELECT COALESCE(MAX(source_updated_at), '1900-01-01'::timestamptz) FROM {{ this }}
+    )
+),
+
+{% endif %}
+dated_reviews AS (
+    SELECT
+        *,
+        -- Libellé du sentiment, depuis les indicateurs du fait
+        CASE
+            WHEN is_positive = 1 THEN 'positive'
+            WHEN is_negative = 1 THEN 'negative'
+            WHEN is_neutral = 1 THEN 'neutral'
+        END AS sentiment,
+        topic_confidence_score >= 0.6 AS is_confident_topic
+    FROM {{ ref('fact_reviews') }}
+    WHERE review_day IS NOT NULL
+    {% if is_incremental() %}
+      AND review_day IN (SELECT review_day FROM changed_days)
+    {% endif %}
+)
+
+SELECT
+    review_day,
+    bank_key,
+    branch_key,
+    location_key,
+    sentiment,
+    topic_category,
+    is_confident_topic,
+
+    -- Volumes
+    COUNT(*)::integer AS review_count,
+    -- Avis scorés (les moyennes de sentiment ignorent les avis sans score)
+    COUNT(vader_sentiment_score)::integer AS scored_count,
+
+    -- Sommes des mesures
+    SUM(review_rating) AS rating_sum,
+    SUM(vader_sentiment_score) AS vader_score_sum,
+    SUM(textblob_sentiment_score) AS textblob_score_sum,
+    SUM(sentiment_confidence) AS sentiment_confidence_sum,
+    SUM(topic_confidence_score) AS topic_confidence_sum,
+    SUM(data_quality_score) AS quality_score_sum,
+    SUM(text_length) AS text_length_sum,
+
+    -- Comptes des indicateurs
+    SUM(is_positive)::integer AS positive_count,
+    SUM(is_negative)::integer AS negative_count,
+    SUM(is_neutral)::integer AS neutral_count,
+    SUM(is_coherent)::integer AS coherent_count,
+    COUNT(*) FILTER (WHERE is_coherent = 0)::integer AS incoherent_count,
+    SUM(is_detailed_review)::integer AS detailed_review_count,
+    SUM(is_strong_sentiment)::integer AS strong_sentiment_count,
+    SUM(needs_urgent_action)::integer AS urgent_action_count,
+    COUNT(*) FILTER (WHERE review_rating = 5)::integer AS rating_5_count,
+    COUNT(*) FILTER (WHERE review_rating = 4)::integer AS rating_4_count,
+    COUNT(*) FILTER (WHERE review_rating = 3)::integer AS rating_3_count,
+    COUNT(*) FILTER (WHERE review_rating = 2)::integer AS rating_2_count,
+    COUNT(*) FILTER (WHERE review_rating = 1)::integer AS rating_1_count,
+
+    -- High-water mark du run incrémental suivant
+    MAX(source_updated_at) AS source_updated_at,
+    CURRENT_TIMESTAMP AS rollup_created_at
+FROM dated_reviews
+GROUP BY
+    review_day, bank_key, branch_key, location_key,
+    sentiment, topic_category, is_confident_topic
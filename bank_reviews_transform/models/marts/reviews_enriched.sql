@@ -1,15 +1,58 @@
-{{ config(materialized='table') }}
+{{ config(
+    materialized='incremental',
+    unique_key='review_id',
+    incremental_strategy='delete+insert',
+    on_schema_change='sync_all_columns',
+    tags=['facts'],
+    indexes=[
+        {'columns': ['review_id'], 'unique': True},
+        {'columns': ['source_updated_at']}
+    ]
+) }}
 
-WITH sentiment_joined AS (
+WITH
+{% if is_incremental() %}
+-- Avis nouveaux ou dont le sentiment / le topic est arrivé depuis le dernier run
+watermark AS (
+    SELECT COALESCE(MAX(source_updated_at), '1900-01-01'::timestamptz) AS last_update
+    FROM {{ this }}
+),
+
+changed_reviews AS (
+    SELECT review_id FROM {{ ref('stg_reviews') }}
+    WHERE processed_at > (SELECT last_update FROM watermark)
+    UNION
+    SELECT review_id FROM {{ source('public', 'sentiment_analysis') }}
+    WHERE scored_at > (SELECT last_update FROM watermark)
+    UNION
+    SELECT review_id FROM {{ source('public', 'topic_analysis') }}
+    WHERE extracted_at > (SELECT last_update FROM watermark)
+),
+
+{% endif %}
+sentiment_joined AS (
     SELECT 
         r.*,
         s.sentiment,
         s.vader_compound,
         s.textblob_polarity,
-        s.confidence
+        s.confidence,
+        -- Langue détectée par l'étape NLP (language_detection.py)
+        COALESCE(s.language, 'unknown') as detected_language,
+        t.dominant_topic,
+        t.topic_category,
+        t.topic_keywords,
+        t.topic_confidence,
+        -- Dernière mise à jour des sources : high-water mark des modèles en aval
+        GREATEST(r.processed_at, s.scored_at, t.extracted_at) as source_updated_at
     FROM {{ ref('stg_reviews') }} r
     LEFT JOIN {{ source('public', 'sentiment_analysis') }} s
         ON r.review_id = s.review_id
+    LEFT JOIN {{ source('public', 'topic_analysis') }} t
+        ON r.review_id = t.review_id
+    {% if is_incremental() %}
+    WHERE r.review_id IN (SELECT review_id FROM changed_reviews)
+    {% endif %}
 ),
 
 final AS (
@@ -1,9 +1,23 @@
-{{ config(materialized='view') }}
+{{ config(
+    materialized='incremental',
+    unique_key='review_id',
+    incremental_strategy='delete+insert',
+    on_schema_change='sync_all_columns',
+    indexes=[
+        {'columns': ['review_id'], 'unique': True},
+        {'columns': ['bank', 'agency']},
+        {'columns': ['review_day']}
+    ]
+) }}
+
+{# Date déjà connue d'un avis : colonne absente de la table avant le premier run qui l'ajoute #}
+{% set keep_known_day = is_incremental()
+    and 'review_day' in (adapter.get_columns_in_relation(this) | map(attribute='name') | list) %}
 
 WITH cleaned_reviews AS (
     SELECT 
-        -- IDs et métadonnées
-        ROW_NUMBER() OVER (ORDER BY bank, agency, author, review_date) as review_id,
+        -- IDs et métadonnées (clé de contenu calculée à l'ingestion, stable d'un run à l'autre)
+        COALESCE(review_key, {{ review_key('bank', 'agency', 'author', 'review_text') }}) as review_id,
         bank,
         agency,
         url,
@@ -11,19 +25,23 @@ WITH cleaned_reviews AS (
         author,
         rating,
         review_date,
+        -- Date réelle résolue à l'ingestion ; date ISO pour les lignes chargées avant.
+        -- Un avis déjà connu garde sa date : la première collecte est la plus précise
+        -- ('il y a 2 jours' plutôt que 'il y a 3 mois' lors d'une collecte ultérieure)
+        COALESCE(
+            {% if keep_known_day %}
+            (SELECT prior.review_day FROM {{ this }} prior
+             WHERE prior.review_id = COALESCE(src.review_key, {{ review_key('src.bank', 'src.agency', 'src.author', 'src.review_text') }})),
+            {% endif %}
+            review_day,
+            CASE WHEN review_date ~ '^\d{4}-\d{2}-\d{2}$' THEN TO_DATE(review_date, 'YYYY-MM-DD') END
+        ) as review_day,
         review_text,
+        ingested_at,
         
         -- Nettoyage du texte
         LOWER(TRIM(review_text)) as clean_text,
         
-        -- Extraction de la langue (basique)
-        CASE 
-            WHEN review_text ~* '[àáâäèéêëìíîïòóôöùúûü]|ça|très|être|avoir' THEN 'fr'
-            WHEN review_text ~* 'والله|الله|مع|في|على|هذا|هذه' THEN 'ar'
-            WHEN review_text ~* '\bthe\b|\band\b|\bor\b|\bof\b|\bin\b|\bto\b' THEN 'en'
-            ELSE 'unknown'
-        END as detected_language,
-        
         -- Longueur du texte
         LENGTH(review_text) as text_length,
         
@@ -37,20 +55,26 @@ WITH cleaned_reviews AS (
         -- Timestamp de traitement
         CURRENT_TIMESTAMP as processed_at
         
-    FROM {{ source('public', 'staging_reviews') }}
+    FROM {{ source('public', 'staging_reviews') }} src
     WHERE 
         review_text IS NOT NULL 
         AND TRIM(review_text) != ''
         AND rating IS NOT NULL
         AND rating BETWEEN 1 AND 5
+        {% if is_incremental() %}
+        -- Seules les lignes chargées depuis le dernier run (high-water mark)
+        AND ingested_at > (
+            SELECT COALESCE(MAX(ingested_at), '1900-01-01'::timestamptz) FROM {{ this }}
+        )
+        {% endif %}
 ),
 
--- Suppression des doublons
+-- Suppression des doublons (dans le lot ; entre lots via unique_key)
 deduplicated AS (
     SELECT *,
         ROW_NUMBER() OVER (
-            PARTITION BY bank, agency, author, clean_text 
-            ORDER BY review_date DESC
+            PARTITION BY review_id
+            ORDER BY review_day DESC NULLS LAST
         ) as rn
     FROM cleaned_reviews
 )
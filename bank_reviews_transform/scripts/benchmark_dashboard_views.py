@@ -0,0 +1,135 @@
+"""Benchmark : vues analytiques sur fact_reviews vs sur l'agrégat fact_reviews_daily
+
+Mesure la latence des requêtes du tableau de bord (SELECT * sur la vue, comme
+Looker) avant et après l'agrégat quotidien :
+  1. l'ancienne définition des vues : fact_reviews joint aux dimensions,
+     regex + TO_DATE sur chaque ligne
+  2. les vues actuelles, calculées sur fact_reviews_daily
+
+Deux vues représentatives : branch_performance (tout l'historique) et
+sentiment_trends (12 derniers mois). À lancer après dbt run, sur une base
+peuplée (par ex. celle de benchmark_incremental_models.py). Lecture seule.
+
+Usage (depuis bank_reviews_transform/) :
+    python scripts/benchmark_dashboard_views.py --repeat 5
+"""
+import argparse
+import statistics
+import time
+
+from dotenv import load_dotenv
+from sqlalchemy import text
+
+from db import get_engine
+
+load_dotenv()
+
+# Anciennes définitions des vues (avant fact_reviews_daily)
+LEGACY_VIEW_QUERIES = {
+    'branch_performance': r"""
+
+SELECT
+    db.bank_name,
+    br.agency AS branch_name,
+    loc.location AS location_name,
+    COUNT(fr.review_id) AS total_reviews,
+    ROUND(AVG(fr.review_rating)::numeric, 2) AS avg_rating,
+    ROUND(AVG(fr.vader_sentiment_score)::numeric, 3) AS avg_vader_sentiment,
+    ROUND(AVG(fr.textblob_sentiment_score)::numeric, 3) AS avg_textblob_sentiment,
+    ROUND(AVG(fr.sentiment_confidence)::numeric, 3) AS avg_confidence,
+    SUM(fr.is_positive) AS positive_reviews,
+    SUM(fr.is_negative) AS negative_reviews,
+    SUM(fr.is_neutral) AS neutral_reviews,
+    ROUND(SUM(fr.is_positive) * 100.0 / COUNT(fr.review_id), 2) AS positive_percentage,
+    ROUND(SUM(fr.is_negative) * 100.0 / COUNT(fr.review_id), 2) AS negative_percentage,
+    ROUND(SUM(fr.is_neutral) * 100.0 / COUNT(fr.review_id), 2) AS neutral_percentage,
+    ROUND(AVG(fr.data_quality_score)::numeric, 2) AS avg_quality_score,
+    ROUND(AVG(fr.text_length)::numeric, 1) AS avg_text_length,
+    SUM(fr.is_detailed_review) AS detailed_reviews_count,
+    SUM(fr.is_strong_sentiment) AS strong_sentiment_count,
+    SUM(fr.needs_urgent_action) AS urgent_action_needed,
+    COUNT(*) FILTER (WHERE fr.is_coherent = 0) AS incoherent_reviews,
+    COUNT(*) FILTER (WHERE fr.review_rating = 5) AS rating_5_count,
+    COUNT(*) FILTER (WHERE fr.review_rating = 4) AS rating_4_count,
+    COUNT(*) FILTER (WHERE fr.review_rating = 3) AS rating_3_count,
+    COUNT(*) FILTER (WHERE fr.review_rating = 2) AS rating_2_count,
+    COUNT(*) FILTER (WHERE fr.review_rating = 1) AS rating_1_count,
+    RANK() OVER (ORDER BY AVG(fr.review_rating) DESC) AS rating_rank,
+    RANK() OVER (ORDER BY AVG(fr.vader_sentiment_score) DESC) AS sentiment_rank,
+    RANK() OVER (ORDER BY COUNT(fr.review_id) DESC) AS volume_rank,
+    MIN(TO_DATE(fr.review_date, 'YYYY-MM-DD')) AS first_review_date,
+    MAX(TO_DATE(fr.review_date, 'YYYY-MM-DD')) AS last_review_date
+FROM fact_reviews fr
+JOIN dim_bank db ON fr.bank_key = db.bank_key
+JOIN dim_branch br ON fr.branch_key = br.branch_key
+JOIN dim_location loc ON fr.location_key::TEXT = loc.location_key::TEXT
+WHERE fr.review_date IS NOT NULL
+  AND fr.review_date ~ '^\d{4}-\d{2}-\d{2}$'
+GROUP BY db.bank_name, br.agency, loc.location
+HAVING COUNT(fr.review_id) >= 3
+ORDER BY avg_rating DESC, total_reviews DESC
+""",
+    'sentiment_trends': r"""
+SELECT
+    db.bank_name,
+    br.agency AS branch_name,
+    loc.location AS location_name,
+    se.sentiment AS sentiment_label,
+    DATE_TRUNC('month', TO_DATE(fr.review_date, 'YYYY-MM-DD')) AS review_month,
+    COUNT(*) AS review_count,
+    ROUND(AVG(fr.review_rating)::numeric, 2) AS avg_rating,
+    ROUND(AVG(fr.vader_sentiment_score)::numeric, 3) AS avg_vader_score,
+    ROUND(AVG(fr.textblob_sentiment_score)::numeric, 3) AS avg_textblob_score,
+    ROUND(AVG(fr.sentiment_confidence)::numeric, 3) AS avg_confidence,
+    ROUND(COUNT(*) * 100.0 / SUM(COUNT(*)) OVER (
+        PARTITION BY db.bank_name, DATE_TRUNC('month', TO_DATE(fr.review_date, 'YYYY-MM-DD'))
+    ), 2) AS sentiment_percentage,
+    ROUND(AVG(fr.data_quality_score)::numeric, 2) AS avg_quality_score,
+    COUNT(*) FILTER (WHERE fr.is_coherent = 1) AS coherent_reviews,
+    COUNT(*) FILTER (WHERE fr.needs_urgent_action = 1) AS urgent_reviews
+FROM fact_reviews fr
+JOIN dim_bank db ON fr.bank_key = db.bank_key
+JOIN dim_branch br ON fr.branch_key = br.branch_key
+JOIN dim_location loc ON fr.location_key::TEXT = loc.location_key::TEXT
+JOIN dim_sentiment se ON fr.sentiment_key::TEXT = se.sentiment_key::TEXT
+WHERE fr.review_date IS NOT NULL
+  AND fr.review_date ~ '^\d{4}-\d{2}-\d{2}$'
+  AND TO_DATE(fr.review_date, 'YYYY-MM-DD') >= CURRENT_DATE - INTERVAL '12 months'
+GROUP BY
+    db.bank_name, br.agency, loc.location, se.sentiment,
+    DATE_TRUNC('month', TO_DATE(fr.review_date, 'YYYY-MM-DD'))
+ORDER BY
+    review_month DESC, db.bank_name, sentiment_percentage DESC
+""",
+}
+
+def time_query(conn, query, repeat):
+    """Durée médiane (ms) d'une requête lue en entier, et son nombre de lignes"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        n_rows = len(conn.execute(text(query)).fetchall())
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings), n_rows
+
+def run_benchmark(repeat):
+    engine = get_engine()
+    results = []
+    with engine.connect() as conn:
+        n_facts = conn.execute(text("SELECT COUNT(*) FROM fact_reviews")).scalar()
+        n_rollup = conn.execute(text("SELECT COUNT(*) FROM fact_reviews_daily")).scalar()
+        for view, legacy_query in LEGACY_VIEW_QUERIES.items():
+            legacy_ms, legacy_rows = time_query(conn, legacy_query, repeat)
+            rollup_ms, rollup_rows = time_query(conn, f"SELECT * FROM {view}", repeat)
+            results.append((view, legacy_ms, legacy_rows, rollup_ms, rollup_rows))
+
+    print(f"\n📊 Vues du tableau de bord ({n_facts:,} faits, {n_rollup:,} lignes agrégées, médiane sur {repeat} exécutions)")
+    for view, legacy_ms, legacy_rows, rollup_ms, rollup_rows in results:
+        print(f"  {view:<20} | fact_reviews : {legacy_ms:>8.1f} ms ({legacy_rows} lignes) "
+              f"| fact_reviews_daily : {rollup_ms:>8.1f} ms ({rollup_rows} lignes) | x{legacy_ms / rollup_ms:.1f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark des vues analytiques avant / après l'agrégat quotidien")
+    parser.add_argument("--repeat", type=int, default=5, help="Exécutions par requête (médiane)")
+    args = parser.parse_args()
+    run_benchmark(args.repeat)
@@ -0,0 +1,151 @@
+"""Benchmark : reconstruction complète vs run incrémental des modèles dbt
+
+Génère un historique synthétique (1M d'avis par défaut) dans la base pointée
+par le .env, puis mesure :
+  1. dbt run --full-refresh sur stg_reviews et ses modèles en aval
+  2. dbt run incrémental après l'arrivée d'un delta quotidien
+
+Chaque mesure suit l'ordre du DAG : reviews_enriched, partitions de
+fact_reviews (dbt run-operation), puis le reste de la sélection.
+
+⚠️  Les tables staging_reviews, sentiment_analysis, topic_analysis et
+fact_reviews sont recréées : à lancer uniquement sur une base de benchmark.
+
+Usage (depuis bank_reviews_transform/) :
+    python scripts/benchmark_incremental_models.py --confirm-database bench_reviews
+"""
+import argparse
+import datetime
+import os
+import subprocess
+import time
+
+from dotenv import load_dotenv
+from sqlalchemy import text
+
+from db import get_engine
+
+load_dotenv()
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DBT_SELECTION = "stg_reviews+"
+# Source de fact_reviews, requise par le macro de partitions
+PARTITION_SOURCE_MODELS = ["stg_reviews", "reviews_enriched"]
+# Avis synthétiques datés depuis janvier 2020 : une partition mensuelle par mois d'historique
+HISTORY_START = datetime.date(2020, 1, 1)
+
+SETUP_SQL = """
+DROP TABLE IF EXISTS staging_reviews, sentiment_analysis, topic_analysis, fact_reviews CASCADE;
+
+CREATE TABLE staging_reviews (
+    bank TEXT, agency TEXT, url TEXT, location TEXT, author TEXT,
+    rating INTEGER, review_date TEXT, review_text TEXT,
+    review_key TEXT, ingested_at TIMESTAMPTZ, batch_id TEXT,
+    scraped_at TIMESTAMPTZ, review_day DATE
+);
+CREATE INDEX staging_reviews_ingested_at_idx ON staging_reviews (ingested_at);
+
+CREATE TABLE sentiment_analysis (
+    review_id TEXT, sentiment TEXT, vader_compound DOUBLE PRECISION,
+    textblob_polarity DOUBLE PRECISION, confidence DOUBLE PRECISION, language TEXT, scored_at TIMESTAMPTZ
+);
+CREATE UNIQUE INDEX sentiment_analysis_review_id_idx ON sentiment_analysis (review_id);
+
+CREATE TABLE topic_analysis (
+    review_id TEXT, dominant_topic INTEGER, topic_category TEXT, topic_keywords TEXT,
+    topic_confidence DOUBLE PRECISION, language TEXT, extracted_at TIMESTAMPTZ
+);
+"""
+
+# Avis synthétiques : la clé review_key suit la même formule que add_review_key()
+INSERT_REVIEWS_SQL = """
+INSERT INTO staging_reviews (
+    bank, agency, url, location, author, rating, review_date, review_text,
+    review_key, ingested_at, scraped_at, review_day
+)
+SELECT
+    bank, agency, url, location, author, rating, review_date, review_text,
+    MD5(CONCAT_WS('-', bank, agency, author, LOWER(TRIM(review_text)))),
+    :ingested_at, :ingested_at, review_date::date
+FROM (
+    SELECT
+        'Banque ' || (g % 8) AS bank,
+        'Agence ' || (g % 2000) AS agency,
+        'https://maps.example/agence/' || (g % 2000) AS url,
+        'Ville ' || (g % 10) AS location,
+        'Auteur ' || g AS author,
+        1 + (g % 5) AS rating,
+        TO_CHAR(DATE '2020-01-01' + (g % 1800), 'YYYY-MM-DD') AS review_date,
+        'Avis synthétique numéro ' || g || ' : accueil ' ||
+            (ARRAY['très bon', 'correct', 'horrible', 'rapide', 'lent'])[1 + g % 5] AS review_text
+    FROM generate_series(:first_id, :last_id) AS g
+) synthetic
+"""
+
+INSERT_SENTIMENT_SQL = """
+INSERT INTO sentiment_analysis
+SELECT
+    review_key,
+    (ARRAY['positive', 'neutral', 'negative'])[1 + rating % 3],
+    (rating - 3) / 2.0,
+    (rating - 3) / 4.0,
+    ABS(rating - 3) / 2.0,
+    'fr',
+    :scored_at
+FROM staging_reviews
+WHERE ingested_at = :ingested_at
+ON CONFLICT (review_id) DO NOTHING
+"""
+
+def load_batch(engine, first_id, last_id):
+    """Charge un lot d'avis synthétiques et leurs scores de sentiment"""
+    with engine.begin() as conn:
+        ingested_at = conn.execute(text("SELECT CLOCK_TIMESTAMP()")).scalar()
+        params = {'first_id': first_id, 'last_id': last_id, 'ingested_at': ingested_at}
+        conn.execute(text(INSERT_REVIEWS_SQL), params)
+        conn.execute(text(INSERT_SENTIMENT_SQL), {'ingested_at': ingested_at, 'scored_at': ingested_at})
+
+def run_dbt(*args):
+    """Lance la sélection dans l'ordre du DAG et retourne la durée en secondes"""
+    today = datetime.date.today()
+    months_back = (today.year - HISTORY_START.year) * 12 + today.month - HISTORY_START.month
+    commands = [
+        ["run", "--select", *PARTITION_SOURCE_MODELS, *args],
+        ["run-operation", "create_fact_reviews_partitions", "--args", f"{{months_back: {months_back}}}"],
+        ["run", "--select", DBT_SELECTION, "--exclude", *PARTITION_SOURCE_MODELS, *args],
+    ]
+    start = time.perf_counter()
+    for command in commands:
+        subprocess.run(["dbt", *command], cwd=PROJECT_DIR, check=True)
+    return time.perf_counter() - start
+
+def run_benchmark(n_reviews, daily_delta):
+    engine = get_engine()
+
+    print(f"🧪 Génération d'un historique synthétique de {n_reviews:,} avis")
+    with engine.begin() as conn:
+        conn.execute(text(SETUP_SQL))
+    load_batch(engine, 1, n_reviews)
+
+    full_seconds = run_dbt("--full-refresh")
+
+    print(f"\n🧪 Arrivée d'un delta quotidien de {daily_delta:,} avis")
+    load_batch(engine, n_reviews + 1, n_reviews + daily_delta)
+    incremental_seconds = run_dbt()
+
+    print(f"\n📊 Modèles {DBT_SELECTION} sur {n_reviews:,} avis")
+    print(f"  Reconstruction complète : {full_seconds:.1f}s")
+    print(f"  Run incrémental ({daily_delta:,} avis) : {incremental_seconds:.1f}s")
+    print(f"  Gain : x{full_seconds / incremental_seconds:.1f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark full refresh vs incrémental")
+    parser.add_argument("--n-reviews", type=int, default=1_000_000)
+    parser.add_argument("--daily-delta", type=int, default=500)
+    parser.add_argument("--confirm-database", required=True,
+                        help="Nom de la base de benchmark (doit correspondre à DB_NAME)")
+    args = parser.parse_args()
+
+    if args.confirm_database != os.getenv('DB_NAME'):
+        raise SystemExit(f"❌ DB_NAME={os.getenv('DB_NAME')} ne correspond pas à --confirm-database")
+    run_benchmark(args.n_reviews, args.daily_delta)
@@ -0,0 +1,85 @@
+"""Benchmark : analyse de sentiment ligne par ligne vs moteur par lot
+
+Usage : python scripts/benchmark_sentiment.py [--n-reviews 5000]
+"""
+import argparse
+import random
+import time
+
+import numpy as np
+from textblob import TextBlob
+from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+
+from sentiment_analysis import score_sentiment_batch
+
+SAMPLE_REVIEWS = [
+    "Très bon accueil, le conseiller était rapide et efficace",
+    "Service horrible, attente de deux heures pour rien",
+    "Agence propre mais personnel peu aimable",
+    "Great staff, very helpful and friendly",
+    "Bad service, the app never works and fees are too high",
+    "خدمة جيدة والله",
+    "Le distributeur est toujours en panne, très mauvais",
+    "Ok",
+    "Nothing special, average branch",
+    "Excellent service client, je recommande vivement cette agence !",
+]
+
+def legacy_analyze_sentiment(text):
+    """Ancienne implémentation : un analyseur VADER et un TextBlob par avis"""
+    analyzer = SentimentIntensityAnalyzer()
+    vader_scores = analyzer.polarity_scores(text)
+    textblob_polarity = TextBlob(text).sentiment.polarity
+
+    if vader_scores['compound'] >= 0.05:
+        sentiment = 'positive'
+    elif vader_scores['compound'] <= -0.05:
+        sentiment = 'negative'
+    else:
+        sentiment = 'neutral'
+
+    return {
+        'sentiment': sentiment,
+        'vader_compound': vader_scores['compound'],
+        'textblob_polarity': textblob_polarity,
+        'confidence': abs(vader_scores['compound'])
+    }
+
+def build_corpus(n_reviews, seed=42):
+    """Génère un corpus synthétique à partir des avis d'exemple"""
+    rng = random.Random(seed)
+    return [
+        " ".join(rng.choice(SAMPLE_REVIEWS) for _ in range(rng.randint(1, 4)))
+        for _ in range(n_reviews)
+    ]
+
+def run_benchmark(n_reviews):
+    texts = build_corpus(n_reviews)
+
+    start = time.perf_counter()
+    legacy = [legacy_analyze_sentiment(text) for text in texts]
+    legacy_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch = score_sentiment_batch(texts)
+    batch_seconds = time.perf_counter() - start
+
+    # Les labels et scores doivent être identiques à l'ancienne implémentation
+    legacy_labels = np.array([r['sentiment'] for r in legacy])
+    legacy_compound = np.array([r['vader_compound'] for r in legacy])
+    legacy_polarity = np.array([r['textblob_polarity'] for r in legacy])
+    assert (legacy_labels == batch['sentiment']).all(), "Labels différents"
+    assert np.allclose(legacy_compound, batch['vader_compound']), "Scores VADER différents"
+    assert np.allclose(legacy_polarity, batch['textblob_polarity']), "Polarités TextBlob différentes"
+
+    print(f"📊 Benchmark sentiment sur {n_reviews} avis")
+    print(f"  Ligne par ligne : {n_reviews / legacy_seconds:,.0f} avis/s ({legacy_seconds:.2f}s)")
+    print(f"  Par lot         : {n_reviews / batch_seconds:,.0f} avis/s ({batch_seconds:.2f}s)")
+    print(f"  Accélération    : x{legacy_seconds / batch_seconds:.1f}")
+    print("✅ Labels identiques")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--n-reviews", type=int, default=5000)
+    args = parser.parse_args()
+    run_benchmark(args.n_reviews)
@@ -0,0 +1,59 @@
+"""Accès partagé à PostgreSQL pour les scripts et les tâches du DAG
+
+Un seul engine par processus, avec un pool de connexions dimensionné, un
+statement_timeout côté serveur et des lectures en flux par curseur serveur
+(les grandes tables ne sont jamais chargées en entier côté client).
+Paramètres lus dans le .env :
+  DB_USER, DB_PASSWORD, DB_HOST, DB_PORT, DB_NAME
+  DB_POOL_SIZE (5), DB_MAX_OVERFLOW (5), DB_STATEMENT_TIMEOUT_MS (600000)
+"""
+import os
+
+import pandas as pd
+from dotenv import load_dotenv
+from sqlalchemy import create_engine, text
+
+load_dotenv()
+
+DEFAULT_POOL_SIZE = 5
+DEFAULT_MAX_OVERFLOW = 5
+# Une requête bloquée échoue au lieu de geler la tâche Airflow
+DEFAULT_STATEMENT_TIMEOUT_MS = 600_000
+# Connexions recyclées avant les coupures d'inactivité côté serveur
+POOL_RECYCLE_SECONDS = 1800
+
+# Lignes transférées par aller-retour lors des lectures en flux
+STREAM_CHUNK_ROWS = 10_000
+
+_engine = None
+
+def database_url():
+    return f"postgresql+psycopg2://{os.getenv('DB_USER')}:{os.getenv('DB_PASSWORD')}@{os.getenv('DB_HOST')}:{os.getenv('DB_PORT')}/{os.getenv('DB_NAME')}"
+
+def get_engine():
+    """Engine partagé du processus (créé au premier appel)"""
+    global _engine
+    if _engine is None:
+        statement_timeout = int(os.getenv('DB_STATEMENT_TIMEOUT_MS', DEFAULT_STATEMENT_TIMEOUT_MS))
+        _engine = create_engine(
+            database_url(),
+            pool_size=int(os.getenv('DB_POOL_SIZE', DEFAULT_POOL_SIZE)),
+            max_overflow=int(os.getenv('DB_MAX_OVERFLOW', DEFAULT_MAX_OVERFLOW)),
+            pool_pre_ping=True,
+            pool_recycle=POOL_RECYCLE_SECONDS,
+            connect_args={
+                'options': f'-c statement_timeout={statement_timeout}',
+                'application_name': 'bank_reviews',
+            },
+        )
+    return _engine
+
+def stream_query(query, params=None, chunk_rows=STREAM_CHUNK_ROWS, engine=None):
+    """Résultat d'une requête en DataFrames de chunk_rows lignes, via un curseur serveur
+
+    La mémoire côté client reste bornée par la taille d'un bloc, quelle que
+    soit la taille de la table.
+    """
+    engine = engine or get_engine()
+    with engine.connect().execution_options(stream_results=True, max_row_buffer=chunk_rows) as conn:
+        yield from pd.read_sql(text(query), conn, params=params, chunksize=chunk_rows)
@@ -0,0 +1,91 @@
+"""Détection de langue des avis, par lot et avec cache
+
+Étape unique d'identification de la langue du pipeline NLP : le résultat
+est persisté dans sentiment_analysis.language et relu par les modèles dbt et
+l'extraction de topics.
+
+Par ordre de coût croissant :
+  1. cache par empreinte du texte (textes identiques : une seule détection)
+  2. classe de caractères : un texte majoritairement en alphabet arabe est 'ar',
+     un texte sans lettre est 'unknown', sans appel à langdetect
+  3. langdetect pour les textes en alphabet latin (fr / en / ...)
+  4. repli par mots-clés si langdetect échoue (texte trop court, ambigu)
+"""
+import hashlib
+import re
+
+import numpy as np
+from langdetect import DetectorFactory, LangDetectException, detect
+from langdetect.detector_factory import init_factory
+
+# Résultats reproductibles d'un run à l'autre
+DetectorFactory.seed = 0
+
+ARABIC_LETTER_RE = re.compile(r'[\u0600-\u06FF\u0750-\u077F\u08A0-\u08FF\uFB50-\uFDFF\uFE70-\uFEFF]')
+LATIN_LETTER_RE = re.compile(r'[A-Za-z\u00C0-\u00D6\u00D8-\u00F6\u00F8-\u00FF]')
+WORD_RE = re.compile(r'\w+')
+
+# Mots-clés du repli (recherche en O(1) par mot)
+FALLBACK_KEYWORDS = (
+    ('ar', frozenset(['والله', 'الله', 'جيد', 'سيء'])),
+    ('fr', frozenset(['très', 'bon', 'mauvais', 'service'])),
+    ('en', frozenset(['good', 'bad', 'service', 'staff'])),
+)
+
+# Cache du processus : empreinte du texte -> langue (vidé au-delà de la limite,
+# la mémoire reste bornée sur un run en flux)
+MAX_CACHE_ENTRIES = 200_000
+_language_cache = {}
+
+def init_language_detector():
+    """Charge les profils langdetect une seule fois par processus"""
+    init_factory()
+
+def text_fingerprint(text):
+    return hashlib.md5(text.encode('utf-8')).digest()
+
+def script_language(text):
+    """Langue déduite de l'alphabet seul, ou None si langdetect est nécessaire"""
+    arabic_letters = len(ARABIC_LETTER_RE.findall(text))
+    latin_letters = len(LATIN_LETTER_RE.findall(text))
+    if arabic_letters == 0 and latin_letters == 0:
+        return 'unknown'
+    if arabic_letters > latin_letters:
+        return 'ar'
+    return None
+
+def keyword_language(text):
+    """Repli par mots-clés quand langdetect ne conclut pas"""
+    words = set(WORD_RE.findall(text.lower()))
+    for language, keywords in FALLBACK_KEYWORDS:
+        if not words.isdisjoint(keywords):
+            return language
+    return 'unknown'
+
+def detect_language(text):
+    """Langue d'un texte, sans cache"""
+    language = script_language(text)
+    if language is not None:
+        return language
+    try:
+        return detect(text)
+    except LangDetectException:
+        return keyword_language(text)
+
+def detect_languages(texts):
+    """Langue de chaque texte, alignée sur l'entrée (tableau NumPy)
+
+    Les textes déjà vus dans ce processus et les doublons du lot ne sont
+    détectés qu'une fois.
+    """
+    if len(_language_cache) > MAX_CACHE_ENTRIES:
+        _language_cache.clear()
+    texts = ['' if text is None or text != text else str(text) for text in texts]
+    languages = np.empty(len(texts), dtype=object)
+    for i, text in enumerate(texts):
+        fingerprint = text_fingerprint(text)
+        language = _language_cache.get(fingerprint)
+        if language is None:
+            language = _language_cache[fingerprint] = detect_language(text)
+        languages[i] = language
+    return languages
@@ -0,0 +1,242 @@
+"""Écriture des résultats NLP dans PostgreSQL (sentiment_analysis, topic_analysis)
+
+Les résultats sont copiés (COPY FROM STDIN) dans une table temporaire puis
+fusionnés dans la table cible typée et indexée par INSERT ... ON CONFLICT.
+Chaque écriture tient dans une seule transaction : la table n'est jamais
+supprimée et les lecteurs (reviews_enriched) voient soit l'ancien, soit le
+nouvel état. Un run complet (FullRunWriter) écrit tous ses blocs puis
+supprime les lignes qu'il n'a pas réécrites dans une seule transaction.
+"""
+import io
+
+# Schéma typé des tables de résultats : colonnes, clé de fusion, horodatage
+# d'écriture, index secondaires
+RESULT_TABLES = {
+    'sentiment_analysis': {
+        'columns': {
+            'review_id': 'TEXT NOT NULL',
+            'sentiment': 'TEXT',
+            'vader_compound': 'DOUBLE PRECISION',
+            'textblob_polarity': 'DOUBLE PRECISION',
+            'confidence': 'DOUBLE PRECISION',
+            'language': 'TEXT',
+            'scored_at': 'TIMESTAMPTZ',
+        },
+        'key': 'review_id',
+        'written_at': 'scored_at',
+        'indexes': ['scored_at'],
+    },
+    'topic_analysis': {
+        'columns': {
+            'review_id': 'TEXT NOT NULL',
+            'dominant_topic': 'INTEGER',
+            'topic_category': 'TEXT',
+            'topic_keywords': 'TEXT',
+            'topic_confidence': 'DOUBLE PRECISION',
+            'language': 'TEXT',
+            'extracted_at': 'TIMESTAMPTZ',
+        },
+        'key': 'review_id',
+        'written_at': 'extracted_at',
+        'indexes': ['extracted_at'],
+    },
+}
+
+def _missing_ddl_statements(cursor, table, spec):
+    """DDL des seuls éléments absents (table, colonnes, index), d'après le catalogue
+
+    Aucune instruction quand la table est à jour : pas de verrou ACCESS
+    EXCLUSIVE pris pour rien pendant que des lecteurs ou un curseur en flux
+    tiennent la table.
+    """
+    cursor.execute(
+        "SELECT column_name FROM information_schema.columns WHERE table_schema = current_schema() AND table_name = %s",
+        (table,)
+    )
+    existing_columns = {row[0] for row in cursor.fetchall()}
+    cursor.execute("SELECT indexname FROM pg_indexes WHERE schemaname = current_schema() AND tablename = %s", (table,))
+    existing_indexes = {row[0] for row in cursor.fetchall()}
+    key_index = f"{table}_{spec['key']}_idx"
+
+    statements = []
+    # Table héritée de to_sql(replace) : sans index de clé, anciens identifiants
+    # ROW_NUMBER() non typés. Reconstruite.
+    if existing_columns and key_index not in existing_indexes:
+        statements.append(f"DROP TABLE {table}")
+        existing_columns, existing_indexes = set(), set()
+
+    if not existing_columns:
+        columns_sql = ', '.join(f'{column} {column_type}' for column, column_type in spec['columns'].items())
+        statements.append(f"CREATE TABLE {table} ({columns_sql})")
+    else:
+        statements += [
+            f"ALTER TABLE {table} ADD COLUMN {column} {column_type.replace(' NOT NULL', '')}"
+            for column, column_type in spec['columns'].items() if column not in existing_columns
+        ]
+
+    # Index unique sur la clé de fusion (requis par ON CONFLICT) et index secondaires
+    if key_index not in existing_indexes:
+        statements.append(f"CREATE UNIQUE INDEX {key_index} ON {table} ({spec['key']})")
+    for column in spec['indexes']:
+        if f"{table}_{column}_idx" not in existing_indexes:
+            statements.append(f"CREATE INDEX {table}_{column}_idx ON {table} ({column})")
+    return statements
+
+# Tables déjà vérifiées dans ce processus
+_prepared_tables = set()
+
+def prepare_result_table(table, engine):
+    """Crée ou complète la table de résultats, une fois par processus
+
+    Le DDL manquant est appliqué dans sa propre transaction courte, avant
+    toute transaction de données. À appeler avant d'ouvrir un curseur en flux
+    qui lit la table (filtre NOT EXISTS) : les écritures suivantes n'émettent
+    plus aucun DDL.
+    """
+    if table in _prepared_tables:
+        return
+    conn = engine.raw_connection()
+    try:
+        with conn.cursor() as cursor:
+            statements = _missing_ddl_statements(cursor, table, RESULT_TABLES[table])
+            for statement in statements:
+                cursor.execute(statement)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    if statements:
+        print(f"🛠️  {table} : {len(statements)} instruction(s) de schéma appliquée(s)")
+    _prepared_tables.add(table)
+
+def _merge_statement(table, spec, staging_table):
+    """Fusion : une ligne existante n'est réécrite que si un résultat a changé
+
+    L'horodatage d'écriture n'entre pas dans la comparaison : un avis dont le
+    résultat est identique garde son horodatage et n'est pas retraité par
+    reviews_enriched.
+    """
+    columns = list(spec['columns'])
+    update_columns = [column for column in columns if column != spec['key']]
+    result_columns = [column for column in update_columns if column != spec['written_at']]
+    return f"""
+        INSERT INTO {table} AS t ({', '.join(columns)})
+        SELECT {', '.join(columns)} FROM {staging_table}
+        ON CONFLICT ({spec['key']}) DO UPDATE SET
+            {', '.join(f'{column} = EXCLUDED.{column}' for column in update_columns)}
+        WHERE ({', '.join(f't.{column}' for column in result_columns)})
+            IS DISTINCT FROM ({', '.join(f'EXCLUDED.{column}' for column in result_columns)})
+    """
+
+def _copy_and_merge(cursor, results_df, table, spec, staging_table):
+    """COPY de results_df dans la table temporaire puis fusion dans la cible ; retourne le nombre de lignes"""
+    columns = list(spec['columns'])
+    # Une clé en double dans le lot ferait échouer ON CONFLICT DO UPDATE
+    results_df = results_df[columns].drop_duplicates(subset=spec['key'], keep='last')
+
+    buffer = io.StringIO()
+    results_df.to_csv(buffer, index=False, header=False)
+    buffer.seek(0)
+    cursor.copy_expert(f"COPY {staging_table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+    cursor.execute(_merge_statement(table, spec, staging_table))
+    return len(results_df)
+
+def write_results(results_df, table, engine):
+    """Fusionne results_df dans la table de résultats, clé review_id
+
+    Retourne le nombre de lignes écrites.
+    """
+    spec = RESULT_TABLES[table]
+    staging_table = f"{table}_delta"
+
+    prepare_result_table(table, engine)
+    conn = engine.raw_connection()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(f"CREATE TEMP TABLE {staging_table} (LIKE {table}) ON COMMIT DROP")
+            n_written = _copy_and_merge(cursor, results_df, table, spec, staging_table)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    return n_written
+
+class FullRunWriter:
+    """Run complet d'une table de résultats, atomique
+
+    Tous les blocs sont fusionnés dans une seule transaction et leurs clés
+    notées dans une table temporaire. À la sortie du bloc with, les lignes
+    dont la clé n'a pas été écrite (avis disparus de la source) sont
+    supprimées puis tout est validé d'un coup : les lecteurs voient l'ancien
+    état jusqu'au COMMIT (le run ne tient que des verrous de lignes, le DDL
+    éventuel est appliqué avant), un run interrompu est entièrement annulé.
+
+        with FullRunWriter('sentiment_analysis', engine) as writer:
+            for results_df in blocs:
+                writer.write(results_df)
+        writer.n_pruned
+    """
+
+    def __init__(self, table, engine):
+        self.table = table
+        self.spec = RESULT_TABLES[table]
+        self.engine = engine
+        self.staging_table = f"{table}_delta"
+        self.keys_table = f"{table}_run_keys"
+        self.n_written = 0
+        self.n_pruned = 0
+
+    def __enter__(self):
+        # Schéma vérifié hors de la transaction du run : seuls des verrous de
+        # lignes sont tenus pendant le run
+        prepare_result_table(self.table, self.engine)
+        self.conn = self.engine.raw_connection()
+        try:
+            self.cursor = self.conn.cursor()
+            self.cursor.execute(f"CREATE TEMP TABLE {self.staging_table} (LIKE {self.table}) ON COMMIT DROP")
+            self.cursor.execute(
+                f"CREATE TEMP TABLE {self.keys_table} ({self.spec['key']} TEXT PRIMARY KEY) ON COMMIT DROP"
+            )
+        except Exception:
+            self.conn.rollback()
+            self.conn.close()
+            raise
+        return self
+
+    def write(self, results_df):
+        """Fusionne un bloc de résultats (non validé avant la fin du run) ; retourne le nombre de lignes"""
+        key = self.spec['key']
+        self.cursor.execute(f"TRUNCATE {self.staging_table}")
+        n_written = _copy_and_merge(self.cursor, results_df, self.table, self.spec, self.staging_table)
+        self.cursor.execute(
+            f"INSERT INTO {self.keys_table} SELECT {key} FROM {self.staging_table} ON CONFLICT DO NOTHING"
+        )
+        self.n_written += n_written
+        return n_written
+
+    def __exit__(self, exc_type, exc, traceback):
+        key = self.spec['key']
+        try:
+            if exc_type is None and self.n_written:
+                self.cursor.execute(f"""
+                    DELETE FROM {self.table} t
+                    WHERE NOT EXISTS (SELECT 1 FROM {self.keys_table} k WHERE k.{key} = t.{key})
+                """)
+                self.n_pruned = self.cursor.rowcount
+                self.conn.commit()
+            elif exc_type is None:
+                # Un run sans aucun résultat ne vide pas la table
+                self.conn.commit()
+            else:
+                self.conn.rollback()
+        except Exception:
+            self.conn.rollback()
+            raise
+        finally:
+            self.cursor.close()
+            self.conn.close()
+        return False
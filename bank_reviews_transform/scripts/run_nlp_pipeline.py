@@ -0,0 +1,31 @@
+"""Pipeline NLP de la Phase 2 dans un seul processus : sentiment puis topics
+
+Les deux étapes partagent l'engine (pool de connexions) du processus au lieu
+d'ouvrir chacune leurs connexions depuis un sous-processus distinct.
+
+Usage (depuis bank_reviews_transform/) :
+    python scripts/run_nlp_pipeline.py --workers 8 --incremental --topic-mode assign
+"""
+import argparse
+
+from db import get_engine
+from sentiment_analysis import process_reviews
+from topic_extraction import MODES, process_topic_extraction
+
+def run_nlp_pipeline(workers=1, incremental=False, topic_mode='assign'):
+    try:
+        process_reviews(workers=workers, incremental=incremental)
+        process_topic_extraction(workers=workers, mode=topic_mode)
+    finally:
+        get_engine().dispose()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Analyse de sentiment puis extraction de topics")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Nombre de processus pour le scoring et les topics (1 = séquentiel)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Ne scorer que les avis jamais analysés (clé de contenu review_id)")
+    parser.add_argument("--topic-mode", choices=MODES, default='assign',
+                        help="assign : modèles de topics persistés ; refresh : partial_fit ; refit : réentraînement complet")
+    args = parser.parse_args()
+    run_nlp_pipeline(workers=args.workers, incremental=args.incremental, topic_mode=args.topic_mode)
@@ -1,80 +1,249 @@
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
 import pandas as pd
-from textblob import TextBlob
+import numpy as np
+from textblob.en.sentiments import PatternAnalyzer
 from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
-from langdetect import detect, DetectorFactory
-from sqlalchemy import create_engine
-import os
-from dotenv import load_dotenv
+from sqlalchemy import inspect
 
-# Fixer la graine pour la détection de langue
-DetectorFactory.seed = 0
+from db import STREAM_CHUNK_ROWS, get_engine, stream_query
+from language_detection import detect_languages, init_language_detector
+from result_writer import FullRunWriter, prepare_result_table, write_results
 
-load_dotenv()
+# Seuils de classification VADER
+POSITIVE_THRESHOLD = 0.05
+NEGATIVE_THRESHOLD = -0.05
+
+# Découpage adaptatif pour le mode multi-processus
+CHUNK_CHAR_BUDGET = 200_000   # volume de texte visé par morceau
+MAX_CHUNK_ROWS = 5_000
+MIN_CHUNKS_PER_WORKER = 4
+
+# Colonnes lues dans stg_reviews : seules celles utiles au scoring et au découpage
+SENTIMENT_INPUT_QUERY = "SELECT r.review_id, r.clean_text, r.text_length FROM stg_reviews r"
+# Avis jamais scorés, ou scorés avant la persistance de la langue
+UNSCORED_FILTER = """
+WHERE NOT EXISTS (
+    SELECT 1 FROM sentiment_analysis s
+    WHERE s.review_id = r.review_id AND s.language IS NOT NULL
+)
+"""
+
+SENTIMENT_COLUMNS = ['review_id', 'sentiment', 'vader_compound', 'textblob_polarity', 'confidence', 'language', 'scored_at']
+SCORE_COLUMNS = ('sentiment', 'vader_compound', 'textblob_polarity', 'confidence', 'language')
+
+# Analyseurs partagés : le lexique VADER et le lexique Pattern ne sont chargés qu'une fois
+_vader_analyzer = None
+_textblob_analyzer = None
+
+def get_analyzers():
+    """Retourne les analyseurs VADER et TextBlob, chargés une seule fois par processus"""
+    global _vader_analyzer, _textblob_analyzer
+    if _vader_analyzer is None:
+        _vader_analyzer = SentimentIntensityAnalyzer()
+        _textblob_analyzer = PatternAnalyzer()
+    return _vader_analyzer, _textblob_analyzer
+
+def classify_sentiment(vader_compound):
+    """Classification vectorisée des scores VADER en positive / negative / neutral"""
+    compound = np.asarray(vader_compound, dtype=float)
+    return np.select(
+        [compound >= POSITIVE_THRESHOLD, compound <= NEGATIVE_THRESHOLD],
+        ['positive', 'negative'],
+        default='neutral'
+    )
+
+def score_sentiment_batch(texts):
+    """Analyse de sentiment par lot avec VADER et TextBlob
+
+    Prend une colonne (ou un morceau) de textes et retourne des tableaux NumPy
+    alignés sur l'entrée : sentiment, vader_compound, textblob_polarity, confidence.
+    """
+    vader, textblob = get_analyzers()
+
+    # Normalisation en une passe (les NULL deviennent des textes vides)
+    texts = pd.Series(texts, dtype=object).fillna('').astype(str).tolist()
+    n_texts = len(texts)
+
+    vader_compound = np.fromiter(
+        (vader.polarity_scores(text)['compound'] for text in texts),
+        dtype=float, count=n_texts
+    )
+    # PatternAnalyzer est l'analyseur utilisé par TextBlob(text).sentiment
+    textblob_polarity = np.fromiter(
+        (textblob.analyze(text).polarity for text in texts),
+        dtype=float, count=n_texts
+    )
 
-def analyze_sentiment(text):
-    """Analyse de sentiment avec VADER et TextBlob"""
-    # VADER (bon pour texte informel)
-    analyzer = SentimentIntensityAnalyzer()
-    vader_scores = analyzer.polarity_scores(text)
-    
-    # TextBlob
-    blob = TextBlob(text)
-    textblob_polarity = blob.sentiment.polarity
-    
-    # Classification finale
-    if vader_scores['compound'] >= 0.05:
-        sentiment = 'positive'
-    elif vader_scores['compound'] <= -0.05:
-        sentiment = 'negative'
-    else:
-        sentiment = 'neutral'
-    
     return {
-        'sentiment': sentiment,
-        'vader_compound': vader_scores['compound'],
+        'sentiment': classify_sentiment(vader_compound),
+        'vader_compound': vader_compound,
         'textblob_polarity': textblob_polarity,
-        'confidence': abs(vader_scores['compound'])
+        'confidence': np.abs(vader_compound)
+    }
+
+def analyze_sentiment(text):
+    """Analyse de sentiment avec VADER et TextBlob (un seul texte)"""
+    scores = score_sentiment_batch([text])
+    return {
+        'sentiment': str(scores['sentiment'][0]),
+        'vader_compound': float(scores['vader_compound'][0]),
+        'textblob_polarity': float(scores['textblob_polarity'][0]),
+        'confidence': float(scores['confidence'][0])
     }
 
-def detect_language_advanced(text):
-    """Détection de langue améliorée"""
+def score_and_detect_batch(texts):
+    """Scores de sentiment et langue détectée d'un lot de textes"""
+    scores = score_sentiment_batch(texts)
+    scores['language'] = detect_languages(texts)
+    return scores
+
+def _init_worker():
+    """Initialise les analyseurs et les profils de langue une seule fois par processus du pool"""
+    get_analyzers()
+    init_language_detector()
+
+def _score_chunk(chunk):
+    """Score un morceau (review_ids, textes) dans un processus du pool"""
+    review_ids, texts = chunk
+    return review_ids, score_and_detect_batch(texts)
+
+def build_chunks(df, n_workers):
+    """Découpe les avis en morceaux de volume de texte comparable
+
+    La taille des morceaux dépend de text_length : quelques avis très longs
+    n'immobilisent pas un processus pendant que les autres attendent.
+    """
+    lengths = df['text_length'].fillna(0).to_numpy(dtype=float)
+    # Budget par morceau : assez de morceaux pour équilibrer la charge du pool
+    budget = min(CHUNK_CHAR_BUDGET, max(lengths.sum() / (n_workers * MIN_CHUNKS_PER_WORKER), 1.0))
+
+    # Numéro de morceau de chaque ligne selon la longueur de texte cumulée
+    chunk_ids = (np.cumsum(lengths) // budget).astype(int)
+    chunk_ids += np.arange(len(df)) // MAX_CHUNK_ROWS
+    boundaries = np.flatnonzero(np.diff(chunk_ids)) + 1
+
+    review_ids = df['review_id'].to_numpy()
+    texts = df['clean_text'].to_numpy()
+    return [
+        (ids, chunk_texts)
+        for ids, chunk_texts in zip(np.split(review_ids, boundaries), np.split(texts, boundaries))
+        if len(ids)
+    ]
+
+def score_sentiment_parallel(df, n_workers, executor=None):
+    """Score les avis dans un pool de processus en conservant l'ordre des review_id
+
+    executor : pool déjà démarré, réutilisé d'un bloc de lecture à l'autre.
+    """
+    chunks = build_chunks(df, n_workers)
+    print(f"⚙️  {len(chunks)} morceaux répartis sur {n_workers} processus")
+
+    # map() rend les résultats dans l'ordre de soumission des morceaux
+    if executor is None:
+        with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker) as executor:
+            results = list(executor.map(_score_chunk, chunks))
+    else:
+        results = list(executor.map(_score_chunk, chunks))
+
+    review_ids = np.concatenate([ids for ids, _ in results])
+    scores = {
+        column: np.concatenate([chunk_scores[column] for _, chunk_scores in results])
+        for column in SCORE_COLUMNS
+    }
+    return review_ids, scores
+
+def is_keyed_sentiment_table(engine):
+    """True si sentiment_analysis est indexée sur la clé de contenu review_id
+
+    review_id est la clé de contenu calculée à l'ingestion : un avis déjà scoré
+    garde le même identifiant d'un run à l'autre. Une table sans index unique
+    sur review_id date des anciens identifiants ROW_NUMBER() et est reconstruite.
+    """
+    inspector = inspect(engine)
+    if not inspector.has_table('sentiment_analysis'):
+        return False
+    unique_keys = [index['column_names'] for index in inspector.get_indexes('sentiment_analysis') if index['unique']]
+    # Table antérieure à la persistance de la langue : un run complet la renseigne
+    columns = {column['name'] for column in inspector.get_columns('sentiment_analysis')}
+    return ['review_id'] in unique_keys and 'language' in columns
+
+def score_reviews(df, workers=1, executor=None):
+    """Scores de sentiment et langue d'un bloc d'avis (review_id, clean_text, text_length)"""
+    if executor is not None and len(df) > 0:
+        review_ids, scores = score_sentiment_parallel(df, workers, executor)
+    else:
+        review_ids, scores = df['review_id'].to_numpy(), score_and_detect_batch(df['clean_text'])
+    # review_id reste aligné grâce à l'ordre conservé
+    return pd.DataFrame({**scores, 'review_id': review_ids})
+
+def process_reviews(workers=1, incremental=False, chunk_rows=STREAM_CHUNK_ROWS):
+    """Traite les avis avec analyse de sentiment
+
+    Les avis sont lus en flux (curseur serveur, colonnes utiles uniquement) :
+    chaque bloc est scoré puis écrit avant la lecture du suivant, la mémoire
+    reste bornée quelle que soit la taille de stg_reviews.
+
+    La langue de chaque avis est détectée dans la même passe et persistée
+    dans sentiment_analysis.language.
+
+    En mode incrémental, seuls les avis dont la clé de contenu (review_id) n'a
+    jamais été scorée sont lus (filtre NOT EXISTS côté base). Un run complet
+    réécrit tous les avis puis supprime les scores des avis disparus, dans une
+    seule transaction : un run interrompu laisse la table inchangée.
+    Retourne le nombre d'avis scorés.
+    """
+    # Connexion à la base (engine partagé du processus)
+    engine = get_engine()
+
+    incremental = incremental and is_keyed_sentiment_table(engine)
+    query = SENTIMENT_INPUT_QUERY + (UNSCORED_FILTER if incremental else "")
+    if incremental:
+        print("🔁 Mode incrémental : seuls les avis jamais scorés sont lus")
+
+    # Horodatage du scoring : permet à reviews_enriched de prendre en compte les mises à jour tardives
+    scored_at = pd.Timestamp.now(tz='UTC')
+    n_scored = 0
+
+    # Schéma de la table vérifié avant d'ouvrir le curseur en flux : il lit
+    # sentiment_analysis (NOT EXISTS) jusqu'à la fin du run, un DDL pendant le
+    # flux attendrait la fin de ce curseur
+    prepare_result_table('sentiment_analysis', engine)
+    # Un run complet est validé d'un bloc en fin de run (FullRunWriter) ;
+    # en incrémental, chaque bloc est validé dès son écriture
+    full_run = None if incremental else FullRunWriter('sentiment_analysis', engine)
+    # Un seul pool de processus pour tous les blocs
+    executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) if workers > 1 else None
     try:
-        return detect(text)
-    except:
-        # Fallback avec des mots-clés
-        if any(word in text.lower() for word in ['والله', 'الله', 'جيد', 'سيء']):
-            return 'ar'
-        elif any(word in text.lower() for word in ['très', 'bon', 'mauvais', 'service']):
-            return 'fr'
-        elif any(word in text.lower() for word in ['good', 'bad', 'service', 'staff']):
-            return 'en'
-        return 'unknown'
-
-def process_reviews():
-    """Traite les avis avec analyse de sentiment"""
-    # Connexion à la base
-    DB_URL = f"postgresql+psycopg2://{os.getenv('DB_USER')}:{os.getenv('DB_PASSWORD')}@{os.getenv('DB_HOST')}:{os.getenv('DB_PORT')}/{os.getenv('DB_NAME')}"
-    engine = create_engine(DB_URL)
-    
-    # Lire les données nettoyées
-    query = "SELECT * FROM stg_reviews"
-    df = pd.read_sql(query, engine)
-    
-    # Analyse de sentiment
-    sentiment_results = []
-    for _, row in df.iterrows():
-        result = analyze_sentiment(row['clean_text'])
-        result['review_id'] = row['review_id']
-        sentiment_results.append(result)
-    
-    # Créer DataFrame des résultats
-    sentiment_df = pd.DataFrame(sentiment_results)
-    
-    # Sauvegarder dans PostgreSQL
-    sentiment_df.to_sql('sentiment_analysis', engine, if_exists='replace', index=False)
-    
-    print(f"✅ Analyse de sentiment terminée pour {len(sentiment_df)} avis")
-    return sentiment_df
+        with full_run or nullcontext():
+            for chunk in stream_query(query, chunk_rows=chunk_rows, engine=engine):
+                sentiment_df = score_reviews(chunk, workers, executor)
+                sentiment_df['scored_at'] = scored_at
+                if full_run is None:
+                    write_results(sentiment_df[SENTIMENT_COLUMNS], 'sentiment_analysis', engine)
+                else:
+                    full_run.write(sentiment_df[SENTIMENT_COLUMNS])
+                n_scored += len(sentiment_df)
+                print(f"  {n_scored} avis scorés")
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    if full_run is not None:
+        print(f"🧹 {full_run.n_pruned} scores d'avis disparus supprimés")
+    elif n_scored == 0:
+        print("✅ Aucun nouvel avis à analyser")
+        return 0
+
+    print(f"✅ Analyse de sentiment terminée pour {n_scored} avis")
+    return n_scored
 
 if __name__ == "__main__":
-    process_reviews()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Analyse de sentiment des avis")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Nombre de processus pour le scoring (1 = séquentiel)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Ne scorer que les avis jamais analysés (clé de contenu review_id)")
+    args = parser.parse_args()
+    process_reviews(workers=args.workers, incremental=args.incremental)
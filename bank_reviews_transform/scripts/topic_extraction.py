@@ -1,13 +1,23 @@
+import argparse
+import glob
+import hashlib
+import os
+import time
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import pandas as pd
 import numpy as np
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.decomposition import LatentDirichletAllocation
 from sklearn.feature_extraction.text import ENGLISH_STOP_WORDS
-from sqlalchemy import create_engine
-import os
-from dotenv import load_dotenv
+from sqlalchemy import inspect
+import joblib
 import re
-from collections import Counter
+from collections import Counter, deque
+from scipy import sparse
+
+from db import STREAM_CHUNK_ROWS, get_engine, stream_query
+from result_writer import FullRunWriter, prepare_result_table, write_results
 
 # Stopwords multilingues
 FRENCH_STOPWORDS = {
@@ -23,51 +33,139 @@ ARABIC_STOPWORDS = {
 }
 
 ALL_STOPWORDS = ENGLISH_STOP_WORDS.union(FRENCH_STOPWORDS).union(ARABIC_STOPWORDS)
+STOPWORDS = frozenset(ALL_STOPWORDS)
 
-load_dotenv()
+# Les chiffres sont supprimés (les lettres qui les entourent sont réunies), puis
+# ponctuation et espaces séparent les mots
+DIGITS_RE = re.compile(r'\d+')
+WORD_RE = re.compile(r'\w+')
+MIN_TOKEN_LENGTH = 3
 
-def preprocess_text(text, language='fr'):
-    """Prétraitement du texte pour LDA"""
-    # Convertir en minuscules
-    text = text.lower()
-    
-    # Supprimer la ponctuation et caractères spéciaux
-    text = re.sub(r'[^\w\s]', ' ', text)
-    
-    # Supprimer les chiffres
-    text = re.sub(r'\d+', '', text)
-    
-    # Supprimer les espaces multiples
-    text = re.sub(r'\s+', ' ', text).strip()
-    
-    # Tokeniser et supprimer les mots courts
-    words = [word for word in text.split() if len(word) > 2]
-    
-    # Supprimer les stopwords
-    words = [word for word in words if word not in ALL_STOPWORDS]
-    
-    return ' '.join(words)
+# Catégories de topics et leurs mots-clés (un mot-clé contenu dans un terme suffit)
+CATEGORY_KEYWORDS = {
+    'service_client': ['service', 'personnel', 'accueil', 'staff', 'équipe', 'conseiller'],
+    'attente_rapidite': ['attente', 'rapide', 'lent', 'temps', 'queue', 'file'],
+    'frais_tarifs': ['frais', 'cher', 'prix', 'tarif', 'coût', 'gratuit'],
+    'digital_technologie': ['application', 'app', 'site', 'internet', 'digital', 'technologie'],
+    'localisation_acces': ['parking', 'accès', 'location', 'proche', 'loin', 'centre']
+}
+CATEGORY_NAMES = list(CATEGORY_KEYWORDS)
+# Empreinte de la table : les matrices termes x catégories persistées sont recalculées si elle change
+CATEGORY_TABLE_FINGERPRINT = hashlib.md5(repr(sorted(CATEGORY_KEYWORDS.items())).encode('utf-8')).hexdigest()
 
-def extract_topics_lda(texts, n_topics=5, language='fr'):
-    """Extraction de topics avec LDA"""
-    
-    # Prétraitement
-    processed_texts = [preprocess_text(text, language) for text in texts]
+N_TOPICS = 5
+# En deçà, une langue n'est pas analysée
+MIN_REVIEWS_PER_LANGUAGE = 10
+
+# Modèles persistés (TF-IDF + LDA) par langue ; le format est incrémenté quand le
+# prétraitement change, les modèles d'un ancien format sont alors ignorés
+MODEL_FORMAT = 3
+TOPIC_MODEL_DIR = os.getenv(
+    'TOPIC_MODEL_DIR',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'topic_models')
+)
+
+# Modes d'exécution :
+#   assign  : topics des nouveaux avis avec les modèles persistés (run quotidien)
+#   refresh : mise à jour en ligne (partial_fit) avec les nouveaux avis, puis
+#             réassignation de tous les avis
+#   refit   : fit complet de nouveaux modèles sur tous les avis
+MODES = ('assign', 'refresh', 'refit')
+
+# Corpus d'apprentissage d'une langue : échantillon uniforme d'au plus
+# MAX_TRAINING_REVIEWS avis (la mémoire du fit ne dépend pas de la taille de la table)
+MAX_TRAINING_REVIEWS = 200_000
+SAMPLE_SEED = 42
+
+# Avis à analyser : seules les colonnes utiles, langues reconnues uniquement.
+# Lus dans stg_reviews avec la langue que l'analyse de sentiment vient d'écrire
+# (même run du pipeline NLP) : reviews_enriched n'est reconstruit qu'après,
+# les avis du jour n'y figurent pas encore.
+TOPIC_INPUT_FROM = """
+FROM stg_reviews r
+JOIN sentiment_analysis s ON s.review_id = r.review_id
+"""
+TOPIC_INPUT_FILTER = "r.text_length > 20 AND s.language <> 'unknown'"
+TOPIC_INPUT_QUERY = f"""
+SELECT r.review_id, r.clean_text, s.language AS detected_language
+{TOPIC_INPUT_FROM}
+WHERE {TOPIC_INPUT_FILTER}
+"""
+# Avis sans topic dans topic_analysis
+NEW_REVIEW_CONDITION = "NOT EXISTS (SELECT 1 FROM topic_analysis t WHERE t.review_id = r.review_id)"
+# Volume par langue : tous les avis et nouveaux avis ({n_new})
+LANGUAGE_COUNTS_QUERY = f"""
+SELECT s.language AS detected_language, COUNT(*) AS n_reviews, {{n_new}} AS n_new
+{TOPIC_INPUT_FROM}
+WHERE {TOPIC_INPUT_FILTER}
+GROUP BY s.language
+"""
+
+def tokenize(text):
+    """Tokens d'un texte pour la LDA, avec des motifs précompilés
+
+    Mêmes tokens que l'ancien prétraitement : minuscules, chiffres supprimés,
+    mots d'au moins 3 caractères, stopwords retirés.
+    """
+    return [
+        word for word in WORD_RE.findall(DIGITS_RE.sub('', text.lower()))
+        if len(word) >= MIN_TOKEN_LENGTH and word not in STOPWORDS
+    ]
+
+def tokenize_reviews(texts):
+    """Tokens de chaque avis, calculés une seule fois à la lecture du corpus"""
+    return [tokenize(text or '') for text in texts]
+
+def analyze_tokens(tokens):
+    """Analyseur du TfidfVectorizer : unigrammes et bigrammes des tokens déjà filtrés
+
+    Fonction de module : le vectorizer persisté avec joblib reste sérialisable.
+    """
+    return tokens + [f"{first} {second}" for first, second in zip(tokens, tokens[1:])]
+
+def _preprocess_corpus(token_lists):
+    """Documents non vides et masque des documents conservés
+
+    kept[i] est vrai si token_lists[i] figure dans le corpus : le masque relie
+    chaque ligne de la LDA à son avis d'origine.
+    """
+    kept = np.fromiter((bool(tokens) for tokens in token_lists), dtype=bool, count=len(token_lists))
+    return [tokens for tokens in token_lists if tokens], kept
+
+def topic_keywords(model, top_n=10):
+    """Mots-clés de chaque topic d'après les composantes de la LDA"""
+    feature_names = model['vectorizer'].get_feature_names_out()
+    topics = []
     
-    # Filtrer les textes vides
-    processed_texts = [text for text in processed_texts if text.strip()]
+    for topic_idx, topic in enumerate(model['lda'].components_):
+        top_words_idx = topic.argsort()[-top_n:][::-1]
+        top_words = [feature_names[i] for i in top_words_idx]
+        topics.append({
+            'topic_id': topic_idx,
+            'keywords': top_words,
+            'term_ids': top_words_idx,
+            'weight_sum': topic[top_words_idx].sum()
+        })
+    return topics
+
+def fit_topic_model(token_lists, n_topics=5, language='fr', n_jobs=None):
+    """Fit complet du TF-IDF et de la LDA d'une langue
+
+    n_jobs : cœurs alloués à l'étape E de la LDA (partagés entre les langues
+    traitées en parallèle). Retourne le modèle, ou None si le corpus est trop petit.
+    """
+    processed_texts, _ = _preprocess_corpus(token_lists)
     
     if len(processed_texts) < 10:
         print("⚠️  Pas assez de textes pour l'analyse LDA")
-        return None, None, None
+        return None
     
-    # Vectorisation TF-IDF
+    # Vectorisation TF-IDF sur les tokens déjà filtrés (pas de seconde tokenisation)
     vectorizer = TfidfVectorizer(
+        analyzer=analyze_tokens,
         max_features=100,
         min_df=2,
-        max_df=0.8,
-        ngram_range=(1, 2),
-        stop_words=list(ALL_STOPWORDS)
+        max_df=0.8
     )
     
     try:
@@ -78,145 +176,422 @@ def extract_topics_lda(texts, n_topics=5, language='fr'):
             n_components=n_topics,
             random_state=42,
             max_iter=100,
-            learning_method='batch'
+            learning_method='batch',
+            n_jobs=n_jobs
         )
         
         lda.fit(tfidf_matrix)
-        
-        # Extraire les mots-clés pour chaque topic
-        feature_names = vectorizer.get_feature_names_out()
-        topics = []
-        
-        for topic_idx, topic in enumerate(lda.components_):
-            top_words_idx = topic.argsort()[-10:][::-1]
-            top_words = [feature_names[i] for i in top_words_idx]
-            topics.append({
-                'topic_id': topic_idx,
-                'keywords': top_words,
-                'weight_sum': topic[top_words_idx].sum()
-            })
-        
-        # Assigner des topics aux documents
-        doc_topic_dist = lda.transform(tfidf_matrix)
-        dominant_topics = np.argmax(doc_topic_dist, axis=1)
-        
-        return topics, dominant_topics, doc_topic_dist
-        
     except Exception as e:
         print(f"❌ Erreur LDA: {e}")
-        return None, None, None
-
-def categorize_topics(topics):
-    """Catégorise automatiquement les topics basés sur les mots-clés"""
-    
-    # Dictionnaire de catégories avec mots-clés
-    categories = {
-        'service_client': ['service', 'personnel', 'accueil', 'staff', 'équipe', 'conseiller'],
-        'attente_rapidite': ['attente', 'rapide', 'lent', 'temps', 'queue', 'file'],
-        'frais_tarifs': ['frais', 'cher', 'prix', 'tarif', 'coût', 'gratuit'],
-        'digital_technologie': ['application', 'app', 'site', 'internet', 'digital', 'technologie'],
-        'localisation_acces': ['parking', 'accès', 'location', 'proche', 'loin', 'centre']
+        return None
+    
+    return {
+        'vectorizer': vectorizer,
+        'lda': lda,
+        'n_documents': len(processed_texts),
+        'fitted_at': pd.Timestamp.now(tz='UTC'),
     }
+
+def refresh_topic_model(model, new_token_lists, language='fr'):
+    """Mise à jour en ligne (partial_fit) de la LDA avec les nouveaux avis
+
+    Le vocabulaire du TF-IDF est conservé : les identifiants de topics restent
+    stables, seules leurs composantes évoluent.
+    """
+    processed_texts, _ = _preprocess_corpus(new_token_lists)
+    if not processed_texts:
+        return model
+    n_documents = model['n_documents'] + len(processed_texts)
+    # total_samples : taille du corpus, pondère la mise à jour en ligne
+    model['lda'].set_params(total_samples=n_documents)
+    model['lda'].partial_fit(model['vectorizer'].transform(processed_texts))
+    model['n_documents'] = n_documents
+    return model
+
+def transform_topics(model, token_lists, language='fr'):
+    """Distribution des topics des avis tokenisés avec un modèle déjà ajusté
+
+    Retourne (kept, doc_topic_dist) : doc_topic_dist a une ligne par avis
+    conservé (kept), dans l'ordre de token_lists.
+    """
+    processed_texts, kept = _preprocess_corpus(token_lists)
+    if not processed_texts:
+        return kept, np.empty((0, model['lda'].n_components))
+    return kept, model['lda'].transform(model['vectorizer'].transform(processed_texts))
+
+def model_path(language):
+    return os.path.join(TOPIC_MODEL_DIR, f"{language}.v{MODEL_FORMAT}.joblib")
+
+def load_topic_model(language):
+    """Modèle persisté d'une langue, ou None s'il n'a jamais été ajusté"""
+    path = model_path(language)
+    return joblib.load(path) if os.path.exists(path) else None
+
+def save_topic_model(language, model):
+    """Persiste le modèle (écriture dans un fichier temporaire puis remplacement atomique)"""
+    os.makedirs(TOPIC_MODEL_DIR, exist_ok=True)
+    tmp_path = f"{model_path(language)}.tmp"
+    joblib.dump(model, tmp_path)
+    os.replace(tmp_path, model_path(language))
+
+def build_keyword_automaton(category_keywords):
+    """Automate d'Aho-Corasick sur les mots-clés des catégories
+
+    Retourne (transitions, liens d'échec, sorties) : sorties[état] est
+    l'ensemble des indices de catégories dont un mot-clé se termine dans cet état.
+    """
+    transitions, failure, outputs = [{}], [0], [set()]
+    for category_idx, words in enumerate(category_keywords.values()):
+        for word in words:
+            state = 0
+            for char in word.lower():
+                next_state = transitions[state].get(char)
+                if next_state is None:
+                    next_state = len(transitions)
+                    transitions[state][char] = next_state
+                    transitions.append({})
+                    failure.append(0)
+                    outputs.append(set())
+                state = next_state
+            outputs[state].add(category_idx)
+
+    # Liens d'échec en largeur : plus long suffixe propre présent dans l'automate
+    queue = deque(transitions[0].values())
+    while queue:
+        state = queue.popleft()
+        for char, next_state in transitions[state].items():
+            queue.append(next_state)
+            fallback = failure[state]
+            while fallback and char not in transitions[fallback]:
+                fallback = failure[fallback]
+            failure[next_state] = transitions[fallback].get(char, 0)
+            outputs[next_state] |= outputs[failure[next_state]]
+    return transitions, failure, [frozenset(output) for output in outputs]
+
+def match_categories(term, automaton):
+    """Indices des catégories dont un mot-clé apparaît dans term (une seule passe)"""
+    transitions, failure, outputs = automaton
+    state = 0
+    matched = set()
+    for char in term:
+        while state and char not in transitions[state]:
+            state = failure[state]
+        state = transitions[state].get(char, 0)
+        matched |= outputs[state]
+    return matched
+
+# Compilé une fois par processus
+KEYWORD_AUTOMATON = build_keyword_automaton(CATEGORY_KEYWORDS)
+
+def term_category_matrix(vocabulary, automaton=KEYWORD_AUTOMATON):
+    """Matrice creuse binaire termes x catégories du vocabulaire du vectorizer"""
+    rows, cols = [], []
+    for term_idx, term in enumerate(vocabulary):
+        for category_idx in match_categories(term, automaton):
+            rows.append(term_idx)
+            cols.append(category_idx)
+    return sparse.csr_matrix(
+        (np.ones(len(rows)), (rows, cols)),
+        shape=(len(vocabulary), len(CATEGORY_NAMES))
+    )
+
+def model_term_categories(model):
+    """Matrice termes x catégories d'un modèle, calculée une fois puis persistée avec lui
+
+    Recalculée si la table des catégories a changé depuis le fit.
+    """
+    if model.get('category_table') != CATEGORY_TABLE_FINGERPRINT:
+        model['term_categories'] = term_category_matrix(model['vectorizer'].get_feature_names_out())
+        model['category_table'] = CATEGORY_TABLE_FINGERPRINT
+    return model['term_categories']
+
+def categorize_topics(model, top_n=10):
+    """Catégorise automatiquement les topics basés sur les mots-clés
+
+    Le score d'une catégorie est le nombre de mots-clés du topic (ses top_n
+    termes) qui contiennent un mot de la catégorie : produit creux de la
+    matrice topics x termes par la matrice termes x catégories.
+    """
+    topics = topic_keywords(model, top_n)
+    n_terms = len(model['vectorizer'].get_feature_names_out())
     
-    categorized_topics = []
+    # Indicatrice des mots-clés de chaque topic
+    rows = np.repeat(np.arange(len(topics)), [len(topic['term_ids']) for topic in topics])
+    cols = np.concatenate([topic['term_ids'] for topic in topics])
+    top_terms = sparse.csr_matrix((np.ones(len(cols)), (rows, cols)), shape=(len(topics), n_terms))
+    category_scores = (top_terms @ model_term_categories(model)).toarray()
     
-    for topic in topics:
-        topic_keywords = [word.lower() for word in topic['keywords']]
-        
-        # Calculer le score pour chaque catégorie
-        category_scores = {}
-        for category, category_words in categories.items():
-            score = sum(1 for word in topic_keywords if any(cat_word in word for cat_word in category_words))
-            category_scores[category] = score
-        
-        # Assigner la catégorie avec le meilleur score
-        best_category = max(category_scores.items(), key=lambda x: x[1])
-        
-        categorized_topics.append({
-            **topic,
-            'category': best_category[0] if best_category[1] > 0 else 'autre',
-            'category_confidence': best_category[1] / len(topic_keywords)
-        })
+    # Assigner la catégorie avec le meilleur score (la première en cas d'égalité)
+    best_categories = category_scores.argmax(axis=1)
+    best_scores = category_scores[np.arange(len(topics)), best_categories]
     
-    return categorized_topics
+    return [
+        {
+            **topic,
+            'category': CATEGORY_NAMES[best] if score > 0 else 'autre',
+            'category_confidence': score / len(topic['keywords'])
+        }
+        for topic, best, score in zip(topics, best_categories, best_scores)
+    ]
+
+def topic_input_query(new_only=False, languages=None):
+    """Requête des avis à analyser : nouveaux avis seulement, langues choisies"""
+    query = TOPIC_INPUT_QUERY
+    if new_only:
+        query += f" AND {NEW_REVIEW_CONDITION}"
+    if languages is not None:
+        query += " AND s.language = ANY(:languages)"
+    return query
+
+def count_reviews_by_language(mode, engine):
+    """{langue: (avis, nouveaux avis)} ; sans table topic_analysis (refit), tous les avis sont nouveaux"""
+    n_new = 'COUNT(*)' if mode == 'refit' else f"COUNT(*) FILTER (WHERE {NEW_REVIEW_CONDITION})"
+    counts = pd.read_sql(LANGUAGE_COUNTS_QUERY.format(n_new=n_new), engine)
+    return {
+        row.detected_language: (int(row.n_reviews), int(row.n_new))
+        for row in counts.itertuples(index=False)
+    }
+
+def plan_languages(counts, mode):
+    """Étape de chaque langue : fit, partial_fit ou assign (modèle persisté tel quel)
+
+    Une langue sans modèle (nouvelle langue, modèle d'un ancien format) est
+    ajustée quel que soit le mode si son corpus est suffisant.
+    """
+    steps = {}
+    for language, (n_reviews, n_new) in counts.items():
+        has_model = mode != 'refit' and os.path.exists(model_path(language))
+        if not has_model:
+            if mode == 'assign' and not n_new:
+                continue
+            if n_reviews >= MIN_REVIEWS_PER_LANGUAGE:
+                if mode == 'assign':
+                    print(f"⚠️  Aucun modèle persisté pour {language} : fit de la langue avant assignation")
+                steps[language] = 'fit'
+            elif n_new:
+                print(f"⚠️  Aucun modèle pour {language} et seulement {n_reviews} avis "
+                      f"(minimum {MIN_REVIEWS_PER_LANGUAGE}) : {n_new} avis sans topic")
+        elif mode == 'refresh' and n_new:
+            steps[language] = 'partial_fit'
+        elif mode != 'assign' or n_new:
+            steps[language] = 'assign'
+    return steps
+
+def load_training_corpora(languages, new_only, max_reviews=MAX_TRAINING_REVIEWS, chunk_rows=STREAM_CHUNK_ROWS):
+    """Tokens d'apprentissage par langue, lus en flux et échantillonnés
+
+    Échantillon uniforme (reservoir sampling) d'au plus max_reviews avis par
+    langue : seuls les avis retenus sont tokenisés et conservés.
+    """
+    corpora = {language: [] for language in languages}
+    if not corpora:
+        return corpora
+    rng = np.random.default_rng(SAMPLE_SEED)
+    seen = Counter()
+    query = topic_input_query(new_only, languages)
+    for chunk in stream_query(query, params={'languages': list(languages)}, chunk_rows=chunk_rows):
+        for language, text in zip(chunk['detected_language'], chunk['clean_text']):
+            sample = corpora[language]
+            seen[language] += 1
+            if len(sample) < max_reviews:
+                sample.append(tokenize(text or ''))
+            else:
+                slot = rng.integers(seen[language])
+                if slot < max_reviews:
+                    sample[slot] = tokenize(text or '')
+    for language, n_seen in seen.items():
+        if n_seen > max_reviews:
+            print(f"🎲 {language} : échantillon de {max_reviews} avis sur {n_seen} pour l'apprentissage")
+    return corpora
+
+def _model_language(task):
+    """Fit ou mise à jour du modèle d'une langue (dans un processus du pool), puis sauvegarde
+
+    Retourne (langue, modèle ou None si le fit a échoué, étape, durée).
+    """
+    language, token_lists, step, n_jobs = task
+    start = time.perf_counter()
+
+    if step == 'fit':
+        model = fit_topic_model(token_lists, n_topics=N_TOPICS, language=language, n_jobs=n_jobs)
+    else:
+        model = refresh_topic_model(load_topic_model(language), token_lists, language)
+    if model is not None:
+        # Catégorisation avant la sauvegarde : la matrice termes x catégories est persistée avec le modèle
+        model_term_categories(model)
+        save_topic_model(language, model)
+    return language, model, step, time.perf_counter() - start
+
+def _assign_topics(review_ids, language, categorized_topics, kept, doc_topic_dist, extracted_at):
+    """Résultats topic_analysis d'une langue, un enregistrement par avis conservé
 
-def process_topic_extraction():
-    """Traite l'extraction de topics pour tous les avis"""
+    Calcul vectorisé : topic dominant par argmax, confiance et catégorie par
+    take sur les tableaux des topics ; le DataFrame est construit par colonnes.
+    """
+    review_ids = np.asarray(review_ids, dtype=object)[kept]
+    dominant_topics = doc_topic_dist.argmax(axis=1)
+    topic_confidence = np.take_along_axis(doc_topic_dist, dominant_topics[:, None], axis=1).ravel()
     
-    # Connexion à la base
-    DB_URL = f"postgresql+psycopg2://{os.getenv('DB_USER')}:{os.getenv('DB_PASSWORD')}@{os.getenv('DB_HOST')}:{os.getenv('DB_PORT')}/{os.getenv('DB_NAME')}"
-    engine = create_engine(DB_URL)
+    # Une valeur par topic, indexée ensuite par le topic dominant de chaque avis
+    topic_categories = np.array([topic['category'] for topic in categorized_topics], dtype=object)
+    keyword_strings = np.array([', '.join(topic['keywords'][:5]) for topic in categorized_topics], dtype=object)
     
-    # Lire les données nettoyées
-    query = """
-    SELECT review_id, clean_text, detected_language, sentiment, bank
-    FROM reviews_enriched 
-    WHERE text_length > 20
+    return pd.DataFrame({
+        'review_id': review_ids,
+        'dominant_topic': dominant_topics,
+        'topic_category': topic_categories.take(dominant_topics),
+        'topic_keywords': keyword_strings.take(dominant_topics),
+        'topic_confidence': topic_confidence.astype(float),
+        'language': language,
+        'extracted_at': extracted_at
+    })
+
+def _model_languages(training_corpora, steps, workers):
+    """Modélisation par langue, en parallèle si workers > 1 ; résultats au fil de l'eau
+
+    Les workers cœurs sont répartis entre les langues traitées simultanément :
+    chaque LDA reçoit n_jobs = workers // langues en parallèle.
+    """
+    languages = list(training_corpora)
+    n_parallel = max(1, min(workers, len(languages)))
+    n_jobs = max(1, workers // n_parallel)
+    tasks = [(language, training_corpora[language], steps[language], n_jobs) for language in languages]
+
+    if n_parallel == 1:
+        for task in tasks:
+            yield _model_language(task)
+        return
+
+    print(f"⚙️  {len(tasks)} langues sur {n_parallel} processus (n_jobs={n_jobs} par LDA)")
+    with ProcessPoolExecutor(max_workers=n_parallel) as executor:
+        # Les langues les plus volumineuses d'abord : elles bornent la durée totale
+        futures = [executor.submit(_model_language, task) for task in sorted(tasks, key=lambda t: -len(t[1]))]
+        for future in as_completed(futures):
+            yield future.result()
+
+def assign_topics_streaming(models, new_only, write, extracted_at, chunk_rows=STREAM_CHUNK_ROWS):
+    """Topics des avis lus en flux : chaque bloc est transformé, assigné et écrit
+
+    models : {langue: (modèle, topics catégorisés)}. Rien n'est conservé d'un
+    bloc à l'autre hormis les compteurs. Retourne (catégories, avis par langue).
+    """
+    category_counts = Counter()
+    language_counts = Counter()
+    if not models:
+        return category_counts, language_counts
+    query = topic_input_query(new_only, list(models))
+    for chunk in stream_query(query, params={'languages': list(models)}, chunk_rows=chunk_rows):
+        for language, lang_chunk in chunk.groupby('detected_language', sort=False):
+            model, categorized_topics = models[language]
+            token_lists = tokenize_reviews(lang_chunk['clean_text'].tolist())
+            kept, doc_topic_dist = transform_topics(model, token_lists, language)
+            topics_df = _assign_topics(
+                lang_chunk['review_id'].tolist(), language, categorized_topics, kept, doc_topic_dist, extracted_at
+            )
+            if topics_df.empty:
+                continue
+            write(topics_df)
+            category_counts.update(topics_df['topic_category'])
+            language_counts[language] += len(topics_df)
+    return category_counts, language_counts
+
+def resolve_mode(mode, engine):
+    """Sans table topic_analysis ni modèles persistés, seul un fit complet est possible"""
+    has_models = bool(glob.glob(model_path('*')))
+    if mode != 'refit' and not (has_models and inspect(engine).has_table('topic_analysis')):
+        print(f"ℹ️  Aucun modèle ou résultat existant : mode {mode} remplacé par refit")
+        return 'refit'
+    return mode
+
+def process_topic_extraction(workers=1, mode='assign'):
+    """Traite l'extraction de topics pour tous les avis
+
+    mode :
+      assign  : modèles persistés réutilisés, seuls les nouveaux avis sont lus et assignés
+                (une langue sans modèle est d'abord ajustée)
+      refresh : mise à jour des modèles (partial_fit) sur les nouveaux avis, réassignation complète
+      refit   : modèles réentraînés de zéro sur tout le corpus
+
+    Les modèles à ajuster le sont sur un échantillon borné par langue, en
+    parallèle (workers processus). Les avis sont ensuite lus en flux, bloc par
+    bloc, et leurs topics écrits au fil de l'eau. En refresh et refit, toute la
+    table est réécrite dans une seule transaction et les topics des avis qui
+    ne sont plus analysés sont supprimés avant la validation.
     """
     
-    df = pd.read_sql(query, engine)
-    print(f"📊 Analyse de {len(df)} avis pour extraction de topics")
+    # Connexion à la base (engine partagé du processus)
+    engine = get_engine()
+    mode = resolve_mode(mode, engine)
     
-    # Grouper par langue pour une meilleure analyse
-    results = []
+    counts = count_reviews_by_language(mode, engine)
+    steps = plan_languages(counts, mode)
+    n_reviews = sum(n_new if mode == 'assign' else n_all for n_all, n_new in counts.values())
+    print(f"📊 Analyse de {n_reviews} avis pour extraction de topics (mode {mode})")
     
-    for language in df['detected_language'].unique():
-        if language == 'unknown':
-            continue
-            
-        lang_df = df[df['detected_language'] == language]
-        if len(lang_df) < 10:
-            continue
-            
-        print(f"\n🔍 Analyse pour langue: {language} ({len(lang_df)} avis)")
-        
-        # Extraction de topics
-        topics, dominant_topics, doc_topic_dist = extract_topics_lda(
-            lang_df['clean_text'].tolist(), 
-            n_topics=5, 
-            language=language
-        )
-        
-        if topics is None:
-            continue
-            
-        # Catégoriser les topics  
-        categorized_topics = categorize_topics(topics)
-        
-        # Assigner les topics aux avis
-        for idx, (_, row) in enumerate(lang_df.iterrows()):
-            if idx < len(dominant_topics):
-                topic_id = dominant_topics[idx]
-                topic_scores = doc_topic_dist[idx] if doc_topic_dist is not None else [0] * 5
-                
-                results.append({
-                    'review_id': row['review_id'],
-                    'dominant_topic': topic_id,
-                    'topic_category': categorized_topics[topic_id]['category'],
-                    'topic_keywords': ', '.join(categorized_topics[topic_id]['keywords'][:5]),
-                    'topic_confidence': float(max(topic_scores)),
-                    'language': language
-                })
-        
-        # Afficher les topics trouvés
+    # Apprentissage : fit sur un échantillon de tous les avis, partial_fit sur les nouveaux
+    step_seconds = {}
+    models = {}
+    for new_only, step in ((False, 'fit'), (True, 'partial_fit')):
+        languages = [language for language, language_step in steps.items() if language_step == step]
+        training_corpora = load_training_corpora(languages, new_only)
+        for language, model, done_step, seconds in _model_languages(training_corpora, steps, workers):
+            step_seconds[language] = (done_step, seconds)
+            print(f"\n🔍 Langue {language} : {done_step} en {seconds:.1f}s")
+            if model is not None:
+                models[language] = model
+    for language, step in steps.items():
+        if step == 'assign':
+            models[language] = load_topic_model(language)
+    
+    categorized = {}
+    for language, model in models.items():
+        # Transformation dans ce processus : la LDA répartit son étape E sur les workers cœurs
+        model['lda'].set_params(n_jobs=workers)
+        categorized[language] = (model, categorize_topics(model))
         print(f"📋 Topics identifiés pour {language}:")
-        for topic in categorized_topics:
+        for topic in categorized[language][1]:
             print(f"  Topic {topic['topic_id']} ({topic['category']}): {', '.join(topic['keywords'][:5])}")
     
-    # Sauvegarder les résultats
-    if results:
-        topics_df = pd.DataFrame(results)
-        topics_df.to_sql('topic_analysis', engine, if_exists='replace', index=False)
-        print(f"\n✅ Analyse de topics terminée - {len(topics_df)} avis traités")
+    # Schéma vérifié avant d'ouvrir le curseur en flux, qui lit topic_analysis
+    # (NOT EXISTS) jusqu'à la fin : les écritures par bloc n'émettent aucun DDL
+    prepare_result_table('topic_analysis', engine)
+    # Assignation en flux ; refresh et refit réécrivent toute la table, validée d'un bloc en fin de run
+    extracted_at = pd.Timestamp.now(tz='UTC')
+    full_run = None if mode == 'assign' else FullRunWriter('topic_analysis', engine)
+    write = full_run.write if full_run is not None else lambda topics_df: write_results(topics_df, 'topic_analysis', engine)
+    start = time.perf_counter()
+    with full_run or nullcontext():
+        category_counts, language_counts = assign_topics_streaming(categorized, mode == 'assign', write, extracted_at)
+    assign_seconds = time.perf_counter() - start
+    
+    if step_seconds:
+        print("\n⏱️  Durée d'apprentissage par langue :")
+        for language, (step, seconds) in sorted(step_seconds.items(), key=lambda item: -item[1][1]):
+            print(f"  {language}: {step} en {seconds:.1f}s")
+    if language_counts:
+        n_assigned = sum(language_counts.values())
+        print(f"⏱️  Assignation : {assign_seconds:.1f}s ({n_assigned} avis, {assign_seconds / n_assigned * 1000:.2f} ms/avis)")
+    
+    # Statistiques
+    n_results = sum(category_counts.values())
+    if n_results:
+        n_pruned = full_run.n_pruned if full_run is not None else 0
+        print(f"\n✅ Analyse de topics terminée - {n_results} avis traités ({n_pruned} anciens topics supprimés)")
         
-        # Statistiques
         print("\n📊 Distribution des catégories de topics:")
-        category_dist = topics_df['topic_category'].value_counts()
-        for category, count in category_dist.items():
-            print(f"  {category}: {count} avis ({count/len(topics_df)*100:.1f}%)")
+        for category, count in category_counts.most_common():
+            print(f"  {category}: {count} avis ({count/n_results*100:.1f}%)")
     
+    elif mode == 'assign':
+        print("✅ Aucun nouvel avis à assigner")
     else:
         print("❌ Aucun résultat d'analyse de topics")
 
 if __name__ == "__main__":
-    process_topic_extraction()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Extraction de topics LDA par langue")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Nombre de langues modélisées en parallèle (1 = séquentiel)")
+    parser.add_argument("--mode", choices=MODES, default='assign',
+                        help="assign : modèles persistés ; refresh : partial_fit sur les nouveaux avis ; refit : réentraînement complet")
+    args = parser.parse_args()
+    process_topic_extraction(workers=args.workers, mode=args.mode)
@@ -1,17 +1,13 @@
 import pandas as pd
-from sqlalchemy import create_engine
-import os
-from dotenv import load_dotenv
 import matplotlib.pyplot as plt
 import seaborn as sns
 
-load_dotenv()
+from db import get_engine
 
 def comprehensive_validation():
     """Validation complète de la Phase 2"""
     
-    DB_URL = f"postgresql+psycopg2://{os.getenv('DB_USER')}:{os.getenv('DB_PASSWORD')}@{os.getenv('DB_HOST')}:{os.getenv('DB_PORT')}/{os.getenv('DB_NAME')}"
-    engine = create_engine(DB_URL)
+    engine = get_engine()
     
     print("🔍 VALIDATION COMPLÈTE DE LA PHASE 2")
     print("=" * 50)
@@ -80,7 +76,7 @@ def comprehensive_validation():
             detected_language,
             COUNT(*) as count,
             ROUND((COUNT(*) * 100.0 / SUM(COUNT(*)) OVER())::numeric, 1) as percentage
-        FROM stg_reviews 
+        FROM reviews_enriched 
         GROUP BY detected_language
         ORDER BY count DESC
     """, engine)
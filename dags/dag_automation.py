@@ -4,17 +4,29 @@ from airflow.operators.bash import BashOperator
 from datetime import datetime, timedelta
 import subprocess
 import sys
-from sqlalchemy import create_engine, exc
+from sqlalchemy import exc
 import pandas as pd
 from dotenv import load_dotenv
 import os
 import logging
 
+# Couche d'accès partagée (engine et pool) des scripts de bank_reviews_transform
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "bank_reviews_transform", "scripts"))
+from db import get_engine
+from staging_loader import load_reviews_csv
+# Watermarks de collecte du scraper, avancés seulement une fois les avis chargés
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts"))
+from review_watermarks import ReviewWatermarks
+
 # Configure logging
 logger = logging.getLogger(_name_)
 
 load_dotenv()
 
+# Jour de mise à jour hebdomadaire des modèles de topics (0 = lundi, 6 = dimanche) ;
+# les autres jours, les nouveaux avis sont assignés avec les modèles persistés
+TOPIC_REFRESH_WEEKDAY = int(os.getenv('TOPIC_REFRESH_WEEKDAY', 6))
+
 default_args = {
     'owner': 'soukaina',
     'retries': 3,
@@ -37,8 +49,11 @@ def run_scraper():
         with open(script_path, 'w', encoding='utf-8', newline='\n') as f:
             f.write(content)
         
+        # Sessions de navigateur en parallèle pour tenir dans la fenêtre nocturne
+        n_browsers = os.getenv("SCRAPER_BROWSERS", "4")
+        
         result = subprocess.run(
-            [sys.executable, script_path],
+            [sys.executable, script_path, "--browsers", n_browsers],
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
             text=True,
@@ -59,29 +74,18 @@ def run_scraper():
         logger.error("Unexpected error: %s", str(e))
         raise
 
-def insert_into_postgresql(df_reviews):
-    """Insère les données dans PostgreSQL avec gestion des erreurs."""
+def insert_into_postgresql(csv_path):
+    """Charge le CSV dans staging_reviews (COPY, une transaction) avec gestion des erreurs."""
     try:
-        db_user = os.getenv("DB_USER")
-        db_password = os.getenv("DB_PASSWORD")
-        db_host = os.getenv("DB_HOST")
-        db_port = os.getenv("DB_PORT")
-        db_name = os.getenv("DB_NAME")
-        
-        engine = create_engine(
-            f"postgresql+psycopg2://{db_user}:{db_password}@{db_host}:{db_port}/{db_name}",
-            pool_pre_ping=True
-        )
-        
-        with engine.connect() as conn:
-            df_reviews.to_sql(
-                "staging_reviews",
-                conn,
-                if_exists='append',
-                index=False,
-                method='multi'
-            )
-        logger.info("Data inserted successfully")
+        batch_id, n_rows = load_reviews_csv(csv_path, get_engine())
+        if n_rows == 0:
+            # Le scraper ne collecte que les avis postérieurs au watermark de chaque agence
+            logger.info("Aucun nouvel avis depuis le dernier run")
+        logger.info("Data inserted successfully (%d rows, batch %s)", n_rows, batch_id)
+        # Les avis sont en base : le prochain crawl peut s'arrêter à ces avis.
+        # Même répertoire de travail que le scraper (lancé par run_scraper).
+        n_agencies = ReviewWatermarks().promote_pending()
+        logger.info("Watermarks avancés pour %d agences", n_agencies)
         
     except exc.SQLAlchemyError as e:
         logger.error("Database error: %s", str(e))
@@ -91,7 +95,7 @@ def insert_into_postgresql(df_reviews):
         raise
 
 def insert_reviews(**context):
-    """Lit le CSV et insère les données, vérifiant d'abord son existence."""
+    """Charge le CSV du scraper, vérifiant d'abord son existence."""
     try:
         data_dir = "/mnt/c/Users/hp/Downloads/bank_reviews_project"
         csv_path = os.path.join(data_dir, "data", "bank_reviews.csv")
@@ -99,13 +103,7 @@ def insert_reviews(**context):
         if not os.path.exists(csv_path):
             raise FileNotFoundError(f"CSV file not found at {csv_path}")
         
-        df = pd.read_csv(csv_path)
-        
-        # Validation basique des données
-        if df.empty:
-            logger.warning("Le fichier CSV est vide")
-        
-        insert_into_postgresql(df)
+        insert_into_postgresql(csv_path)
         
     except pd.errors.EmptyDataError:
         logger.error("Le fichier CSV est vide ou corrompu")
@@ -118,12 +116,14 @@ def run_complete_transformation():
     """Transformation complète avec sentiment + topics (Phase 2)"""
     try:
         base_dir = "/mnt/c/Users/hp/Downloads/bank_reviews_project/bank_reviews_transform"
+        topic_mode = "refresh" if datetime.now().weekday() == TOPIC_REFRESH_WEEKDAY else "assign"
         
         commands = [
             f"cd {base_dir}",
             "source ~/bank_reviews_project/dbt_env/bin/activate",
-            "python scripts/sentiment_analysis.py",
-            "python scripts/topic_extraction.py"
+            "dbt run --select stg_reviews",  # Intègre les avis du jour avant le scoring
+            # Sentiment puis topics dans un même processus (un seul pool de connexions)
+            f"python scripts/run_nlp_pipeline.py --workers {os.cpu_count() or 1} --incremental --topic-mode {topic_mode}"
         ]
         
         result = subprocess.run(" && ".join(commands), shell=True, check=True)
@@ -144,10 +144,12 @@ def create_star_schema():
         commands = [
             f"cd {base_dir}",
             "source ~/bank_reviews_project/dbt_env/bin/activate",
-            "dbt run --models tag:dimensions",  # Exécute d'abord les dimensions
-            "dbt test --models tag:dimensions",  # Teste les dimensions
-            "dbt run --models tag:facts",       # Puis les faits
-            "dbt test --models tag:facts"       # Teste les faits
+            "dbt run --select reviews_enriched",  # Source de fact_reviews, requise par le macro de partitions
+            "dbt run-operation create_fact_reviews_partitions",  # Partitions mensuelles de fact_reviews
+            "dbt run --models tag:facts --exclude reviews_enriched",  # Merge incrémental des faits (delta du jour)
+            "dbt test --models tag:facts",      # Teste les faits
+            "dbt run --models tag:dimensions",  # Puis les dimensions, calculées depuis stg_reviews et reviews_enriched
+            "dbt test --models tag:dimensions"  # Teste les dimensions
         ]
         
         result = subprocess.run(" && ".join(commands), shell=True, check=True)
@@ -0,0 +1,99 @@
+"""Normalisation des dates d'avis Google Maps en date réelle (review_day)
+
+Google affiche des dates relatives ('il y a 2 mois', '3 weeks ago',
+'قبل شهرين') : elles sont converties une seule fois, à l'ingestion, en une
+date ancrée sur l'horodatage de collecte de l'avis. Une date déjà au format
+ISO (AAAA-MM-JJ) est reprise telle quelle ; une date non reconnue donne None.
+"""
+import re
+from datetime import date
+
+import pandas as pd
+
+ISO_DATE_RE = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+
+# Chiffres arabes orientaux -> chiffres ASCII
+ARABIC_DIGITS = str.maketrans('٠١٢٣٤٥٦٧٨٩', '0123456789')
+
+# Unités exprimées en paramètres de pd.DateOffset
+FRENCH_UNITS = {
+    'minute': 'minutes', 'heure': 'hours', 'jour': 'days', 'semaine': 'weeks',
+    'mois': 'months', 'an': 'years', 'année': 'years',
+}
+ENGLISH_UNITS = {
+    'minute': 'minutes', 'hour': 'hours', 'day': 'days', 'week': 'weeks',
+    'month': 'months', 'year': 'years',
+}
+# Mot arabe -> (unité, quantité implicite) : singulier 1, duel 2, pluriel sans quantité
+ARABIC_UNITS = {
+    'دقيقة': ('minutes', 1), 'دقيقتين': ('minutes', 2), 'دقائق': ('minutes', None),
+    'ساعة': ('hours', 1), 'ساعتين': ('hours', 2), 'ساعات': ('hours', None),
+    'يوم': ('days', 1), 'يومين': ('days', 2), 'أيام': ('days', None),
+    'أسبوع': ('weeks', 1), 'أسبوعين': ('weeks', 2), 'أسابيع': ('weeks', None),
+    'شهر': ('months', 1), 'شهرين': ('months', 2), 'أشهر': ('months', None), 'شهور': ('months', None),
+    'سنة': ('years', 1), 'سنتين': ('years', 2), 'سنوات': ('years', None),
+    'عام': ('years', 1), 'عامين': ('years', 2), 'أعوام': ('years', None),
+}
+# Dates relatives sans quantité
+NAMED_DAYS = {
+    "aujourd'hui": 0, 'today': 0, 'اليوم': 0,
+    'hier': 1, 'yesterday': 1, 'أمس': 1, 'البارحة': 1,
+}
+
+FRENCH_RE = re.compile(r"il y a\s+(\d+|une?)\s+(minute|heure|jour|semaine|mois|année|an)s?\b")
+ENGLISH_RE = re.compile(r"\b(\d+|an?)\s+(minute|hour|day|week|month|year)s?\s+ago\b")
+ARABIC_RE = re.compile(r"(?:قبل|منذ)\s+(?:(\d+)\s+)?(\S+)")
+
+def relative_offset(date_text):
+    """Décalage exprimé par une date relative, ou None si le texte n'en est pas une"""
+    text = str(date_text).strip().lower().translate(ARABIC_DIGITS)
+
+    if text in NAMED_DAYS:
+        return pd.DateOffset(days=NAMED_DAYS[text])
+
+    for pattern, units in ((FRENCH_RE, FRENCH_UNITS), (ENGLISH_RE, ENGLISH_UNITS)):
+        match = pattern.search(text)
+        if match:
+            quantity, unit = match.groups()
+            return pd.DateOffset(**{units[unit]: int(quantity) if quantity.isdigit() else 1})
+
+    match = ARABIC_RE.search(text)
+    if match and match.group(2) in ARABIC_UNITS:
+        unit, implied_quantity = ARABIC_UNITS[match.group(2)]
+        quantity = int(match.group(1)) if match.group(1) else implied_quantity
+        if quantity is not None:
+            return pd.DateOffset(**{unit: quantity})
+    return None
+
+def parse_review_date(date_text, anchor):
+    """Date réelle d'un avis : date ISO reprise telle quelle, date relative résolue depuis anchor"""
+    if date_text is None or date_text != date_text:
+        return None
+    if ISO_DATE_RE.match(str(date_text)):
+        try:
+            return date.fromisoformat(str(date_text))
+        except ValueError:
+            return None
+    offset = relative_offset(date_text)
+    return (anchor - offset).date() if offset is not None else None
+
+def parse_review_days(date_texts, anchors):
+    """review_day de chaque avis (listes alignées)
+
+    Chaque texte distinct n'est analysé qu'une fois : un bloc de CSV ne
+    contient que quelques dizaines de libellés différents.
+    """
+    offsets = {}
+    review_days = []
+    for date_text, anchor in zip(date_texts, anchors):
+        if date_text is None or date_text != date_text or anchor is None or anchor is pd.NaT:
+            review_days.append(None)
+            continue
+        if ISO_DATE_RE.match(str(date_text)):
+            review_days.append(parse_review_date(date_text, anchor))
+            continue
+        if date_text not in offsets:
+            offsets[date_text] = relative_offset(date_text)
+        offset = offsets[date_text]
+        review_days.append((anchor - offset).date() if offset is not None else None)
+    return review_days
@@ -0,0 +1,151 @@
+"""Chargement du CSV du scraper dans staging_reviews par COPY FROM STDIN
+
+Le fichier est lu par blocs bornés (jamais entièrement en mémoire), chaque
+bloc est enrichi (clé de l'avis, date réelle de l'avis, horodatage, lot)
+puis envoyé au serveur en flux CSV. Tout le chargement tient dans une seule transaction : les lignes
+d'un lot déjà chargé (même batch_id) sont supprimées avant la copie, un
+nouvel essai de la tâche remplace donc le lot au lieu de le dupliquer.
+"""
+import hashlib
+import io
+import logging
+import os
+
+import pandas as pd
+
+from review_dates import parse_review_days
+
+logger = logging.getLogger(__name__)
+
+# Lignes lues et envoyées par COPY à chaque bloc
+COPY_CHUNK_ROWS = 50_000
+HASH_BLOCK_BYTES = 1 << 20
+
+# Colonnes du CSV du scraper renommées selon le schéma de staging_reviews
+STAGING_COLUMN_NAMES = {'date': 'review_date', 'text': 'review_text'}
+
+STAGING_COLUMNS = [
+    'bank', 'agency', 'url', 'location', 'author', 'rating',
+    'review_date', 'review_text', 'review_key', 'ingested_at', 'batch_id',
+    'scraped_at', 'review_day',
+]
+
+CREATE_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS staging_reviews (
+    bank TEXT, agency TEXT, url TEXT, location TEXT, author TEXT,
+    rating DOUBLE PRECISION, review_date TEXT, review_text TEXT,
+    review_key TEXT, ingested_at TIMESTAMPTZ, batch_id TEXT,
+    scraped_at TIMESTAMPTZ, review_day DATE
+)
+"""
+
+# Tables créées avant ces colonnes (to_sql)
+ADD_COLUMNS_SQL = [
+    "ALTER TABLE staging_reviews ADD COLUMN IF NOT EXISTS review_key TEXT",
+    "ALTER TABLE staging_reviews ADD COLUMN IF NOT EXISTS ingested_at TIMESTAMPTZ",
+    "ALTER TABLE staging_reviews ADD COLUMN IF NOT EXISTS batch_id TEXT",
+    "ALTER TABLE staging_reviews ADD COLUMN IF NOT EXISTS scraped_at TIMESTAMPTZ",
+    "ALTER TABLE staging_reviews ADD COLUMN IF NOT EXISTS review_day DATE",
+]
+
+INDEXES_SQL = [
+    "CREATE INDEX IF NOT EXISTS staging_reviews_review_key_idx ON staging_reviews (review_key)",
+    "CREATE INDEX IF NOT EXISTS staging_reviews_ingested_at_idx ON staging_reviews (ingested_at)",
+    "CREATE INDEX IF NOT EXISTS staging_reviews_batch_id_idx ON staging_reviews (batch_id)",
+]
+
+DELETE_BATCH_SQL = "DELETE FROM staging_reviews WHERE batch_id = %s"
+COPY_SQL = f"COPY staging_reviews ({', '.join(STAGING_COLUMNS)}) FROM STDIN WITH (FORMAT csv)"
+
+def add_review_key(df_reviews):
+    """Ajoute la clé stable de l'avis, dérivée de son contenu.
+
+    md5(bank-agency-author-LOWER(TRIM(review_text))) : même formule que la macro
+    dbt review_key(), utilisée pour les lignes chargées avant cette colonne.
+    """
+    df_reviews = df_reviews.rename(columns=STAGING_COLUMN_NAMES)
+    content = (
+        df_reviews['bank'].fillna('').astype(str) + '-'
+        + df_reviews['agency'].fillna('').astype(str) + '-'
+        + df_reviews['author'].fillna('').astype(str) + '-'
+        + df_reviews['review_text'].fillna('').astype(str).str.strip(' ').str.lower()
+    )
+    df_reviews['review_key'] = content.map(lambda value: hashlib.md5(value.encode('utf-8')).hexdigest())
+    return df_reviews
+
+def file_batch_id(csv_path):
+    """Identifiant de lot : sha256 du contenu du fichier (même fichier, même lot)"""
+    digest = hashlib.sha256()
+    with open(csv_path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_BYTES), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def file_scraped_at(csv_path):
+    """Ancre des dates relatives d'un CSV sans colonne scraped_at : fin d'écriture du fichier"""
+    return pd.Timestamp(os.path.getmtime(csv_path), unit='s', tz='UTC')
+
+def prepare_chunk(chunk, ingested_at, batch_id, default_scraped_at=None):
+    """Bloc du CSV au schéma de staging_reviews, dans l'ordre des colonnes de COPY"""
+    chunk = add_review_key(chunk)
+    # Note non numérique ('Non spécifié') : NULL, écartée par stg_reviews comme avant
+    chunk['rating'] = pd.to_numeric(chunk['rating'], errors='coerce')
+    chunk['ingested_at'] = ingested_at.isoformat()
+    chunk['batch_id'] = batch_id
+
+    # Horodatage de collecte de chaque avis (colonne du scraper, sinon celui du fichier)
+    default_scraped_at = default_scraped_at or ingested_at
+    if 'scraped_at' in chunk:
+        scraped_at = pd.to_datetime(chunk['scraped_at'], utc=True, errors='coerce').fillna(default_scraped_at)
+    else:
+        scraped_at = pd.Series(default_scraped_at, index=chunk.index)
+    chunk['scraped_at'] = scraped_at
+    # Date réelle de l'avis, calculée une seule fois ici
+    chunk['review_day'] = parse_review_days(chunk['review_date'].tolist(), scraped_at.tolist())
+    return chunk[STAGING_COLUMNS]
+
+def copy_chunk(cursor, chunk):
+    """Envoie un bloc au serveur en CSV (valeurs manquantes -> NULL)"""
+    buffer = io.StringIO()
+    chunk.to_csv(buffer, index=False, header=False)
+    buffer.seek(0)
+    cursor.copy_expert(COPY_SQL, buffer)
+
+def load_reviews_csv(csv_path, engine, batch_id=None, chunk_rows=COPY_CHUNK_ROWS):
+    """Charge le CSV du scraper dans staging_reviews en une transaction
+
+    Retourne (batch_id, nombre de lignes chargées).
+    """
+    batch_id = batch_id or file_batch_id(csv_path)
+    # Horodatage de chargement : high-water mark du modèle incrémental stg_reviews
+    ingested_at = pd.Timestamp.now(tz='UTC')
+    n_rows = 0
+
+    conn = engine.raw_connection()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(CREATE_TABLE_SQL)
+            for statement in ADD_COLUMNS_SQL:
+                cursor.execute(statement)
+            cursor.execute(DELETE_BATCH_SQL, (batch_id,))
+            if cursor.rowcount:
+                logger.info("Lot %s déjà chargé : %d lignes remplacées", batch_id[:12], cursor.rowcount)
+
+            default_scraped_at = file_scraped_at(csv_path)
+            # Texte brut : un auteur « NA » ou une note « 4 » arrivent tels qu'écrits par le scraper
+            # (ni NaN ni float), comme la clé review_key calculée par dbt sur les mêmes chaînes
+            for chunk in pd.read_csv(csv_path, chunksize=chunk_rows, dtype=str, keep_default_na=False):
+                copy_chunk(cursor, prepare_chunk(chunk, ingested_at, batch_id, default_scraped_at))
+                n_rows += len(chunk)
+
+            for statement in INDEXES_SQL:
+                cursor.execute(statement)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+    logger.info("Lot %s : %d lignes copiées dans staging_reviews", batch_id[:12], n_rows)
+    return batch_id, n_rows
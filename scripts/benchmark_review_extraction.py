@@ -0,0 +1,72 @@
+"""Benchmark : extraction des avis élément par élément vs extraction groupée
+
+Lance le serveur de substitution (fixtures HTML enregistrées), charge les
+fiches d'agence dans Chrome headless puis compare les deux chemins
+d'extraction sur les mêmes pages.
+
+Usage : python scripts/benchmark_review_extraction.py [--agencies 5]
+"""
+import argparse
+import threading
+import time
+
+from selenium.webdriver.common.by import By
+
+from maps_standin_server import make_server
+from reviews_collection import (
+    create_driver,
+    extract_reviews,
+    extract_reviews_per_element,
+    open_reviews_panel,
+    scroll_reviews,
+)
+
+def load_agency_page(driver, url):
+    """Ouvre une fiche, l'onglet des avis et charge tous les avis"""
+    driver.get(url)
+    open_reviews_panel(driver)
+    scroll_reviews(driver)
+    return len(driver.find_elements(By.CLASS_NAME, "jftiEf"))
+
+def time_extraction(driver, extract, url, row):
+    """Charge la page puis chronomètre uniquement l'extraction"""
+    load_agency_page(driver, url)
+    start = time.perf_counter()
+    reviews = extract(driver, row, "Adresse de test")
+    return reviews, time.perf_counter() - start
+
+def run_benchmark(n_agencies):
+    server = make_server(port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    driver = create_driver()
+
+    per_element_seconds = bulk_seconds = 0.0
+    n_reviews = 0
+    try:
+        for i in range(n_agencies):
+            url = f"{base_url}/maps/place/agence-benchmark-{i}"
+            row = {"bank": "Benchmark", "agency": f"Agence {i}", "url": url}
+
+            per_element, seconds = time_extraction(driver, extract_reviews_per_element, url, row)
+            per_element_seconds += seconds
+            bulk, seconds = time_extraction(driver, extract_reviews, url, row)
+            bulk_seconds += seconds
+
+            assert bulk == per_element, f"Résultats différents pour {url}"
+            n_reviews += len(bulk)
+    finally:
+        driver.quit()
+        server.shutdown()
+
+    print(f"\n📊 Extraction de {n_reviews} avis sur {n_agencies} fiches")
+    print(f"  Élément par élément : {per_element_seconds:.2f}s ({n_reviews / per_element_seconds:,.0f} avis/s)")
+    print(f"  Groupée             : {bulk_seconds:.2f}s ({n_reviews / bulk_seconds:,.0f} avis/s)")
+    print(f"  Accélération        : x{per_element_seconds / bulk_seconds:.1f}")
+    print("✅ Avis identiques")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--agencies", type=int, default=5)
+    args = parser.parse_args()
+    run_benchmark(args.agencies)
@@ -0,0 +1,113 @@
+"""Benchmark : chargement de staging_reviews par to_sql(method='multi') vs COPY
+
+Génère des CSV synthétiques au format du scraper (100k et 1M lignes par
+défaut) puis mesure, pour chaque taille :
+  1. l'ancien chemin : lecture complète du CSV + to_sql(method='multi')
+  2. staging_loader.load_reviews_csv : lecture par blocs + COPY FROM STDIN
+
+⚠️  La table staging_reviews est recréée : à lancer uniquement sur une base
+de benchmark.
+
+Usage (depuis la racine du projet) :
+    python scripts/benchmark_staging_loader.py --confirm-database bench_reviews
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+from dotenv import load_dotenv
+from sqlalchemy import text
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(PROJECT_DIR, "dags"))
+sys.path.insert(0, os.path.join(PROJECT_DIR, "bank_reviews_transform", "scripts"))
+from db import get_engine
+from staging_loader import add_review_key, load_reviews_csv
+
+load_dotenv()
+
+TEXTS = [
+    "Très bon accueil, le conseiller était rapide et efficace.",
+    "Attente beaucoup trop longue, seulement deux guichets ouverts.",
+    "Personnel aimable mais les frais de tenue de compte sont trop élevés.",
+    "Great staff, the branch is clean and the service is quick.",
+    "الخدمة جيدة والموظفون محترمون",
+]
+
+def write_synthetic_csv(path, n_rows):
+    """CSV au schéma de sortie du scraper (bank, agency, url, location, author, rating, date, text)"""
+    ids = np.arange(n_rows)
+    pd.DataFrame({
+        "bank": "Banque " + pd.Series(ids % 8).astype(str),
+        "agency": "Agence " + pd.Series(ids % 2000).astype(str),
+        "url": "https://maps.example/agence/" + pd.Series(ids % 2000).astype(str),
+        "location": "Ville " + pd.Series(ids % 10).astype(str),
+        "author": "Auteur " + pd.Series(ids).astype(str),
+        "rating": 1 + ids % 5,
+        "date": "il y a 2 jours",
+        "text": pd.Series(TEXTS).take(ids % len(TEXTS)).to_numpy() + " Avis " + pd.Series(ids).astype(str),
+    }).to_csv(path, index=False, encoding="utf-8")
+
+def reset_staging_table(engine):
+    with engine.begin() as conn:
+        conn.execute(text("DROP TABLE IF EXISTS staging_reviews CASCADE"))
+
+def load_with_to_sql(csv_path, engine):
+    """Ancien chemin de insert_into_postgresql : DataFrame complet + INSERT multi-lignes"""
+    df_reviews = add_review_key(pd.read_csv(csv_path))
+    df_reviews = df_reviews.assign(ingested_at=pd.Timestamp.now(tz='UTC'))
+    with engine.begin() as conn:
+        df_reviews.to_sql("staging_reviews", conn, if_exists='append', index=False, method='multi')
+    return len(df_reviews)
+
+def load_with_copy(csv_path, engine):
+    return load_reviews_csv(csv_path, engine)[1]
+
+def time_loader(load, csv_path, engine):
+    reset_staging_table(engine)
+    start = time.perf_counter()
+    n_rows = load(csv_path, engine)
+    seconds = time.perf_counter() - start
+    with engine.connect() as conn:
+        loaded = conn.execute(text("SELECT COUNT(*) FROM staging_reviews")).scalar()
+    assert loaded == n_rows, f"{loaded} lignes en base pour {n_rows} lues"
+    return seconds
+
+def run_benchmark(sizes):
+    engine = get_engine()
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for n_rows in sizes:
+            csv_path = os.path.join(tmp_dir, f"bank_reviews_{n_rows}.csv")
+            print(f"🧪 Génération d'un CSV de {n_rows:,} avis")
+            write_synthetic_csv(csv_path, n_rows)
+
+            to_sql_seconds = time_loader(load_with_to_sql, csv_path, engine)
+            copy_seconds = time_loader(load_with_copy, csv_path, engine)
+
+            # Idempotence : recharger le même fichier remplace le lot
+            load_with_copy(csv_path, engine)
+            with engine.connect() as conn:
+                assert conn.execute(text("SELECT COUNT(*) FROM staging_reviews")).scalar() == n_rows
+            results.append((n_rows, to_sql_seconds, copy_seconds))
+
+    print("\n📊 Chargement de staging_reviews")
+    for n_rows, to_sql_seconds, copy_seconds in results:
+        print(f"  {n_rows:>9,} lignes | to_sql multi : {n_rows / to_sql_seconds:>9,.0f} lignes/s "
+              f"| COPY : {n_rows / copy_seconds:>9,.0f} lignes/s | x{to_sql_seconds / copy_seconds:.1f}")
+    print("✅ Rechargement d'un même fichier sans doublon")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark to_sql vs COPY pour staging_reviews")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--confirm-database", required=True,
+                        help="Nom de la base de benchmark (doit correspondre à DB_NAME)")
+    args = parser.parse_args()
+
+    if args.confirm_database != os.getenv('DB_NAME'):
+        raise SystemExit(f"❌ DB_NAME={os.getenv('DB_NAME')} ne correspond pas à --confirm-database")
+    run_benchmark(args.sizes)
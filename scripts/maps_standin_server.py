@@ -0,0 +1,81 @@
+"""Serveur local de substitution à Google Maps pour tester le scraper hors ligne
+
+Sert les pages enregistrées de scripts/fixtures/maps :
+  /maps/search/<requête>  -> search.html (liens a.hfpxzc vers les fiches)
+  /maps/place/<agence>    -> place.html (adresse, onglet et cartes d'avis)
+  /maps/preview/review/listentitiesreviews?pb=...!1i<offset>...
+                          -> listentitiesreviews_page_<n>.txt (réponses enregistrées,
+                             10 avis par page ; réponse vide au-delà)
+
+Usage :
+    python scripts/maps_standin_server.py --port 8765
+    python scripts/reviews_collection.py --browsers 4 --base-url http://localhost:8765
+    python scripts/reviews_collection.py --engine http --base-url http://localhost:8765
+"""
+import argparse
+import os
+import re
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "maps")
+
+REVIEWS_PATH = "/maps/preview/review/listentitiesreviews"
+REVIEWS_PAGE_SIZE = 10
+REVIEWS_OFFSET_RE = re.compile(r"!1i(\d+)")
+EMPTY_REVIEWS_RESPONSE = b")]}'\n[null,null,null]"
+
+ROUTES = {
+    "/maps/search/": "search.html",
+    "/maps/place/": "place.html",
+}
+
+class MapsStandinHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.startswith(REVIEWS_PATH):
+            self.send_reviews_page()
+            return
+        for prefix, fixture in ROUTES.items():
+            if self.path.startswith(prefix):
+                self.send_fixture(fixture, "text/html; charset=utf-8")
+                return
+        self.send_error(404, "Aucune fixture pour ce chemin")
+
+    def send_reviews_page(self):
+        """Page de réponse enregistrée correspondant à l'offset demandé"""
+        offset_match = REVIEWS_OFFSET_RE.search(self.path)
+        page = int(offset_match.group(1)) // REVIEWS_PAGE_SIZE if offset_match else 0
+        fixture = f"listentitiesreviews_page_{page}.txt"
+        if os.path.exists(os.path.join(FIXTURES_DIR, fixture)):
+            self.send_fixture(fixture, "application/json; charset=utf-8")
+        else:
+            self.send_body(EMPTY_REVIEWS_RESPONSE, "application/json; charset=utf-8")
+
+    def send_fixture(self, fixture, content_type):
+        with open(os.path.join(FIXTURES_DIR, fixture), "rb") as f:
+            self.send_body(f.read(), content_type)
+
+    def send_body(self, body, content_type):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def make_server(port=8765, host="127.0.0.1"):
+    """Crée le serveur (port=0 pour un port libre, utile dans les benchmarks)"""
+    return ThreadingHTTPServer((host, port), MapsStandinHandler)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serveur local de pages Google Maps enregistrées")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    server = make_server(args.port)
+    print(f"🗺️  Serveur de substitution sur http://127.0.0.1:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
@@ -0,0 +1,133 @@
+"""Watermarks de collecte : avis les plus récents déjà vus, par agence
+
+Conservés entre deux runs dans un fichier JSONL (une ligne par agence). Avec
+les avis triés du plus récent au plus ancien, le scraper s'arrête dès qu'il
+rencontre un avis connu : le crawl quotidien ne collecte que les nouveaux avis.
+
+Le crawl n'avance pas ce fichier : ses mises à jour vont dans un fichier
+« en attente » (ajout seul, la dernière ligne d'une agence fait foi), promu
+seulement après le chargement réussi du CSV dans staging_reviews. Si le
+chargement échoue, le run suivant recollecte les mêmes avis.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+
+WATERMARKS_FILE = "review_watermarks.jsonl"
+PENDING_WATERMARKS_FILE = "review_watermarks.pending.jsonl"
+
+# Empreintes conservées par agence. Triés par date, les avis arrivent par lots
+# de 10 par scroll et le premier lot contenant un avis connu arrête la collecte.
+# Si le tri échoue, l'ordre est celui de la pertinence : les avis connus sont
+# répartis sur toute la liste et chacun doit figurer dans le watermark pour ne
+# pas être recollecté. La taille couvre donc tout ce qu'un passage peut charger
+# (50 scrolls Selenium ou 50 pages HTTP de 10 avis).
+WATERMARK_SIZE = 500
+
+def review_fingerprint(author, text):
+    """Empreinte d'un avis : md5 de l'auteur et du texte normalisé"""
+    content = f"{(author or '').strip()}-{(text or '').strip().lower()}"
+    return hashlib.md5(content.encode("utf-8")).hexdigest()
+
+def split_new_reviews(agency_reviews, known_fingerprints, sorted_newest=True):
+    """Avis absents du watermark ; s'arrête au premier avis connu si la liste
+    est triée du plus récent au plus ancien (tout ce qui suit est déjà collecté).
+
+    Retourne (nouveaux avis, True si un avis connu a été atteint).
+    """
+    new_reviews = []
+    for review in agency_reviews:
+        if review_fingerprint(review["author"], review["text"]) in known_fingerprints:
+            if sorted_newest:
+                return new_reviews, True
+            continue
+        new_reviews.append(review)
+    return new_reviews, False
+
+def _read_entries(path):
+    """Dernière ligne de chaque agence d'un fichier de watermarks"""
+    entries = {}
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    entries[entry["url"]] = entry
+    return entries
+
+def _write_entries(path, entries):
+    """Réécrit un fichier de watermarks, une ligne par agence (remplacement atomique)"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        for entry in entries.values():
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+class ReviewWatermarks:
+    """Watermarks de toutes les agences, partagés par les sessions du pool
+
+    known_fingerprints ne lit que les watermarks promus (avis chargés en base) ;
+    update n'écrit que dans le fichier en attente.
+    """
+
+    def __init__(self, path=WATERMARKS_FILE, pending_path=PENDING_WATERMARKS_FILE):
+        self.path = path
+        self.pending_path = pending_path
+        self.lock = threading.Lock()
+        self.entries = _read_entries(path)
+        self.pending = _read_entries(pending_path)
+
+    def known_fingerprints(self, url):
+        with self.lock:
+            entry = self.entries.get(url)
+            return frozenset(entry["fingerprints"]) if entry else frozenset()
+
+    def update(self, url, new_reviews):
+        """Place les nouveaux avis (du plus récent au plus ancien) en tête du watermark en attente"""
+        if not new_reviews:
+            return
+        with self.lock:
+            previous = self.entries.get(url, {}).get("fingerprints", [])
+            fingerprints = [review_fingerprint(r["author"], r["text"]) for r in new_reviews]
+            entry = {
+                "url": url,
+                "fingerprints": list(dict.fromkeys(fingerprints + previous))[:WATERMARK_SIZE],
+                "updated_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            }
+            self.pending[url] = entry
+            with open(self.pending_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+    def discard_pending(self):
+        """Abandonne les mises à jour d'un crawl précédent dont le CSV n'a pas été chargé"""
+        with self.lock:
+            self.pending = {}
+            if os.path.exists(self.pending_path):
+                os.remove(self.pending_path)
+
+    def compact(self):
+        """Réécrit le fichier en attente avec une seule ligne par agence"""
+        with self.lock:
+            if self.pending:
+                _write_entries(self.pending_path, self.pending)
+
+    def promote_pending(self):
+        """Intègre les mises à jour en attente aux watermarks, une fois les avis chargés en base.
+
+        Retourne le nombre d'agences dont le watermark a avancé.
+        """
+        with self.lock:
+            if not self.pending:
+                return 0
+            self.entries.update(self.pending)
+            _write_entries(self.path, self.entries)
+            n_promoted = len(self.pending)
+            self.pending = {}
+            os.remove(self.pending_path)
+            return n_promoted
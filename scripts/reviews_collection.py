@@ -1,372 +1,876 @@
+import os
+import re
+import json
+import glob
+import queue
+import shutil
+import argparse
+import threading
 import time
 import pandas as pd
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
-from selenium.common.exceptions import NoSuchElementException
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-
-def main():
-    # Configuration du navigateur headless
+from selenium.common.exceptions import (
+    ElementClickInterceptedException,
+    ElementNotInteractableException,
+    NoSuchElementException,
+    WebDriverException,
+)
+from urllib3.exceptions import HTTPError as Urllib3Error
+from review_watermarks import ReviewWatermarks, review_fingerprint, split_new_reviews
+from scraper_waits import (
+    TIMINGS,
+    TimingBudget,
+    wait_for_count_increase,
+    wait_for_page,
+    wait_for_staleness,
+    wait_until,
+)
+
+# Google Maps, ou un serveur local de substitution pour les tests hors ligne
+DEFAULT_BASE_URL = "https://www.google.com"
+
+# Pool de navigateurs : nombre de sessions et tentatives par élément après un crash
+DEFAULT_BROWSERS = 1
+MAX_ITEM_ATTEMPTS = 3
+
+# Moteur de collecte des avis : navigateur, ou requêtes HTTP directes (reviews_http_fetcher)
+ENGINES = ("selenium", "http")
+DEFAULT_ENGINE = "selenium"
+
+# Délais maximaux des attentes conditionnelles (secondes) ; une page rapide rend la main plus tôt
+PAGE_LOAD_TIMEOUT = 10
+SEARCH_SCROLL_TIMEOUT = 3
+REVIEW_SCROLL_TIMEOUT = 4
+EXPAND_TIMEOUT = 1
+# Nombre de scrolls consécutifs sans nouveau résultat avant d'arrêter (comme
+# avant les attentes conditionnelles : Google Maps charge parfois un lot après
+# plusieurs scrolls vides). Chaque scroll vide coûte au plus son délai d'attente,
+# le tout restant borné par le budget de temps de la recherche / de l'agence.
+MAX_STAGNANT_SCROLLS = 7
+# Temps maximal passé sur une recherche / une agence
+SEARCH_TIME_BUDGET = 60
+AGENCY_TIME_BUDGET = 180
+
+# Sorties du scraper
+URLS_CSV = "bank_agency_urls.csv"
+REVIEWS_CSV = "bank_reviews.csv"
+
+# Points de reprise d'un crawl en cours : fichiers CSV en ajout seul + manifeste
+# des agences terminées. Le dossier est supprimé une fois le crawl terminé sans
+# recherche ni agence abandonnée ; sinon le run suivant reprend les éléments manquants.
+CHECKPOINT_DIR = "reviews_checkpoint"
+CHECKPOINT_URLS_CSV = os.path.join(CHECKPOINT_DIR, "agency_urls.csv")
+MANIFEST_FILE = os.path.join(CHECKPOINT_DIR, "manifest.jsonl")
+PART_FILE_PATTERN = os.path.join(CHECKPOINT_DIR, "reviews_part_{:05d}.csv")
+MAX_ROWS_PER_PART = 5000
+
+# Tri des avis du plus récent au plus ancien : le scroll s'arrête au premier avis déjà collecté
+SORT_BUTTON_SELECTOR = "button[aria-label*='Trier' i], button[aria-label*='Sort' i], button[data-value='Trier']"
+NEWEST_SORT_LABELS = ("plus récents", "newest")
+
+# scraped_at : ancre des dates relatives ('il y a 2 mois'), résolues à l'ingestion
+REVIEW_COLUMNS = ["bank", "agency", "url", "location", "author", "rating", "date", "text", "scraped_at"]
+
+# Recherche Google Maps : banque + ville
+SEARCH_QUERIES = [
+    # Attijariwafa Bank
+    "Attijariwafa bank Casablanca",
+    "Attijariwafa bank Rabat",
+    "Attijariwafa bank Marrakech",
+    "Attijariwafa bank Fès",
+    "Attijariwafa bank Tanger",
+    "Attijariwafa bank Agadir",
+    "Attijariwafa bank Meknès",
+    "Attijariwafa bank Oujda",
+    "Attijariwafa bank Kénitra",
+    "Attijariwafa bank Laâyoune",
+
+    # Banque Populaire
+    "Banque Populaire Casablanca",
+    "Banque Populaire Rabat",
+    "Banque Populaire Marrakech",
+    "Banque Populaire Fès",
+    "Banque Populaire Tanger",
+    "Banque Populaire Agadir",
+    "Banque Populaire Meknès",
+    "Banque Populaire Oujda",
+    "Banque Populaire Kénitra",
+    "Banque Populaire Laâyoune",
+
+    # CIH Bank
+    "CIH Bank Casablanca",
+    "CIH Bank Rabat",
+    "CIH Bank Marrakech",
+    "CIH Bank Fès",
+    "CIH Bank Tanger",
+    "CIH Bank Agadir",
+    "CIH Bank Meknès",
+    "CIH Bank Oujda",
+    "CIH Bank Kénitra",
+    "CIH Bank Laâyoune",
+
+    # BMCE / Bank of Africa
+    "BMCE Casablanca",
+    "BMCE Rabat",
+    "BMCE Marrakech",
+    "BMCE Fès",
+    "BMCE Tanger",
+    "BMCE Agadir",
+    "BMCE Meknès",
+    "BMCE Oujda",
+    "BMCE Kénitra",
+    "BMCE Laâyoune",
+
+    # Crédit du Maroc
+    "Crédit du Maroc Casablanca",
+    "Crédit du Maroc Rabat",
+    "Crédit du Maroc Marrakech",
+    "Crédit du Maroc Fès",
+    "Crédit du Maroc Tanger",
+    "Crédit du Maroc Agadir",
+    "Crédit du Maroc Meknès",
+    "Crédit du Maroc Oujda",
+    "Crédit du Maroc Kénitra",
+    "Crédit du Maroc Laâyoune",
+
+    # Al Barid Bank
+    "Al Barid Bank Casablanca",
+    "Al Barid Bank Rabat",
+    "Al Barid Bank Marrakech",
+    "Al Barid Bank Fès",
+    "Al Barid Bank Tanger",
+    "Al Barid Bank Agadir",
+    "Al Barid Bank Meknès",
+    "Al Barid Bank Oujda",
+    "Al Barid Bank Kénitra",
+    "Al Barid Bank Laâyoune",
+
+    # Société Générale Maroc
+    "Société Générale Casablanca",
+    "Société Générale Rabat",
+    "Société Générale Marrakech",
+    "Société Générale Fès",
+    "Société Générale Tanger",
+    "Société Générale Agadir",
+    "Société Générale Meknès",
+    "Société Générale Oujda",
+    "Société Générale Kénitra",
+    "Société Générale Laâyoune",
+
+    # Bank Al-Maghrib (Banque centrale)
+    "Bank Al-Maghrib Casablanca",
+    "Bank Al-Maghrib Rabat",
+    "Bank Al-Maghrib Marrakech",
+    "Bank Al-Maghrib Fès",
+    "Bank Al-Maghrib Tanger",
+    "Bank Al-Maghrib Agadir",
+    "Bank Al-Maghrib Meknès",
+    "Bank Al-Maghrib Oujda",
+    "Bank Al-Maghrib Kénitra",
+    "Bank Al-Maghrib Laâyoune"
+]
+
+def create_driver():
+    """Configuration du navigateur headless"""
     options = Options()
     options.add_argument("--headless")
     options.add_argument("--disable-gpu")
     options.add_argument("--no-sandbox")
-    driver = webdriver.Chrome(options=options)
-
-    # Recherche Google Maps : banque + ville
-    search_queries = [
-        # Attijariwafa Bank
-        "Attijariwafa bank Casablanca",
-        "Attijariwafa bank Rabat",
-        "Attijariwafa bank Marrakech",
-        "Attijariwafa bank Fès",
-        "Attijariwafa bank Tanger",
-        "Attijariwafa bank Agadir",
-        "Attijariwafa bank Meknès",
-        "Attijariwafa bank Oujda",
-        "Attijariwafa bank Kénitra",
-        "Attijariwafa bank Laâyoune",
-
-        # Banque Populaire
-        "Banque Populaire Casablanca",
-        "Banque Populaire Rabat",
-        "Banque Populaire Marrakech",
-        "Banque Populaire Fès",
-        "Banque Populaire Tanger",
-        "Banque Populaire Agadir",
-        "Banque Populaire Meknès",
-        "Banque Populaire Oujda",
-        "Banque Populaire Kénitra",
-        "Banque Populaire Laâyoune",
-
-        # CIH Bank
-        "CIH Bank Casablanca",
-        "CIH Bank Rabat",
-        "CIH Bank Marrakech",
-        "CIH Bank Fès",
-        "CIH Bank Tanger",
-        "CIH Bank Agadir",
-        "CIH Bank Meknès",
-        "CIH Bank Oujda",
-        "CIH Bank Kénitra",
-        "CIH Bank Laâyoune",
-
-        # BMCE / Bank of Africa
-        "BMCE Casablanca",
-        "BMCE Rabat",
-        "BMCE Marrakech",
-        "BMCE Fès",
-        "BMCE Tanger",
-        "BMCE Agadir",
-        "BMCE Meknès",
-        "BMCE Oujda",
-        "BMCE Kénitra",
-        "BMCE Laâyoune",
-
-        # Crédit du Maroc
-        "Crédit du Maroc Casablanca",
-        "Crédit du Maroc Rabat",
-        "Crédit du Maroc Marrakech",
-        "Crédit du Maroc Fès",
-        "Crédit du Maroc Tanger",
-        "Crédit du Maroc Agadir",
-        "Crédit du Maroc Meknès",
-        "Crédit du Maroc Oujda",
-        "Crédit du Maroc Kénitra",
-        "Crédit du Maroc Laâyoune",
-
-        # Al Barid Bank
-        "Al Barid Bank Casablanca",
-        "Al Barid Bank Rabat",
-        "Al Barid Bank Marrakech",
-        "Al Barid Bank Fès",
-        "Al Barid Bank Tanger",
-        "Al Barid Bank Agadir",
-        "Al Barid Bank Meknès",
-        "Al Barid Bank Oujda",
-        "Al Barid Bank Kénitra",
-        "Al Barid Bank Laâyoune",
-
-        # Société Générale Maroc
-        "Société Générale Casablanca",
-        "Société Générale Rabat",
-        "Société Générale Marrakech",
-        "Société Générale Fès",
-        "Société Générale Tanger",
-        "Société Générale Agadir",
-        "Société Générale Meknès",
-        "Société Générale Oujda",
-        "Société Générale Kénitra",
-        "Société Générale Laâyoune",
-
-        # Bank Al-Maghrib (Banque centrale)
-        "Bank Al-Maghrib Casablanca",
-        "Bank Al-Maghrib Rabat",
-        "Bank Al-Maghrib Marrakech",
-        "Bank Al-Maghrib Fès",
-        "Bank Al-Maghrib Tanger",
-        "Bank Al-Maghrib Agadir",
-        "Bank Al-Maghrib Meknès",
-        "Bank Al-Maghrib Oujda",
-        "Bank Al-Maghrib Kénitra",
-        "Bank Al-Maghrib Laâyoune"
-    ]
-
+    return webdriver.Chrome(options=options)
+
+def search_agency_urls(driver, query, base_url=DEFAULT_BASE_URL):
+    """URLs des agences retournées par une recherche Google Maps"""
+    budget = TimingBudget(SEARCH_TIME_BUDGET)
+    search_url = f"{base_url}/maps/search/ {query.replace(' ', '+')}"
+    driver.get(search_url)
+
+    # Scroll pour charger plus de résultats, tant que la liste s'allonge
+    scroll_area_selector = 'div[role="main"]'
+    if not wait_for_page(driver, scroll_area_selector, PAGE_LOAD_TIMEOUT, "recherche: chargement", budget):
+        print(f"Résultats introuvables pour: {query}")
+        return []
+    result_count = len(driver.find_elements(By.CSS_SELECTOR, 'a.hfpxzc'))
+    stagnant_scrolls = 0
+    for _ in range(20):  
+        driver.execute_script(f"document.querySelector('{scroll_area_selector}').scrollTop += 1000")
+        new_count = wait_for_count_increase(
+            driver, By.CSS_SELECTOR, 'a.hfpxzc', result_count,
+            SEARCH_SCROLL_TIMEOUT, "recherche: scroll", budget
+        )
+        stagnant_scrolls = stagnant_scrolls + 1 if new_count == result_count else 0
+        result_count = new_count
+        if stagnant_scrolls >= MAX_STAGNANT_SCROLLS or budget.exhausted():
+            break
+
+    # Extraire les liens des agences
     urls_data = []
+    places = driver.find_elements(By.CSS_SELECTOR, 'a.hfpxzc')
+    for place in places:
+        name = place.get_attribute('aria-label')
+        url = place.get_attribute('href')
+        if name and url:
+            urls_data.append({'bank': query.split()[0], 'query': query, 'agency': name, 'url': url})
+    return urls_data
+
+def collect_agency_urls(search_queries, n_browsers=DEFAULT_BROWSERS, base_url=DEFAULT_BASE_URL):
+    """Récupère les URLs des agences pour chaque recherche (reprises si le crawl a été interrompu)
+
+    Retourne (URLs, recherches abandonnées). Les URLs ne sont mises en point de
+    reprise que si toutes les recherches ont abouti : sinon le run suivant les relance.
+    """
+    if os.path.exists(CHECKPOINT_URLS_CSV):
+        urls_df = pd.read_csv(CHECKPOINT_URLS_CSV)
+        print(f"{len(urls_df)} URLs reprises depuis le point de reprise.")
+        return urls_df, []
+
     print("Récupération des URLs d'agences...")
-    for query in search_queries:
-        search_url = f"https://www.google.com/maps/search/ {query.replace(' ', '+')}"
-        driver.get(search_url)
-        time.sleep(5)
-
-        # Scroll pour charger plus de résultats
-        scroll_area_selector = 'div[role="main"]'
-        for _ in range(20):  
-            driver.execute_script(f"document.querySelector('{scroll_area_selector}').scrollTop += 1000")
-            time.sleep(1.5)
-
-        # Extraire les liens des agences
-        places = driver.find_elements(By.CSS_SELECTOR, 'a.hfpxzc')
-        for place in places:
-            name = place.get_attribute('aria-label')
-            url = place.get_attribute('href')
-            if name and url:
-                urls_data.append({'bank': query.split()[0], 'query': query, 'agency': name, 'url': url})
-
-    urls_df = pd.DataFrame(urls_data).drop_duplicates(subset="url")
-    urls_df.to_csv("bank_agency_urls.csv", index=False)
+    results = {}
+    results_lock = threading.Lock()
+
+    def handle_query(driver, query):
+        urls_data = search_agency_urls(driver, query, base_url)
+        with results_lock:
+            results[query] = urls_data
+
+    failed_queries = run_browser_pool(search_queries, handle_query, n_browsers, phase="recherche")
+
+    # Fusion dans l'ordre des recherches, indépendamment de l'ordre de fin des sessions
+    urls_data = [url for query in search_queries for url in results.get(query, [])]
+    urls_df = pd.DataFrame(urls_data, columns=['bank', 'query', 'agency', 'url']).drop_duplicates(subset="url")
+    urls_df.to_csv(URLS_CSV, index=False)
+    if failed_queries:
+        print(f"{len(failed_queries)} recherches abandonnées : {', '.join(failed_queries)}")
+    else:
+        urls_df.to_csv(CHECKPOINT_URLS_CSV, index=False)
     print(f"{len(urls_df)} URLs enregistrées.")
-
-    all_reviews = []
-    agency_details = []
-    total_reviews = 0
-    print("\nRécupération des avis clients et informations des agences...")
-
-    for _, row in urls_df.iterrows():
-        print(f"\n{row['agency']}")
-        driver.get(row['url'])
-        time.sleep(5)
-
-        location = "Non disponible"
-        try:
-            location_buttons = driver.find_elements(By.CSS_SELECTOR, "button[aria-label*='adresse' i], button[aria-label*='Adresse' i]")
-            if location_buttons:
-                location = location_buttons[0].text
+    return urls_df, failed_queries
+
+# Sélection des cartes d'avis (à partir de l'index arguments[0], 0 par défaut),
+# commune aux scripts de dépliage et d'extraction groupée
+REVIEW_CARDS_JS = """
+const START_INDEX = arguments[0] || 0;
+const CARD_SELECTORS = ['.jftiEf', '.gws-localreviews__google-review'];
+let cards = [];
+for (const selector of CARD_SELECTORS) {
+    cards = Array.from(document.querySelectorAll(selector));
+    if (cards.length) break;
+}
+cards = cards.slice(START_INDEX);
+const expandButtons = card => Array.from(
+    card.querySelectorAll('button.w8nwRe, button.review-more-link')
+).filter(btn => {
+    const label = btn.innerText.toLowerCase();
+    return btn.offsetParent !== null && (label.includes('plus') || label.includes('more'));
+});
+"""
+
+# Clique sur tous les boutons "Plus" des avis tronqués ; retourne le nombre de clics
+EXPAND_REVIEWS_JS = REVIEW_CARDS_JS + """
+let clicked = 0;
+for (const card of cards) {
+    const btn = expandButtons(card)[0];
+    if (btn) { btn.click(); clicked++; }
+}
+return clicked;
+"""
+
+# Nombre d'avis encore tronqués (bouton "Plus" toujours affiché)
+COUNT_COLLAPSED_REVIEWS_JS = REVIEW_CARDS_JS + """
+return cards.filter(card => expandButtons(card).length > 0).length;
+"""
+
+# Extraction groupée : renvoie toutes les cartes en un seul aller-retour WebDriver,
+# une fois les avis dépliés (expand_reviews). Mêmes sélecteurs et replis que
+# l'extraction élément par élément.
+EXTRACT_REVIEWS_JS = REVIEW_CARDS_JS + """
+const AUTHOR_SELECTORS = ['.d4r55', '.review__author', '.section-review-title'];
+const RATING_SELECTORS = ['.kvMYJc', "[aria-label*='étoile']", "[aria-label*='star']"];
+const DATE_SELECTORS = ['.rsqaWe', '.section-review-publish-date'];
+const TEXT_SELECTORS = ['.wiI7pd', '.section-review-text', '.review-full-text'];
+
+const firstText = (card, selectors) => {
+    for (const selector of selectors) {
+        const el = card.querySelector(selector);
+        const value = el && el.innerText.trim();
+        if (value) return value;
+    }
+    return null;
+};
+const firstAriaLabel = (card, selectors) => {
+    for (const selector of selectors) {
+        const el = card.querySelector(selector);
+        const value = el && el.getAttribute('aria-label');
+        if (value) return value;
+    }
+    return null;
+};
+
+return JSON.stringify(cards.map(card => ({
+    author: firstText(card, AUTHOR_SELECTORS),
+    rating_label: firstAriaLabel(card, RATING_SELECTORS),
+    date: firstText(card, DATE_SELECTORS),
+    text: firstText(card, TEXT_SELECTORS)
+})));
+"""
+
+def expand_reviews(driver, start=0, budget=None):
+    """Déplie les avis tronqués puis attend qu'aucun bouton "Plus" ne reste affiché
+
+    Le texte complet est chargé après le clic : le lire dans la même passe
+    renverrait le texte tronqué.
+    """
+    if not driver.execute_script(EXPAND_REVIEWS_JS, start):
+        return
+    wait_until(lambda: driver.execute_script(COUNT_COLLAPSED_REVIEWS_JS, start) == 0,
+               EXPAND_TIMEOUT, "agence: clic Plus", budget)
+
+def parse_rating(rating_label):
+    """Note numérique extraite du libellé aria ('4 étoiles', '4,5 stars'...)"""
+    rating_match = re.search(r"(\d+[.,]?\d*)", rating_label)
+    return rating_match.group(1).replace(",", ".") if rating_match else rating_label
+
+def parse_review_payload(payload, row, location):
+    """Convertit le JSON renvoyé par EXTRACT_REVIEWS_JS en avis du schéma de sortie"""
+    agency_reviews = []
+    for card in json.loads(payload):
+        author = card.get("author") or "Anonyme"
+        rating = parse_rating(card["rating_label"]) if card.get("rating_label") else "Non spécifié"
+        date = card.get("date") or "Non spécifié"
+        text = card.get("text") or "Non spécifié"
+
+        if author != "Anonyme" or text != "Non spécifié":
+            agency_reviews.append({
+                "bank": row["bank"],
+                "agency": row["agency"],
+                "url": row["url"],
+                "location": location,
+                "author": author,
+                "rating": rating,
+                "date": date,
+                "text": text
+            })
+    return agency_reviews
+
+def extract_location(driver):
+    """Adresse de l'agence affichée sur sa fiche"""
+    location = "Non disponible"
+    try:
+        location_buttons = driver.find_elements(By.CSS_SELECTOR, "button[aria-label*='adresse' i], button[aria-label*='Adresse' i]")
+        if location_buttons:
+            location = location_buttons[0].text
+        else:
+            location_elements = driver.find_elements(By.CSS_SELECTOR, "div.Io6YTe fontsize-normal, div.rogA2c")
+            if location_elements:
+                location = location_elements[0].text
             else:
-                location_elements = driver.find_elements(By.CSS_SELECTOR, "div.Io6YTe fontsize-normal, div.rogA2c")
-                if location_elements:
-                    location = location_elements[0].text
-                else:
-                    all_buttons = driver.find_elements(By.CSS_SELECTOR, "button.CsEnBe")
-                    for button in all_buttons:
-                        text = button.text
-                        if any(c.isdigit() for c in text) and len(text.split()) > 2:
-                            location = text
-                            break
-            # Nettoyage de l'adresse
-            if location != "Non disponible":
-                location = location.replace("Adresse : ", "").replace("Adresse:", "").strip()
-                location = ", ".join([l.strip() for l in location.split("\n") if l.strip()])
-        except Exception as e:
-            print(f"Erreur lors de la récupération de l'adresse: {e}")
-
-        agency_details.append({
-            "bank": row["bank"],
-            "agency": row["agency"],
-            "url": row["url"],
-            "location": location
-        })
-        print(f"Adresse trouvée: {location}")
-
-        # Cliquer sur le bouton d'avis
-        try:
-            try:
-                button = driver.find_element(By.CLASS_NAME, "hh2c6")
-                button.click()
-            except NoSuchElementException:
-                buttons = driver.find_elements(By.CSS_SELECTOR, "button.fontBodyMedium")
-                for btn in buttons:
-                    if "avis" in btn.text.lower():
-                        btn.click()
+                all_buttons = driver.find_elements(By.CSS_SELECTOR, "button.CsEnBe")
+                for button in all_buttons:
+                    text = button.text
+                    if any(c.isdigit() for c in text) and len(text.split()) > 2:
+                        location = text
                         break
-                else:
-                    driver.find_element(By.CSS_SELECTOR, "button[data-item-id*='review']").click()
-            print("Bouton d'avis cliqué avec succès")
-            time.sleep(5)
-        except Exception as e:
-            print(f"Bouton d'avis introuvable: {e}")
-            continue
-
+        # Nettoyage de l'adresse
+        if location != "Non disponible":
+            location = location.replace("Adresse : ", "").replace("Adresse:", "").strip()
+            location = ", ".join([l.strip() for l in location.split("\n") if l.strip()])
+    except Exception as e:
+        print(f"Erreur lors de la récupération de l'adresse: {e}")
+    return location
+
+def open_reviews_panel(driver, budget=None):
+    """Ouvre l'onglet des avis ; False si le bouton est introuvable"""
+    # Cliquer sur le bouton d'avis
+    try:
         try:
-            all_review_buttons = driver.find_elements(By.CSS_SELECTOR, "button.fontBodyMedium")
-            for btn in all_review_buttons:
-                if "tous les avis" in btn.text.lower() or "voir plus" in btn.text.lower():
-                    print("Bouton 'Tous les avis' trouvé et cliqué")
+            button = driver.find_element(By.CLASS_NAME, "hh2c6")
+            button.click()
+        except NoSuchElementException:
+            buttons = driver.find_elements(By.CSS_SELECTOR, "button.fontBodyMedium")
+            for btn in buttons:
+                if "avis" in btn.text.lower():
                     btn.click()
-                    time.sleep(3)
                     break
+            else:
+                driver.find_element(By.CSS_SELECTOR, "button[data-item-id*='review']").click()
+        print("Bouton d'avis cliqué avec succès")
+        wait_for_page(driver, ".jftiEf, div[aria-label*='avis' i]", PAGE_LOAD_TIMEOUT, "agence: onglet avis", budget)
+    except Exception as e:
+        print(f"Bouton d'avis introuvable: {e}")
+        return False
+
+    try:
+        all_review_buttons = driver.find_elements(By.CSS_SELECTOR, "button.fontBodyMedium")
+        for btn in all_review_buttons:
+            if "tous les avis" in btn.text.lower() or "voir plus" in btn.text.lower():
+                print("Bouton 'Tous les avis' trouvé et cliqué")
+                review_count = len(driver.find_elements(By.CLASS_NAME, "jftiEf"))
+                btn.click()
+                wait_for_count_increase(driver, By.CLASS_NAME, "jftiEf", review_count,
+                                        PAGE_LOAD_TIMEOUT, "agence: tous les avis", budget)
+                break
+    except:
+        pass
+    return True
+
+def sort_reviews_by_newest(driver, budget=None):
+    """Trie les avis du plus récent au plus ancien ; False si le menu de tri est introuvable"""
+    try:
+        driver.find_element(By.CSS_SELECTOR, SORT_BUTTON_SELECTOR).click()
+        menu_items = wait_for_page(driver, "div[role='menuitemradio']", PAGE_LOAD_TIMEOUT, "agence: tri des avis", budget)
+        for item in menu_items or []:
+            if any(label in item.text.lower() for label in NEWEST_SORT_LABELS):
+                loaded_cards = driver.find_elements(By.CLASS_NAME, "jftiEf")
+                item.click()
+                # La liste est rechargée : attendre la disparition des anciennes cartes
+                if loaded_cards:
+                    wait_for_staleness(loaded_cards[0], PAGE_LOAD_TIMEOUT, "agence: tri des avis", budget)
+                wait_for_page(driver, ".jftiEf", PAGE_LOAD_TIMEOUT, "agence: tri des avis", budget)
+                print("Avis triés du plus récent au plus ancien")
+                return True
+    except (NoSuchElementException, ElementNotInteractableException, ElementClickInterceptedException) as e:
+        print(f"Tri des avis impossible: {type(e).__name__}")
+    print("Tri par date indisponible, collecte complète de l'agence")
+    return False
+
+def scroll_reviews(driver, budget=None, reached_known=None):
+    """Fait défiler le panneau des avis jusqu'à stagnation du nombre d'avis chargés
+
+    reached_known(start, end) est appelé sur chaque lot de cartes nouvellement
+    chargées : le scroll s'arrête dès qu'il retourne True (avis déjà collecté).
+    """
+    scroll_count = 0
+    max_scrolls = 50 
+    last_review_count = 0
+    stagnation_count = 0
+
+    try:
+        scrollable = None
+        possible_scrollables = [
+            "//div[@aria-label='Avis']", 
+            "//div[contains(@aria-label, 'avis')]",
+            "//div[@role='dialog']//div[contains(@class, 'section-scrollbox')]"
+        ]
+        for selector in possible_scrollables:
+            try:
+                scrollable = driver.find_element(By.XPATH, selector)
+                print(f"Conteneur de scroll trouvé avec: {selector}")
+                break
+            except:
+                continue
+        if not scrollable:
+            print("Aucun conteneur de scroll trouvé")
+            scrollable = driver.find_element(By.TAG_NAME, "body")  
+
+        while scroll_count < max_scrolls:
+            driver.execute_script("arguments[0].scrollTop = arguments[0].scrollHeight", scrollable)
+            # Rend la main dès que de nouveaux avis sont chargés
+            current_count = wait_for_count_increase(
+                driver, By.CLASS_NAME, "jftiEf", last_review_count,
+                REVIEW_SCROLL_TIMEOUT, "agence: scroll avis", budget
+            )
+            print(f"Scroll {scroll_count+1}/{max_scrolls}: {current_count} avis trouvés")
+            if current_count == last_review_count:
+                stagnation_count += 1
+                if stagnation_count >= MAX_STAGNANT_SCROLLS:  
+                    print("Aucun nouvel avis chargé après plusieurs tentatives, arrêt du scroll")
+                    break
+            else:
+                stagnation_count = 0  
+                if reached_known is not None and reached_known(last_review_count, current_count):
+                    print("Avis déjà collecté atteint, arrêt du scroll")
+                    break
+            last_review_count = current_count
+            scroll_count += 1
+            if budget is not None and budget.exhausted():
+                print("Budget de temps de l'agence épuisé, arrêt du scroll")
+                break
+    except Exception as e:
+        print(f"Erreur pendant le scroll: {e}")
+
+def extract_reviews_per_element(driver, row, location, budget=None):
+    """Extrait les avis élément par élément (plusieurs appels WebDriver par avis)"""
+    agency_reviews = []
+    reviews = []
+    for selector in ["jftiEf", "gws-localreviews__google-review"]:
+        try:
+            reviews = driver.find_elements(By.CLASS_NAME, selector)
+            if reviews:
+                print(f"Avis trouvés avec le sélecteur: {selector}")
+                break
         except:
-            pass
+            continue
 
-        scroll_count = 0
-        max_scrolls = 50 
-        last_review_count = 0
-        stagnation_count = 0
+    print(f"Tentative d'extraction de {len(reviews)} avis")
 
+    for review in reviews:
         try:
-            scrollable = None
-            possible_scrollables = [
-                "//div[@aria-label='Avis']", 
-                "//div[contains(@aria-label, 'avis')]",
-                "//div[@role='dialog']//div[contains(@class, 'section-scrollbox')]"
-            ]
-            for selector in possible_scrollables:
-                try:
-                    scrollable = driver.find_element(By.XPATH, selector)
-                    print(f"Conteneur de scroll trouvé avec: {selector}")
-                    break
-                except:
-                    continue
-            if not scrollable:
-                print("Aucun conteneur de scroll trouvé")
-                scrollable = driver.find_element(By.TAG_NAME, "body")  
-
-            while scroll_count < max_scrolls:
-                driver.execute_script("arguments[0].scrollTop = arguments[0].scrollHeight", scrollable)
-                time.sleep(2)  
-                current_reviews = driver.find_elements(By.CLASS_NAME, "jftiEf")
-                print(f"Scroll {scroll_count+1}/{max_scrolls}: {len(current_reviews)} avis trouvés")
-                if len(current_reviews) == last_review_count:
-                    stagnation_count += 1
-                    if stagnation_count >= 7:  
-                        print("Aucun nouvel avis chargé après plusieurs tentatives, arrêt du scroll")
-                        break
-                else:
-                    stagnation_count = 0  
-                last_review_count = len(current_reviews)
-                scroll_count += 1
-        except Exception as e:
-            print(f"Erreur pendant le scroll: {e}")
+            author = "Anonyme"
+            rating = "Non spécifié"
+            date = "Non spécifié"
+            text = "Non spécifié"
 
-        reviews = []
-        for selector in ["jftiEf", "gws-localreviews__google-review"]:
             try:
-                reviews = driver.find_elements(By.CLASS_NAME, selector)
-                if reviews:
-                    print(f"Avis trouvés avec le sélecteur: {selector}")
-                    break
-            except:
-                continue
+                author_selectors = ["d4r55", "review__author", "section-review-title"]
+                for selector in author_selectors:
+                    try:
+                        author_element = review.find_element(By.CLASS_NAME, selector)
+                        author = author_element.text.strip()
+                        if author:
+                            break
+                    except:
+                        continue
+            except Exception as e:
+                print(f"Erreur extraction auteur: {type(e).__name__}")
 
-        agency_review_count = 0
-        print(f"Tentative d'extraction de {len(reviews)} avis")
+            try:
+                rating_selectors = [
+                    (By.CLASS_NAME, "kvMYJc"),
+                    (By.CSS_SELECTOR, "[aria-label*='étoile']"),
+                    (By.CSS_SELECTOR, "[aria-label*='star']")
+                ]
+                for by, selector in rating_selectors:
+                    try:
+                        rating_element = review.find_element(by, selector)
+                        rating = rating_element.get_attribute("aria-label")
+                        if rating:
+                            break
+                    except:
+                        continue
+                if rating != "Non spécifié":
+                    rating_match = re.search(r"(\d+[.,]?\d*)", rating)
+                    if rating_match:
+                        rating = rating_match.group(1).replace(",", ".")
+            except Exception as e:
+                print(f"Erreur extraction note: {type(e).__name__}")
 
-        for review in reviews:
             try:
-                author = "Anonyme"
-                rating = "Non spécifié"
-                date = "Non spécifié"
-                text = "Non spécifié"
+                date_selectors = ["rsqaWe", "section-review-publish-date"]  
+                for selector in date_selectors:
+                    try:
+                        date_element = review.find_element(By.CLASS_NAME, selector)
+                        date = date_element.text.strip()
+                        if date:
+                            break
+                    except:
+                        continue
+            except Exception as e:
+                print(f"Erreur extraction date: {type(e).__name__}")
 
-                try:
-                    author_selectors = ["d4r55", "review__author", "section-review-title"]
-                    for selector in author_selectors:
+            try:
+                text_selectors = ["wiI7pd", "section-review-text", "review-full-text"]
+                for selector in text_selectors:
+                    try:
+                        # Vérifier d'abord s'il y a un bouton "Plus"
                         try:
-                            author_element = review.find_element(By.CLASS_NAME, selector)
-                            author = author_element.text.strip()
-                            if author:
-                                break
+                            more_buttons = review.find_elements(By.CSS_SELECTOR, "button.w8nwRe, button.review-more-link")
+                            for btn in more_buttons:
+                                if "plus" in btn.text.lower() or "more" in btn.text.lower():
+                                    btn.click()
+                                    wait_for_staleness(btn, EXPAND_TIMEOUT, "agence: clic Plus", budget)
+                                    break
                         except:
-                            continue
-                except Exception as e:
-                    print(f"Erreur extraction auteur: {type(e).__name__}")
+                            pass
 
-                try:
-                    rating_selectors = [
-                        (By.CLASS_NAME, "kvMYJc"),
-                        (By.CSS_SELECTOR, "[aria-label*='étoile']"),
-                        (By.CSS_SELECTOR, "[aria-label*='star']")
-                    ]
-                    for by, selector in rating_selectors:
-                        try:
-                            rating_element = review.find_element(by, selector)
-                            rating = rating_element.get_attribute("aria-label")
-                            if rating:
-                                break
-                        except:
-                            continue
-                    if rating != "Non spécifié":
-                        import re
-                        rating_match = re.search(r"(\d+[.,]?\d*)", rating)
-                        if rating_match:
-                            rating = rating_match.group(1).replace(",", ".")
-                except Exception as e:
-                    print(f"Erreur extraction note: {type(e).__name__}")
+                        text_element = review.find_element(By.CLASS_NAME, selector)
+                        text = text_element.text.strip()
+                        if text:
+                            break
+                    except:
+                        continue
+            except Exception as e:
+                print(f"Erreur extraction texte: {type(e).__name__}")
+
+            if author != "Anonyme" or text != "Non spécifié":
+                agency_reviews.append({
+                    "bank": row["bank"],
+                    "agency": row["agency"],
+                    "url": row["url"],
+                    "location": location,
+                    "author": author,
+                    "rating": rating,
+                    "date": date,
+                    "text": text
+                })
+        except Exception as e:
+            print(f"Erreur complète sur un avis: {type(e).__name__}")
+            continue
 
+    return agency_reviews
+
+def extract_reviews(driver, row, location, budget=None):
+    """Extrait les avis chargés sur la fiche de l'agence
+
+    Extraction groupée en un seul appel de script ; repli sur l'extraction
+    élément par élément si le script échoue.
+    """
+    try:
+        expand_reviews(driver, budget=budget)
+        payload = driver.execute_script(EXTRACT_REVIEWS_JS)
+        agency_reviews = parse_review_payload(payload, row, location)
+        print(f"Extraction groupée de {len(agency_reviews)} avis")
+        return agency_reviews
+    except (WebDriverException, ValueError) as e:
+        print(f"Extraction groupée impossible ({type(e).__name__}), extraction élément par élément")
+        return extract_reviews_per_element(driver, row, location, budget)
+
+def scrape_agency(driver, row, known_fingerprints=frozenset()):
+    """Collecte l'adresse et les nouveaux avis d'une agence
+
+    Les avis dont l'empreinte figure dans known_fingerprints (watermark du run
+    précédent) sont écartés ; triés par date, le scroll s'arrête au premier.
+    """
+    budget = TimingBudget(AGENCY_TIME_BUDGET)
+    driver.get(row['url'])
+    wait_for_page(driver, "button.hh2c6, button[data-item-id*='review'], button.fontBodyMedium",
+                  PAGE_LOAD_TIMEOUT, "agence: chargement", budget)
+
+    location = extract_location(driver)
+    print(f"Adresse trouvée: {location}")
+
+    if not open_reviews_panel(driver, budget):
+        return location, []
+
+    sorted_newest = sort_reviews_by_newest(driver, budget)
+    def batch_reaches_known(start, end):
+        """Extraction groupée des seules cartes [start, end) chargées par le dernier scroll"""
+        try:
+            expand_reviews(driver, start, budget)
+            loaded = parse_review_payload(driver.execute_script(EXTRACT_REVIEWS_JS, start), row, location)
+        except (WebDriverException, ValueError):
+            return False
+        return any(review_fingerprint(r["author"], r["text"]) in known_fingerprints for r in loaded)
+
+    # Arrêt anticipé du scroll possible seulement si les avis sont triés par date
+    stop_condition = batch_reaches_known if known_fingerprints and sorted_newest else None
+    scroll_reviews(driver, budget, stop_condition)
+    agency_reviews = extract_reviews(driver, row, location, budget)
+    new_reviews, reached = split_new_reviews(agency_reviews, known_fingerprints, sorted_newest)
+    if known_fingerprints:
+        print(f"{len(new_reviews)} nouveaux avis sur {len(agency_reviews)} chargés"
+              + (" (watermark atteint)" if reached else ""))
+    return location, new_reviews
+
+# Un chromedriver mort ne lève pas WebDriverException : la connexion du client
+# Selenium à son serveur HTTP local échoue (erreurs urllib3 dont MaxRetryError,
+# connexion refusée ou coupée)
+BROWSER_FAILURES = (WebDriverException, Urllib3Error, ConnectionError)
+
+def run_browser_pool(items, handle_item, n_browsers, phase):
+    """Traite une file de travail avec un pool de sessions de navigateur.
+
+    Chaque session consomme la file dans son propre thread. Si le navigateur
+    plante sur un élément, la session est redémarrée et l'élément remis en
+    file (au plus MAX_ITEM_ATTEMPTS tentatives).
+
+    Retourne les éléments abandonnés (tentatives épuisées ou erreur inattendue).
+    """
+    work_queue = queue.Queue()
+    for item in items:
+        work_queue.put((item, 1))
+    abandoned = []
+    abandoned_lock = threading.Lock()
+
+    def session_worker(session_id):
+        driver = create_driver()
+        try:
+            while True:
                 try:
-                    date_selectors = ["rsqaWe", "section-review-publish-date"]  
-                    for selector in date_selectors:
-                        try:
-                            date_element = review.find_element(By.CLASS_NAME, selector)
-                            date = date_element.text.strip()
-                            if date:
-                                break
-                        except:
-                            continue
-                except Exception as e:
-                    print(f"Erreur extraction date: {type(e).__name__}")
-
+                    item, attempt = work_queue.get_nowait()
+                except queue.Empty:
+                    return
                 try:
-                    text_selectors = ["wiI7pd", "section-review-text", "review-full-text"]
-                    for selector in text_selectors:
-                        try:
-                            # Vérifier d'abord s'il y a un bouton "Plus"
-                            try:
-                                more_buttons = review.find_elements(By.CSS_SELECTOR, "button.w8nwRe, button.review-more-link")
-                                for btn in more_buttons:
-                                    if "plus" in btn.text.lower() or "more" in btn.text.lower():
-                                        btn.click()
-                                        time.sleep(0.5)
-                                        break
-                            except:
-                                pass
-
-                            text_element = review.find_element(By.CLASS_NAME, selector)
-                            text = text_element.text.strip()
-                            if text:
-                                break
-                        except:
-                            continue
+                    handle_item(driver, item)
+                except BROWSER_FAILURES as e:
+                    print(f"[{phase} #{session_id}] Navigateur en échec ({type(e).__name__}), redémarrage de la session")
+                    try:
+                        driver.quit()
+                    except Exception:
+                        pass
+                    driver = create_driver()
+                    if attempt < MAX_ITEM_ATTEMPTS:
+                        work_queue.put((item, attempt + 1))
+                    else:
+                        print(f"[{phase} #{session_id}] Abandon après {attempt} tentatives")
+                        with abandoned_lock:
+                            abandoned.append(item)
                 except Exception as e:
-                    print(f"Erreur extraction texte: {type(e).__name__}")
-
-                if author != "Anonyme" or text != "Non spécifié":
-                    all_reviews.append({
-                        "bank": row["bank"],
-                        "agency": row["agency"],
-                        "url": row["url"],
-                        "location": location,
-                        "author": author,
-                        "rating": rating,
-                        "date": date,
-                        "text": text
-                    })
-                    agency_review_count += 1
-            except Exception as e:
-                print(f"Erreur complète sur un avis: {type(e).__name__}")
-                continue
+                    print(f"[{phase} #{session_id}] Erreur inattendue, élément ignoré: {e}")
+                    with abandoned_lock:
+                        abandoned.append(item)
+        finally:
+            try:
+                driver.quit()
+            except BROWSER_FAILURES:
+                pass
+
+    n_sessions = max(1, min(n_browsers, len(items)))
+    threads = [
+        threading.Thread(target=session_worker, args=(session_id,), name=f"{phase}-{session_id}")
+        for session_id in range(n_sessions)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return abandoned
+
+class CheckpointWriter:
+    """Écrit les avis au fil de l'eau dans des fichiers CSV découpés, en ajout seul.
+
+    Chaque agence terminée est inscrite dans le manifeste après l'écriture de ses
+    avis : un run redémarré ignore les URLs déjà présentes dans le manifeste.
+    """
+
+    def __init__(self, checkpoint_dir=CHECKPOINT_DIR, max_rows_per_part=MAX_ROWS_PER_PART):
+        os.makedirs(checkpoint_dir, exist_ok=True)
+        self.max_rows_per_part = max_rows_per_part
+        self.completed_urls = set()
+        self.part_index = 0
+        self.part_rows = 0
+        # Partagé par les sessions du pool de navigateurs
+        self.lock = threading.Lock()
+
+        if os.path.exists(MANIFEST_FILE):
+            with open(MANIFEST_FILE, encoding="utf-8") as manifest:
+                for line in manifest:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self.completed_urls.add(entry["url"])
+                        self.part_index = max(self.part_index, entry["part"])
+        # Un nouveau fichier par run : un fichier interrompu n'est jamais réécrit
+        self.part_index += 1
+
+    def is_completed(self, url):
+        return url in self.completed_urls
+
+    def write_agency(self, row, location, agency_reviews):
+        """Ajoute les avis d'une agence puis la marque comme terminée"""
+        with self.lock:
+            self._write_agency(row, location, agency_reviews)
+
+    def _write_agency(self, row, location, agency_reviews):
+        if self.part_rows >= self.max_rows_per_part:
+            self.part_index += 1
+            self.part_rows = 0
+
+        if agency_reviews:
+            part_path = PART_FILE_PATTERN.format(self.part_index)
+            pd.DataFrame(agency_reviews, columns=REVIEW_COLUMNS).assign(
+                scraped_at=pd.Timestamp.now(tz="UTC").isoformat()
+            ).to_csv(
+                part_path, mode="a", index=False, header=not os.path.exists(part_path), encoding="utf-8"
+            )
+            self.part_rows += len(agency_reviews)
+
+        with open(MANIFEST_FILE, "a", encoding="utf-8") as manifest:
+            manifest.write(json.dumps({
+                "url": row["url"],
+                "bank": row["bank"],
+                "agency": row["agency"],
+                "location": location,
+                "reviews": len(agency_reviews),
+                "part": self.part_index,
+                "completed_at": time.strftime("%Y-%m-%dT%H:%M:%S")
+            }, ensure_ascii=False) + "\n")
+            manifest.flush()
+            os.fsync(manifest.fileno())
+        self.completed_urls.add(row["url"])
+
+def merge_checkpoint_parts(output_path=REVIEWS_CSV):
+    """Fusionne les fichiers de points de reprise dans le CSV final, fichier par fichier.
+
+    En-tête écrit une fois puis chaque fichier ajouté à la suite : la mémoire
+    reste bornée par la taille d'un fichier (MAX_ROWS_PER_PART lignes) et par
+    l'ensemble des empreintes d'avis déjà écrits. Retourne le nombre d'avis écrits.
+    """
+    part_paths = sorted(glob.glob(os.path.join(CHECKPOINT_DIR, "reviews_part_*.csv")))
+    # Une agence interrompue entre l'écriture de ses avis et le manifeste est rejouée au redémarrage
+    # (même avis, horodatage de collecte différent)
+    dedupe_columns = [column for column in REVIEW_COLUMNS if column != "scraped_at"]
+    written_hashes = set()
+    n_written = 0
+
+    pd.DataFrame(columns=REVIEW_COLUMNS).to_csv(output_path, index=False, encoding="utf-8-sig")
+    for path in part_paths:
+        part = pd.read_csv(path, encoding="utf-8", dtype=str, keep_default_na=False)
+        row_hashes = pd.util.hash_pandas_object(part[dedupe_columns], index=False)
+        is_new = ~row_hashes.duplicated() & ~row_hashes.isin(written_hashes)
+        part[is_new].to_csv(output_path, mode="a", header=False, index=False, encoding="utf-8")
+        written_hashes.update(row_hashes[is_new])
+        n_written += int(is_new.sum())
+    return n_written
+
+def main(n_browsers=DEFAULT_BROWSERS, base_url=DEFAULT_BASE_URL, engine=DEFAULT_ENGINE):
+    checkpoint = CheckpointWriter()
+    watermarks = ReviewWatermarks()
+    if not checkpoint.completed_urls:
+        # Nouveau crawl : le CSV du run précédent sera remplacé, ses watermarks en attente
+        # (non promus faute de chargement) ne correspondent plus à aucun avis à charger
+        watermarks.discard_pending()
+    urls_df, failed_queries = collect_agency_urls(SEARCH_QUERIES, n_browsers, base_url)
+
+    remaining = urls_df[~urls_df["url"].map(checkpoint.is_completed)]
+    print("\nRécupération des avis clients et informations des agences...")
+    print(f"{len(urls_df) - len(remaining)} agences déjà traitées, {len(remaining)} restantes")
 
-        print(f"{agency_review_count} avis récupérés.")
-        total_reviews += agency_review_count
+    run_stats = {"reviews": 0}
 
-    df_reviews = pd.DataFrame(all_reviews)
-    df_reviews.to_csv("bank_reviews.csv", index=False, encoding="utf-8-sig")
-    print(f"\nTotal des avis collectés : {total_reviews}")
-    print(f"Total des agences analysées : {len(agency_details)}")
-    print("Avis sauvegardés dans bank_reviews.csv")
-    driver.quit()
+    def handle_agency(driver, row):
+        print(f"\n{row['agency']}")
+        location, agency_reviews = scrape_agency(driver, row, watermarks.known_fingerprints(row["url"]))
+        # Écriture immédiate : un crash ne perd que les agences en cours
+        checkpoint.write_agency(row, location, agency_reviews)
+        watermarks.update(row["url"], agency_reviews)
+        print(f"{row['agency']} : {len(agency_reviews)} avis récupérés.")
+        with checkpoint.lock:
+            run_stats["reviews"] += len(agency_reviews)
+
+    rows = [row for _, row in remaining.iterrows()]
+    if engine == "http":
+        # Import local : aiohttp n'est requis que pour le moteur HTTP
+        from reviews_http_fetcher import collect_reviews_http
+
+        def handle_agency_http(row, location, agency_reviews):
+            checkpoint.write_agency(row, location, agency_reviews)
+            watermarks.update(row["url"], agency_reviews)
+            print(f"{row['agency']} : {len(agency_reviews)} avis récupérés (http).")
+            with checkpoint.lock:
+                run_stats["reviews"] += len(agency_reviews)
+
+        start = time.monotonic()
+        rows = collect_reviews_http(rows, base_url, handle_agency_http, watermarks=watermarks)
+        print(f"\nMoteur HTTP : {len(remaining) - len(rows)} agences en {time.monotonic() - start:.1f}s, "
+              f"{len(rows)} reprises par Selenium")
+
+    abandoned_rows = run_browser_pool(rows, handle_agency, n_browsers, phase="agences") if rows else []
+
+    n_merged = merge_checkpoint_parts()
+    # Watermarks promus par le DAG après le chargement du CSV dans staging_reviews
+    watermarks.compact()
+    print(f"\nAvis collectés pendant ce run : {run_stats['reviews']}")
+    print(f"Nouveaux avis collectés : {n_merged}")
+    print(f"Total des agences analysées : {len(checkpoint.completed_urls)}")
+    print(f"Avis sauvegardés dans {REVIEWS_CSV}")
+    TIMINGS.report()
+
+    if failed_queries or abandoned_rows:
+        # Points de reprise conservés : le prochain run ne relance que les éléments abandonnés
+        print(f"Crawl incomplet ({len(failed_queries)} recherches, {len(abandoned_rows)} agences abandonnées), "
+              f"points de reprise conservés dans {CHECKPOINT_DIR}")
+    else:
+        # Crawl terminé : le prochain run repart d'une recherche complète
+        shutil.rmtree(CHECKPOINT_DIR)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Collecte des avis Google Maps des agences bancaires")
+    parser.add_argument("--browsers", type=int, default=DEFAULT_BROWSERS,
+                        help="Nombre de sessions de navigateur en parallèle")
+    parser.add_argument("--base-url", default=DEFAULT_BASE_URL,
+                        help="Racine Google Maps (ex. http://localhost:8765 pour le serveur de test)")
+    parser.add_argument("--engine", choices=ENGINES, default=DEFAULT_ENGINE,
+                        help="Collecte des avis : navigateur (selenium) ou requêtes directes (http), "
+                             "avec repli Selenium pour les agences en échec")
+    args = parser.parse_args()
+    main(n_browsers=args.browsers, base_url=args.base_url, engine=args.engine)
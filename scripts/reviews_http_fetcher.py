@@ -0,0 +1,165 @@
+"""Moteur de collecte HTTP : récupère les avis sans rendu navigateur
+
+Interroge directement l'endpoint paginé des avis Google Maps
+(listentitiesreviews) avec un client HTTP asynchrone et un pool de
+connexions partagé, puis produit des avis au même schéma que le scraper
+Selenium (bank, agency, url, location, author, rating, date, text).
+
+Les agences dont l'identifiant de lieu est introuvable ou dont la réponse
+ne peut pas être lue sont renvoyées à l'appelant pour un repli Selenium.
+"""
+import asyncio
+import json
+import re
+
+import aiohttp
+
+from review_watermarks import split_new_reviews
+
+REVIEWS_ENDPOINT = "/maps/preview/review/listentitiesreviews"
+REVIEWS_PAGE_SIZE = 10
+MAX_PAGES = 50
+
+# Tri des avis : 1 = pertinence, 2 = plus récents
+SORT_NEWEST = 2
+
+# Connexions simultanées (pool partagé par toutes les agences)
+DEFAULT_CONCURRENCY = 16
+REQUEST_TIMEOUT_SECONDS = 30
+
+# Identifiant de lieu présent dans l'URL des fiches : !1s0x<hex>:0x<hex>
+FEATURE_ID_RE = re.compile(r"!1s(0x[0-9a-fA-F]+):(0x[0-9a-fA-F]+)")
+ADDRESS_RE = re.compile(r'aria-label="Adresse\s*:\s*([^"]+)"', re.IGNORECASE)
+RATING_RE = re.compile(r"(\d+[.,]?\d*)")
+
+# Préfixe anti-XSSI des réponses JSON de Google
+XSSI_PREFIX = ")]}'"
+
+# Position des champs dans une entrée d'avis de la réponse
+REVIEWS_LIST_INDEX = 2
+AUTHOR_PATH = (0, 1)
+DATE_INDEX = 1
+TEXT_INDEX = 3
+RATING_INDEX = 4
+
+class ReviewPayloadError(ValueError):
+    """Réponse d'avis illisible : l'agence doit être reprise par Selenium"""
+
+def parse_feature_id(url):
+    """Identifiant de lieu (deux entiers) extrait de l'URL de la fiche"""
+    match = FEATURE_ID_RE.search(url)
+    if not match:
+        raise ReviewPayloadError(f"Identifiant de lieu introuvable dans {url}")
+    return int(match.group(1), 16), int(match.group(2), 16)
+
+def build_reviews_url(base_url, feature_id, offset, sort=SORT_NEWEST):
+    """URL d'une page d'avis (protobuf 'pb' de l'endpoint listentitiesreviews)"""
+    high, low = feature_id
+    pb = (
+        f"!1m2!1y{high}!2y{low}!2m2!1i{offset}!2i{REVIEWS_PAGE_SIZE}"
+        f"!3e{sort}!4m5!4b1!5b1!6b1!7b1!5m2!1s!7e81"
+    )
+    return f"{base_url}{REVIEWS_ENDPOINT}?authuser=0&hl=fr&gl=ma&pb={pb}"
+
+def parse_reviews_payload(body):
+    """Liste des avis bruts (author, rating, date, text) d'une page de réponse"""
+    if body.startswith(XSSI_PREFIX):
+        body = body[len(XSSI_PREFIX):]
+    try:
+        payload = json.loads(body)
+    except json.JSONDecodeError as e:
+        raise ReviewPayloadError(f"Réponse JSON invalide: {e}") from e
+
+    entries = payload[REVIEWS_LIST_INDEX] if len(payload) > REVIEWS_LIST_INDEX else None
+    reviews = []
+    for entry in entries or []:
+        try:
+            reviews.append({
+                "author": entry[AUTHOR_PATH[0]][AUTHOR_PATH[1]],
+                "rating": entry[RATING_INDEX],
+                "date": entry[DATE_INDEX],
+                "text": entry[TEXT_INDEX],
+            })
+        except (IndexError, TypeError) as e:
+            raise ReviewPayloadError(f"Entrée d'avis inattendue: {e}") from e
+    return reviews
+
+def to_review_record(raw_review, row, location):
+    """Avis au schéma de sortie du scraper (mêmes valeurs par défaut)"""
+    rating = raw_review["rating"]
+    if rating is None:
+        rating = "Non spécifié"
+    else:
+        rating_match = RATING_RE.search(str(rating))
+        rating = rating_match.group(1).replace(",", ".") if rating_match else str(rating)
+
+    return {
+        "bank": row["bank"],
+        "agency": row["agency"],
+        "url": row["url"],
+        "location": location,
+        "author": (raw_review["author"] or "").strip() or "Anonyme",
+        "rating": rating,
+        "date": (raw_review["date"] or "").strip() or "Non spécifié",
+        "text": (raw_review["text"] or "").strip() or "Non spécifié",
+    }
+
+def parse_place_location(html):
+    """Adresse de l'agence lue dans le HTML brut de la fiche, sans rendu"""
+    match = ADDRESS_RE.search(html)
+    return match.group(1).strip() if match else "Non disponible"
+
+async def fetch_text(session, url):
+    async with session.get(url) as response:
+        response.raise_for_status()
+        return await response.text()
+
+async def fetch_agency_reviews(session, row, base_url, known_fingerprints=frozenset(), max_pages=MAX_PAGES):
+    """Adresse et nouveaux avis d'une agence, page par page (plus récents d'abord)
+
+    S'arrête à la dernière page ou au premier avis déjà collecté (watermark).
+    """
+    feature_id = parse_feature_id(row["url"])
+    location = parse_place_location(await fetch_text(session, row["url"]))
+
+    agency_reviews = []
+    for page in range(max_pages):
+        body = await fetch_text(session, build_reviews_url(base_url, feature_id, page * REVIEWS_PAGE_SIZE))
+        page_reviews = parse_reviews_payload(body)
+        records = [
+            record for record in (to_review_record(raw, row, location) for raw in page_reviews)
+            if record["author"] != "Anonyme" or record["text"] != "Non spécifié"
+        ]
+        new_records, reached_known = split_new_reviews(records, known_fingerprints)
+        agency_reviews.extend(new_records)
+        if reached_known or len(page_reviews) < REVIEWS_PAGE_SIZE:
+            break
+    return location, agency_reviews
+
+async def fetch_all_agencies(rows, base_url, on_agency, concurrency=DEFAULT_CONCURRENCY, watermarks=None):
+    """Collecte toutes les agences en parallèle ; retourne les lignes en échec"""
+    connector = aiohttp.TCPConnector(limit=concurrency, limit_per_host=concurrency)
+    timeout = aiohttp.ClientTimeout(total=REQUEST_TIMEOUT_SECONDS)
+    semaphore = asyncio.Semaphore(concurrency)
+    failed_rows = []
+
+    async def fetch_one(session, row):
+        async with semaphore:
+            try:
+                known_fingerprints = watermarks.known_fingerprints(row["url"]) if watermarks else frozenset()
+                location, agency_reviews = await fetch_agency_reviews(session, row, base_url, known_fingerprints)
+            except Exception as e:
+                # Toute erreur propre à une agence l'envoie au repli Selenium,
+                # sans interrompre la collecte des autres agences
+                print(f"[http] {row['agency']} : échec ({type(e).__name__}: {e}), repli Selenium")
+                failed_rows.append(row)
+                return
+        on_agency(row, location, agency_reviews)
+
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        await asyncio.gather(*(fetch_one(session, row) for row in rows))
+    return failed_rows
+
+def collect_reviews_http(rows, base_url, on_agency, concurrency=DEFAULT_CONCURRENCY, watermarks=None):
+    """Point d'entrée synchrone du moteur HTTP"""
+    return asyncio.run(fetch_all_agencies(rows, base_url, on_agency, concurrency, watermarks))
@@ -0,0 +1,124 @@
+"""Attentes conditionnelles pour le scraper Google Maps
+
+Remplace les time.sleep() fixes : on interroge le DOM jusqu'à ce qu'une
+condition concrète soit vraie (conteneur présent, nombre d'avis en hausse...),
+avec un intervalle d'interrogation croissant et un budget de temps global.
+Chaque attente est chronométrée par phase.
+"""
+import threading
+import time
+from collections import defaultdict
+
+from selenium.common.exceptions import (
+    NoSuchElementException,
+    StaleElementReferenceException,
+    WebDriverException,
+)
+from selenium.webdriver.common.by import By
+
+# Intervalle d'interrogation : démarre court puis s'allonge (backoff)
+INITIAL_POLL_SECONDS = 0.05
+MAX_POLL_SECONDS = 1.0
+POLL_BACKOFF = 1.5
+
+# Erreurs transitoires pendant que la page se construit : la condition est simplement fausse
+TRANSIENT_ERRORS = (NoSuchElementException, StaleElementReferenceException)
+
+class PhaseTimings:
+    """Temps cumulé et nombre d'attentes par phase, partagé entre les sessions"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._seconds = defaultdict(float)
+        self._counts = defaultdict(int)
+        self._timeouts = defaultdict(int)
+
+    def record(self, phase, seconds, timed_out=False):
+        with self._lock:
+            self._seconds[phase] += seconds
+            self._counts[phase] += 1
+            self._timeouts[phase] += int(timed_out)
+
+    def report(self):
+        """Affiche le temps passé à attendre, par phase"""
+        with self._lock:
+            print("\n⏱️  Temps d'attente par phase :")
+            for phase in sorted(self._seconds, key=self._seconds.get, reverse=True):
+                count = self._counts[phase]
+                print(f"  {phase}: {self._seconds[phase]:.1f}s sur {count} attentes "
+                      f"(moy. {self._seconds[phase] / count:.2f}s, {self._timeouts[phase]} expirées)")
+
+# Statistiques globales du crawl
+TIMINGS = PhaseTimings()
+
+class TimingBudget:
+    """Budget de temps d'une unité de travail (une agence, une recherche)
+
+    Une fois épuisé, les attentes suivantes rendent la main immédiatement :
+    le temps passé sur une page est borné quel que soit son comportement.
+    """
+
+    def __init__(self, total_seconds):
+        self.deadline = time.monotonic() + total_seconds
+
+    def remaining(self):
+        return max(0.0, self.deadline - time.monotonic())
+
+    def exhausted(self):
+        return self.remaining() <= 0
+
+def wait_until(condition, timeout, phase, budget=None):
+    """Interroge condition() jusqu'à ce qu'elle soit vraie ou que le délai expire
+
+    Retourne la valeur de la condition, ou None si le délai (borné par le
+    budget) a expiré.
+    """
+    if budget is not None:
+        timeout = min(timeout, budget.remaining())
+    start = time.monotonic()
+    deadline = start + timeout
+    poll = INITIAL_POLL_SECONDS
+
+    while True:
+        try:
+            result = condition()
+        except TRANSIENT_ERRORS:
+            result = None
+        if result:
+            TIMINGS.record(phase, time.monotonic() - start)
+            return result
+
+        now = time.monotonic()
+        if now >= deadline:
+            TIMINGS.record(phase, now - start, timed_out=True)
+            return None
+        time.sleep(min(poll, deadline - now))
+        poll = min(poll * POLL_BACKOFF, MAX_POLL_SECONDS)
+
+def wait_for_page(driver, css_selector, timeout, phase, budget=None):
+    """Attend la fin du chargement du document et la présence d'un élément"""
+    def page_ready():
+        if driver.execute_script("return document.readyState") != "complete":
+            return None
+        return driver.find_elements(By.CSS_SELECTOR, css_selector)
+
+    return wait_until(page_ready, timeout, phase, budget)
+
+def wait_for_count_increase(driver, by, selector, previous_count, timeout, phase, budget=None):
+    """Attend que le nombre d'éléments dépasse previous_count ; retourne le nouveau nombre"""
+    def count_increased():
+        count = len(driver.find_elements(by, selector))
+        return count if count > previous_count else None
+
+    count = wait_until(count_increased, timeout, phase, budget)
+    return count if count is not None else len(driver.find_elements(by, selector))
+
+def wait_for_staleness(element, timeout, phase, budget=None):
+    """Attend qu'un élément disparaisse ou soit masqué (ex. bouton 'Plus' après clic)"""
+    def element_gone():
+        try:
+            return not element.is_displayed()
+        except (StaleElementReferenceException, WebDriverException):
+            return True
+
+    return wait_until(element_gone, timeout, phase, budget)
@@ -0,0 +1,24 @@
+import os
+import sys
+import threading
+
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Scraper (scripts/) et pipeline NLP (bank_reviews_transform/scripts/)
+for scripts_dir in ("scripts", os.path.join("bank_reviews_transform", "scripts")):
+    sys.path.insert(0, os.path.join(ROOT_DIR, scripts_dir))
+
+@pytest.fixture
+def standin_base_url():
+    """Serveur local de substitution Google Maps (port libre), arrêté en fin de test"""
+    from maps_standin_server import make_server
+
+    server = make_server(port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
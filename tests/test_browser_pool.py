@@ -0,0 +1,105 @@
+import threading
+import urllib.request
+
+import pytest
+
+pytest.importorskip("selenium")
+
+import reviews_collection
+from selenium.common.exceptions import WebDriverException
+from urllib3.exceptions import MaxRetryError
+
+class FakeDriver:
+    """Session de navigateur minimale : charge les pages du serveur de substitution"""
+
+    def __init__(self, crashes):
+        self.crashes = crashes
+        self.session_error = crashes.get("error", WebDriverException("chrome not reachable"))
+        self.quit_calls = 0
+        self.page_source = None
+
+    def get(self, url):
+        # crashes[url] : nombre de plantages restants avant un chargement réussi
+        with self.crashes["lock"]:
+            if self.crashes.get(url, 0) > 0:
+                self.crashes[url] -= 1
+                raise self.session_error
+        with urllib.request.urlopen(url, timeout=5) as response:
+            self.page_source = response.read().decode("utf-8")
+
+    def quit(self):
+        self.quit_calls += 1
+
+@pytest.fixture
+def fake_drivers(monkeypatch):
+    drivers = []
+    crashes = {"lock": threading.Lock()}
+
+    def create_driver():
+        driver = FakeDriver(crashes)
+        drivers.append(driver)
+        return driver
+
+    monkeypatch.setattr(reviews_collection, "create_driver", create_driver)
+    return drivers, crashes
+
+def run_pool(urls, n_browsers):
+    loaded = []
+    lock = threading.Lock()
+
+    def handle_item(driver, url):
+        driver.get(url)
+        assert "Adresse" in driver.page_source
+        with lock:
+            loaded.append(url)
+
+    abandoned = reviews_collection.run_browser_pool(urls, handle_item, n_browsers, phase="test")
+    return loaded, abandoned
+
+def place_urls(base_url, count):
+    return [f"{base_url}/maps/place/agence-{i}/data=!4m2!3m1!1s0xd7b2a1c3e4f5a6b7:0x{i}" for i in range(1, count + 1)]
+
+def test_pool_processes_every_item(standin_base_url, fake_drivers):
+    drivers, _ = fake_drivers
+    urls = place_urls(standin_base_url, 6)
+
+    loaded, abandoned = run_pool(urls, n_browsers=3)
+    assert sorted(loaded) == sorted(urls)
+    assert abandoned == []
+    assert len(drivers) == 3
+    assert all(driver.quit_calls == 1 for driver in drivers)
+
+def test_crashed_session_is_restarted_and_item_retried(standin_base_url, fake_drivers):
+    drivers, crashes = fake_drivers
+    urls = place_urls(standin_base_url, 3)
+    crashes[urls[1]] = reviews_collection.MAX_ITEM_ATTEMPTS - 1
+
+    loaded, abandoned = run_pool(urls, n_browsers=1)
+    assert sorted(loaded) == sorted(urls)
+    assert abandoned == []
+    # Une session initiale + un redémarrage par plantage, chacune fermée
+    assert len(drivers) == reviews_collection.MAX_ITEM_ATTEMPTS
+    assert all(driver.quit_calls == 1 for driver in drivers)
+
+def test_item_abandoned_after_max_attempts(standin_base_url, fake_drivers):
+    drivers, crashes = fake_drivers
+    urls = place_urls(standin_base_url, 3)
+    crashes[urls[0]] = reviews_collection.MAX_ITEM_ATTEMPTS
+
+    loaded, abandoned = run_pool(urls, n_browsers=1)
+    assert sorted(loaded) == sorted(urls[1:])
+    assert abandoned == [urls[0]]
+    assert crashes[urls[0]] == 0
+    assert len(drivers) == reviews_collection.MAX_ITEM_ATTEMPTS + 1
+
+def test_dead_chromedriver_connection_restarts_session(standin_base_url, fake_drivers):
+    drivers, crashes = fake_drivers
+    urls = place_urls(standin_base_url, 2)
+    # Chromedriver arrêté : le client Selenium échoue dans urllib3, sans WebDriverException
+    crashes["error"] = MaxRetryError(None, urls[0], reason=ConnectionRefusedError())
+    crashes[urls[0]] = 1
+
+    loaded, abandoned = run_pool(urls, n_browsers=1)
+    assert sorted(loaded) == sorted(urls)
+    assert abandoned == []
+    assert len(drivers) == 2
@@ -0,0 +1,41 @@
+import os
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("selenium")
+
+import reviews_collection
+from reviews_collection import REVIEW_COLUMNS
+
+def review(author, text, scraped_at):
+    return {"bank": "CIH", "agency": "Agence Maarif", "url": "https://maps.example/agence-1",
+            "location": "Casablanca", "author": author, "rating": "4", "date": "il y a 2 jours",
+            "text": text, "scraped_at": scraped_at}
+
+def test_merge_streams_parts_and_drops_replayed_reviews(tmp_path, monkeypatch):
+    monkeypatch.setattr(reviews_collection, "CHECKPOINT_DIR", str(tmp_path))
+    first = [review("Amine", "Très bon accueil", "2026-01-01T08:00:00"), review("NA", "", "2026-01-01T08:00:00")]
+    # Agence rejouée après un redémarrage : mêmes avis, autre horodatage de collecte
+    replayed = [review("Amine", "Très bon accueil", "2026-01-01T09:00:00"), review("Sara", "Attente longue", "2026-01-01T09:00:00")]
+    for index, rows in enumerate([first, replayed]):
+        pd.DataFrame(rows, columns=REVIEW_COLUMNS).to_csv(tmp_path / f"reviews_part_{index:05d}.csv", index=False)
+
+    output_path = tmp_path / "bank_reviews.csv"
+    assert reviews_collection.merge_checkpoint_parts(str(output_path)) == 3
+
+    merged = pd.read_csv(output_path, encoding="utf-8-sig", dtype=str, keep_default_na=False)
+    assert list(merged.columns) == REVIEW_COLUMNS
+    assert merged[["author", "text", "scraped_at"]].values.tolist() == [
+        ["Amine", "Très bon accueil", "2026-01-01T08:00:00"],
+        ["NA", "", "2026-01-01T08:00:00"],
+        ["Sara", "Attente longue", "2026-01-01T09:00:00"],
+    ]
+
+def test_merge_without_parts_writes_header_only(tmp_path, monkeypatch):
+    monkeypatch.setattr(reviews_collection, "CHECKPOINT_DIR", str(tmp_path))
+    output_path = tmp_path / "bank_reviews.csv"
+
+    assert reviews_collection.merge_checkpoint_parts(str(output_path)) == 0
+    assert os.path.getsize(output_path) > 0
+    assert pd.read_csv(output_path, encoding="utf-8-sig").empty
@@ -0,0 +1,41 @@
+from result_writer import RESULT_TABLES, _missing_ddl_statements
+
+class CatalogCursor:
+    """Curseur minimal : renvoie les colonnes puis les index de la table"""
+
+    def __init__(self, columns, indexes):
+        self.results = [[(column,) for column in columns], [(index,) for index in indexes]]
+
+    def execute(self, sql, params=None):
+        self.rows = self.results.pop(0)
+
+    def fetchall(self):
+        return self.rows
+
+SPEC = RESULT_TABLES['topic_analysis']
+ALL_INDEXES = ['topic_analysis_review_id_idx', 'topic_analysis_extracted_at_idx']
+
+def test_up_to_date_table_needs_no_ddl():
+    cursor = CatalogCursor(list(SPEC['columns']), ALL_INDEXES)
+    assert _missing_ddl_statements(cursor, 'topic_analysis', SPEC) == []
+
+def test_only_missing_column_and_index_are_added():
+    columns = [column for column in SPEC['columns'] if column != 'language']
+    cursor = CatalogCursor(columns, ['topic_analysis_review_id_idx'])
+    assert _missing_ddl_statements(cursor, 'topic_analysis', SPEC) == [
+        "ALTER TABLE topic_analysis ADD COLUMN language TEXT",
+        "CREATE INDEX topic_analysis_extracted_at_idx ON topic_analysis (extracted_at)",
+    ]
+
+def test_missing_table_is_created_with_indexes():
+    statements = _missing_ddl_statements(CatalogCursor([], []), 'topic_analysis', SPEC)
+    assert statements[0].startswith("CREATE TABLE topic_analysis (review_id TEXT NOT NULL")
+    assert statements[1:] == [
+        "CREATE UNIQUE INDEX topic_analysis_review_id_idx ON topic_analysis (review_id)",
+        "CREATE INDEX topic_analysis_extracted_at_idx ON topic_analysis (extracted_at)",
+    ]
+
+def test_legacy_table_without_key_index_is_rebuilt():
+    statements = _missing_ddl_statements(CatalogCursor(['review_id', 'topic_category'], []), 'topic_analysis', SPEC)
+    assert statements[0] == "DROP TABLE topic_analysis"
+    assert statements[1].startswith("CREATE TABLE topic_analysis")
@@ -0,0 +1,28 @@
+from review_watermarks import ReviewWatermarks, review_fingerprint
+
+URL = "https://maps.example/agence-1"
+REVIEWS = [{"author": "Amine", "text": "Très bon accueil"}, {"author": "Sara", "text": "Attente trop longue"}]
+
+def make_watermarks(tmp_path):
+    return ReviewWatermarks(str(tmp_path / "watermarks.jsonl"), str(tmp_path / "watermarks.pending.jsonl"))
+
+def test_update_stays_pending_until_promoted(tmp_path):
+    watermarks = make_watermarks(tmp_path)
+    watermarks.update(URL, REVIEWS)
+    assert watermarks.known_fingerprints(URL) == frozenset()
+
+    # Chargement en échec : un nouveau crawl recollecte les mêmes avis
+    retry = make_watermarks(tmp_path)
+    assert retry.known_fingerprints(URL) == frozenset()
+
+    assert make_watermarks(tmp_path).promote_pending() == 1
+    expected = {review_fingerprint(r["author"], r["text"]) for r in REVIEWS}
+    assert make_watermarks(tmp_path).known_fingerprints(URL) == expected
+    assert not (tmp_path / "watermarks.pending.jsonl").exists()
+
+def test_discard_pending_drops_unloaded_updates(tmp_path):
+    watermarks = make_watermarks(tmp_path)
+    watermarks.update(URL, REVIEWS)
+    watermarks.discard_pending()
+    assert make_watermarks(tmp_path).promote_pending() == 0
+    assert make_watermarks(tmp_path).known_fingerprints(URL) == frozenset()
@@ -0,0 +1,51 @@
+import json
+import os
+
+import pytest
+
+pytest.importorskip("aiohttp")
+
+from maps_standin_server import FIXTURES_DIR
+from reviews_http_fetcher import XSSI_PREFIX, collect_reviews_http
+
+PLACE_PATH = "/maps/place/agence-centre-1/data=!4m2!3m1!1s0xd7b2a1c3e4f5a6b7:0x1"
+
+def fixture_reviews():
+    """Avis attendus, lus directement dans les réponses enregistrées"""
+    expected = []
+    for page in (0, 1):
+        with open(os.path.join(FIXTURES_DIR, f"listentitiesreviews_page_{page}.txt"), encoding="utf-8") as f:
+            payload = json.loads(f.read()[len(XSSI_PREFIX):])
+        for entry in payload[2]:
+            expected.append({"author": entry[0][1], "date": entry[1], "text": entry[3], "rating": str(entry[4])})
+    return expected
+
+def collect(rows, base_url):
+    collected = {}
+
+    def on_agency(row, location, agency_reviews):
+        collected[row["agency"]] = (location, agency_reviews)
+
+    failed_rows = collect_reviews_http(rows, base_url, on_agency, concurrency=2)
+    return collected, failed_rows
+
+def test_collects_all_pages_from_standin(standin_base_url):
+    row = {"bank": "Attijariwafa", "agency": "Agence Centre", "url": standin_base_url + PLACE_PATH}
+    collected, failed_rows = collect([row], standin_base_url)
+
+    assert failed_rows == []
+    location, agency_reviews = collected["Agence Centre"]
+    assert location == "12 Boulevard Mohammed V, Casablanca"
+    assert [
+        {key: review[key] for key in ("author", "date", "text", "rating")} for review in agency_reviews
+    ] == fixture_reviews()
+    assert all(review["url"] == row["url"] and review["bank"] == "Attijariwafa" for review in agency_reviews)
+
+def test_failing_agency_falls_back_without_stopping_others(standin_base_url):
+    good = {"bank": "CIH", "agency": "Agence Maarif", "url": standin_base_url + PLACE_PATH}
+    no_feature_id = {"bank": "CIH", "agency": "Sans identifiant", "url": standin_base_url + "/maps/place/agence"}
+    broken = {"bank": "CIH", "agency": "Ligne invalide", "url": None}
+    collected, failed_rows = collect([no_feature_id, broken, good], standin_base_url)
+
+    assert [row["agency"] for row in failed_rows] == ["Sans identifiant", "Ligne invalide"]
+    assert len(collected["Agence Maarif"][1]) == 20
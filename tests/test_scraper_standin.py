@@ -0,0 +1,48 @@
+import pytest
+
+pytest.importorskip("selenium")
+
+import reviews_collection
+from review_watermarks import review_fingerprint
+from selenium.common.exceptions import WebDriverException
+
+QUERY = "CIH Casablanca"
+
+@pytest.fixture(scope="module")
+def driver():
+    """Chrome headless réel : la recherche et la fiche d'agence s'appuient sur le JavaScript des fixtures"""
+    try:
+        driver = reviews_collection.create_driver()
+    except WebDriverException as e:
+        pytest.skip(f"Chrome headless indisponible : {e.msg}")
+    yield driver
+    driver.quit()
+
+@pytest.fixture
+def agency_row(standin_base_url, driver):
+    url = reviews_collection.search_agency_urls(driver, QUERY, standin_base_url)[0]["url"]
+    return {"bank": "CIH", "agency": "Agence Centre", "url": url}
+
+def test_search_returns_agency_links(standin_base_url, driver):
+    urls_data = reviews_collection.search_agency_urls(driver, QUERY, standin_base_url)
+
+    assert [row["agency"] for row in urls_data] == [f"{QUERY} - Agence {district}" for district in ("Centre", "Maarif", "Agdal")]
+    assert all(row["bank"] == "CIH" and row["query"] == QUERY for row in urls_data)
+    assert all(row["url"].startswith(f"{standin_base_url}/maps/place/") and "!1s0x" in row["url"] for row in urls_data)
+
+def test_scrape_agency_collects_every_review(driver, agency_row):
+    location, agency_reviews = reviews_collection.scrape_agency(driver, agency_row)
+
+    assert location == "12 Boulevard Mohammed V, Casablanca"
+    assert [review["author"] for review in agency_reviews] == [f"Client {i}" for i in range(1, 41)]
+    # Textes dépliés (bouton « Plus ») et notes lues sur le libellé des étoiles
+    assert not any(review["text"].endswith("…") for review in agency_reviews)
+    assert all(review["rating"] in {"1", "2", "3", "4", "5"} for review in agency_reviews)
+
+def test_scrape_agency_stops_at_watermark(driver, agency_row):
+    _, all_reviews = reviews_collection.scrape_agency(driver, agency_row)
+    known = frozenset({review_fingerprint(all_reviews[4]["author"], all_reviews[4]["text"])})
+
+    _, new_reviews = reviews_collection.scrape_agency(driver, agency_row, known)
+
+    assert new_reviews == all_reviews[:4]
@@ -0,0 +1,26 @@
+import re
+
+import pytest
+
+pytest.importorskip("sklearn")
+
+from topic_extraction import ALL_STOPWORDS, tokenize
+
+def baseline_preprocess(text):
+    """Prétraitement d'origine (trois re.sub puis filtres), référence des tokens"""
+    text = text.lower()
+    text = re.sub(r'[^\w\s]', ' ', text)
+    text = re.sub(r'\d+', '', text)
+    text = re.sub(r'\s+', ' ', text).strip()
+    words = [word for word in text.split() if len(word) > 2]
+    return [word for word in words if word not in ALL_STOPWORDS]
+
+@pytest.mark.parametrize("text", [
+    "Très bon accueil, le conseiller était rapide et efficace. Avis numéro 1.",
+    "Attente de 45min au guichet2 !! Agence24h fermée",
+    "الخدمة جيدة والموظفون محترمون ١٢٣ Avis numéro 5",
+    "frais-bancaires: 3x plus chers, app_mobile ok",
+    "",
+])
+def test_tokenize_matches_baseline_preprocessing(text):
+    assert tokenize(text) == baseline_preprocess(text)